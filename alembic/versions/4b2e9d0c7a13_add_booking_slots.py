@@ -0,0 +1,43 @@
+"""add booking slots
+
+Revision ID: 4b2e9d0c7a13
+Revises: 8f1c7891098f
+Create Date: 2026-10-17 23:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b2e9d0c7a13'
+down_revision = '8f1c7891098f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'booking_slots',
+        sa.Column('datetime', sa.DateTime(), nullable=False),
+        sa.Column('reserved', sa.Integer(), nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.CheckConstraint('reserved >= 0', name='ck_booking_slots_reserved'),
+        sa.PrimaryKeyConstraint('datetime'),
+    )
+
+    # Счетчики по уже существующим броням
+    op.execute(
+        """
+        INSERT INTO booking_slots (datetime, reserved)
+        SELECT datetime, COALESCE(SUM(number_persons), 0)
+        FROM bookings
+        WHERE status != 'cancelled'
+        GROUP BY datetime
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('booking_slots')
@@ -0,0 +1,42 @@
+"""add booking occupancy
+
+Revision ID: 6d3f1a9e2b54
+Revises: 4b2e9d0c7a13
+Create Date: 2026-10-18 00:20:37.904112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d3f1a9e2b54'
+down_revision = '4b2e9d0c7a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'booking_occupancy',
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('persons', sa.Integer(), nullable=False),
+        sa.Column('bookings', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('hour', 'status'),
+    )
+
+    # Агрегат по уже существующим броням
+    op.execute(
+        """
+        INSERT INTO booking_occupancy (hour, status, persons, bookings)
+        SELECT date_trunc('hour', datetime), status, COALESCE(SUM(number_persons), 0), COUNT(*)
+        FROM bookings
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('booking_occupancy')
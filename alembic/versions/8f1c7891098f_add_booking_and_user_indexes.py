@@ -0,0 +1,41 @@
+"""add booking and user indexes
+
+Revision ID: 8f1c7891098f
+Revises: cd5c2fad49c3
+Create Date: 2026-10-17 22:10:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f1c7891098f'
+down_revision = 'cd5c2fad49c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Списки броней и пользователей (keyset-пагинация по (created_at, guid))
+    op.create_index('ix_bookings_created_at_guid', 'bookings', ['created_at', 'guid'])
+    op.create_index('ix_bookings_user_guid_created_at_guid', 'bookings', ['user_guid', 'created_at', 'guid'])
+    op.create_index('ix_users_created_at_guid', 'users', ['created_at', 'guid'])
+    op.create_index('ix_users_role_created_at_guid', 'users', ['role', 'created_at', 'guid'])
+
+    # Выборки по времени брони и статусу
+    op.create_index('ix_bookings_datetime_status', 'bookings', ['datetime', 'status'])
+
+    # Удаление пользователя и каскад по внешним ключам user_created/user_updated
+    op.create_index('ix_bookings_user_created', 'bookings', ['user_created'])
+    op.create_index('ix_bookings_user_updated', 'bookings', ['user_updated'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_user_updated', table_name='bookings')
+    op.drop_index('ix_bookings_user_created', table_name='bookings')
+    op.drop_index('ix_bookings_datetime_status', table_name='bookings')
+    op.drop_index('ix_users_role_created_at_guid', table_name='users')
+    op.drop_index('ix_users_created_at_guid', table_name='users')
+    op.drop_index('ix_bookings_user_guid_created_at_guid', table_name='bookings')
+    op.drop_index('ix_bookings_created_at_guid', table_name='bookings')
@@ -0,0 +1,70 @@
+"""soft delete
+
+Revision ID: 9c4e7b1d2f60
+Revises: 6d3f1a9e2b54
+Create Date: 2026-10-18 02:41:09.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e7b1d2f60'
+down_revision = '6d3f1a9e2b54'
+branch_labels = None
+depends_on = None
+
+NOT_DELETED = sa.text('NOT is_deleted')
+DELETED = sa.text('is_deleted')
+
+
+def upgrade() -> None:
+    op.execute("UPDATE users SET is_deleted = false WHERE is_deleted IS NULL")
+    op.alter_column('users', 'is_deleted', nullable=False, server_default=sa.false())
+    op.alter_column('bookings', 'is_deleted', server_default=sa.false())
+
+    # Телефон и почта уникальны среди неудаленных пользователей: номер удаленного можно занять заново
+    op.drop_constraint('users_phone_key', 'users', type_='unique')
+    op.drop_constraint('users_email_key', 'users', type_='unique')
+    op.create_index('ux_users_phone', 'users', ['phone'], unique=True, postgresql_where=NOT_DELETED)
+    op.create_index('ux_users_email', 'users', ['email'], unique=True, postgresql_where=NOT_DELETED)
+
+    # Индексы списков только по неудаленным строкам
+    for name, table, columns in (
+        ('ix_bookings_created_at_guid', 'bookings', ['created_at', 'guid']),
+        ('ix_bookings_user_guid_created_at_guid', 'bookings', ['user_guid', 'created_at', 'guid']),
+        ('ix_users_created_at_guid', 'users', ['created_at', 'guid']),
+        ('ix_users_role_created_at_guid', 'users', ['role', 'created_at', 'guid']),
+    ):
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns, postgresql_where=NOT_DELETED)
+
+    # Поиск записей для очистки
+    op.create_index('ix_bookings_deleted_updated_at', 'bookings', ['updated_at'], postgresql_where=DELETED)
+    op.create_index('ix_users_deleted_updated_at', 'users', ['updated_at'], postgresql_where=DELETED)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_deleted_updated_at', table_name='users')
+    op.drop_index('ix_bookings_deleted_updated_at', table_name='bookings')
+
+    for name, table, columns in (
+        ('ix_users_role_created_at_guid', 'users', ['role', 'created_at', 'guid']),
+        ('ix_users_created_at_guid', 'users', ['created_at', 'guid']),
+        ('ix_bookings_user_guid_created_at_guid', 'bookings', ['user_guid', 'created_at', 'guid']),
+        ('ix_bookings_created_at_guid', 'bookings', ['created_at', 'guid']),
+    ):
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns)
+
+    # Удаленные записи физически удаляются, иначе номера могут повторяться
+    op.execute("DELETE FROM bookings WHERE is_deleted")
+    op.execute("DELETE FROM users WHERE is_deleted")
+    op.drop_index('ux_users_email', table_name='users')
+    op.drop_index('ux_users_phone', table_name='users')
+    op.create_unique_constraint('users_email_key', 'users', ['email'])
+    op.create_unique_constraint('users_phone_key', 'users', ['phone'])
+
+    op.alter_column('bookings', 'is_deleted', server_default=None)
+    op.alter_column('users', 'is_deleted', nullable=True, server_default=None)
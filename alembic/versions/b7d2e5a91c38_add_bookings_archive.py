@@ -0,0 +1,57 @@
+"""add bookings archive
+
+Revision ID: b7d2e5a91c38
+Revises: 9c4e7b1d2f60
+Create Date: 2026-10-18 03:27:44.160935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e5a91c38'
+down_revision = '9c4e7b1d2f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bookings_archive',
+        sa.Column('guid', sa.UUID(), nullable=False),
+        sa.Column('user_guid', sa.UUID(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('number_persons', sa.Integer(), nullable=True),
+        sa.Column('datetime', sa.DateTime(), nullable=False),
+        sa.Column('user_created', sa.UUID(), nullable=False),
+        sa.Column('user_updated', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('guid'),
+    )
+
+    # Списки броней с архивом (keyset-пагинация по (created_at, guid))
+    op.create_index('ix_bookings_archive_created_at_guid', 'bookings_archive', ['created_at', 'guid'])
+    op.create_index('ix_bookings_archive_user_guid_created_at_guid', 'bookings_archive',
+                    ['user_guid', 'created_at', 'guid'])
+
+
+def downgrade() -> None:
+    # Архивные брони возвращаются в bookings
+    op.execute(
+        """
+        INSERT INTO bookings (guid, user_guid, status, number_persons, datetime, user_created, user_updated,
+                              is_deleted, created_at, updated_at)
+        SELECT guid, user_guid, status, number_persons, datetime, user_created, user_updated,
+               false, created_at, updated_at
+        FROM bookings_archive
+        WHERE user_guid IN (SELECT guid FROM users)
+          AND user_created IN (SELECT guid FROM users)
+          AND user_updated IN (SELECT guid FROM users)
+        """
+    )
+    op.drop_index('ix_bookings_archive_user_guid_created_at_guid', table_name='bookings_archive')
+    op.drop_index('ix_bookings_archive_created_at_guid', table_name='bookings_archive')
+    op.drop_table('bookings_archive')
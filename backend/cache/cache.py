@@ -1,59 +1,120 @@
-# from abc import ABC, abstractmethod 
-# import aioredis
-
-# class Cache(ABC):
-#     @abstractmethod
-#     async def __init__(self, host: str, port: int, password: str, db: int) -> None:
-#         pass
-
-#     @abstractmethod
-#     async def get(self, key):
-#         pass
-
-#     @abstractmethod
-#     async def set(self, key, value):
-#         pass
-
-#     @abstractmethod
-#     async def delete(self, key):
-#         pass
-
-#     @abstractmethod
-#     async def close(self):
-#         pass
-
-#     @abstractmethod
-#     async def __aenter__(self):
-#         pass
-
-#     @abstractmethod
-#     async def __aexit__(self):
-#         pass
-
-# class RedisCache:
-#     def __init__(
-#             self, 
-#             host: str, 
-#             port: int, 
-#             password: str, 
-#             db: int,
-#     ):
-#         self.storage = aioredis.Redis(host=host, port=port, password=password, db=db)
-
-#     async def get(self, key):
-#         return await self.storage.get(key)
-
-#     async def set(self, key, value):
-#         return await self.storage.set(key, value)
-    
-#     async def delete(self, key):
-#         return await self.storage.delete(key)
-    
-#     async def close(self):
-#         return await self.storage.close()
-    
-#     async def __aenter__(self):
-#         return await self.storage.initialize()
-
-#     async def __aexit__(self):
-#         await self.storage.close()
\ No newline at end of file
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence
+
+from backend.cache.lru import LRUCache
+
+
+class Cache(ABC):
+    """Хранилище кэша: строковые ключи и значения"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def set_many(self, mapping: Dict[str, str], ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def add_many(self, mapping: Dict[str, str], ttl: Optional[float] = None) -> None:
+        """Сохранение только отсутствующих ключей"""
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+class MemoryCache(Cache):
+    """Кэш в памяти процесса, для тестов и запуска в одном процессе"""
+
+    def __init__(self, max_size: int):
+        self.storage = LRUCache(max_size=max_size)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.storage.get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        return [self.storage.get(key) for key in keys]
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self.storage.set(key, value, expires_at=time.time() + ttl if ttl is not None else None)
+
+    async def set_many(self, mapping: Dict[str, str], ttl: Optional[float] = None) -> None:
+        for key, value in mapping.items():
+            await self.set(key, value, ttl=ttl)
+
+    async def add_many(self, mapping: Dict[str, str], ttl: Optional[float] = None) -> None:
+        for key, value in mapping.items():
+            if self.storage.get(key) is None:
+                await self.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        self.storage.pop(key)
+
+    async def close(self) -> None:
+        self.storage.clear()
+
+
+class RedisCache(Cache):
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            password: Optional[str],
+            db: int,
+    ):
+        from redis.asyncio import Redis
+
+        self.storage = Redis(host=host, port=port, password=password, db=db, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.storage.get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        return await self.storage.mget(keys) if keys else []
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self.storage.set(key, value, px=int(ttl * 1000) if ttl is not None else None)
+
+    async def set_many(self, mapping: Dict[str, str], ttl: Optional[float] = None) -> None:
+        await self._set_many(mapping, ttl=ttl, nx=False)
+
+    async def add_many(self, mapping: Dict[str, str], ttl: Optional[float] = None) -> None:
+        await self._set_many(mapping, ttl=ttl, nx=True)
+
+    async def _set_many(self, mapping: Dict[str, str], ttl: Optional[float], nx: bool) -> None:
+        # MSET не задает TTL, поэтому SET каждого ключа в одном конвейере
+        if not mapping:
+            return
+
+        px = int(ttl * 1000) if ttl is not None else None
+        async with self.storage.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, px=px, nx=nx)
+            await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        await self.storage.delete(key)
+
+    async def close(self) -> None:
+        await self.storage.aclose()
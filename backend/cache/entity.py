@@ -0,0 +1,172 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, TypeVar
+
+from pydantic import TypeAdapter, ValidationError
+
+from backend.cache.cache import Cache, MemoryCache, RedisCache
+from backend.config import config
+from backend.logging import log
+from backend.metrics import entity_cache_lookup_seconds
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class EntityCache:
+    """Кэш сущностей с чтением через кэш.
+
+    Запись хранит версии ключей, от которых зависит. Изменение сущности меняет версию ее ключа,
+    и все записи, прочитанные до изменения, перестают совпадать по версиям и считаются промахом.
+    Отсутствующая версия создается перед загрузкой, а при чтении ее отсутствие (вытеснение, истечение)
+    тоже считается промахом. Версии живут дольше записей, поэтому хранилище не растет без ограничений.
+    Одновременные промахи по одному ключу в процессе ждут одну загрузку (single-flight),
+    TTL записей разбрасывается на `ttl_jitter`, чтобы они не истекали одновременно.
+    """
+
+    def __init__(self, backend: Cache, ttl: float, ttl_jitter: float = 0.0):
+        self._backend = backend
+        self._ttl = ttl
+        self._ttl_jitter = ttl_jitter
+        self._version_ttl = 2 * ttl * (1 + ttl_jitter)
+        self._flights: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get_or_load(
+            self,
+            key: str,
+            load: Callable[[], Awaitable[Optional[T]]],
+            adapter: TypeAdapter,
+            deps: Sequence[str] = (),
+            value_deps: Optional[Callable[[T], Iterable[str]]] = None,
+    ) -> Optional[T]:
+        """Значение из кэша или из `load`.
+        `deps` - ключи версий, известные до загрузки, `value_deps` - ключи версий загруженного значения"""
+
+        started = time.perf_counter()
+        value = await self._get(key, adapter)
+        if value is not _MISSING:
+            self.hits += 1
+            entity_cache_lookup_seconds.observe(time.perf_counter() - started, "hit")
+            return value
+
+        self.misses += 1
+        entity_cache_lookup_seconds.observe(time.perf_counter() - started, "miss")
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            value = await asyncio.shield(flight)
+            if value is not _MISSING:
+                return value
+            return await load()
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            value = await self._load(key, load, adapter, deps, value_deps)
+            flight.set_result(value)
+            return value
+        finally:
+            if not flight.done():
+                flight.set_result(_MISSING)
+            self._flights.pop(key, None)
+
+    async def invalidate(self, *keys: str) -> None:
+        """Смена версий ключей: зависящие от них записи становятся недействительными"""
+
+        if not keys:
+            return
+
+        try:
+            await self._backend.set_many({key: uuid.uuid4().hex for key in keys}, ttl=self._version_ttl)
+        except Exception as e:
+            self.errors += 1
+            log.warning(f"Кэш недоступен, версии не обновлены: {e}")
+
+    async def close(self) -> None:
+        await self._backend.close()
+
+    async def _get(self, key: str, adapter: TypeAdapter) -> Any:
+        try:
+            raw = await self._backend.get(key)
+            if raw is None:
+                return _MISSING
+
+            entry = json.loads(raw)
+            versions = entry["deps"]
+            current = await self._backend.get_many(list(versions))
+            if None in current or list(versions.values()) != current:
+                return _MISSING
+        except Exception as e:
+            self.errors += 1
+            log.warning(f"Кэш недоступен, чтение из БД: {e}")
+            return _MISSING
+
+        try:
+            return adapter.validate_python(entry["value"])
+        except ValidationError as e:
+            # Запись старой схемы: удаляется и перечитывается из БД
+            log.warning(f"Запись кэша {key} не соответствует схеме: {e}")
+            await self._delete(key)
+            return _MISSING
+
+    async def _load(self, key, load, adapter, deps, value_deps) -> Any:
+        # Версии читаются до загрузки: если сущность изменится во время загрузки, запись сразу устареет
+        versions = await self._versions(deps)
+        value = await load()
+        if value is None or versions is None:
+            return value
+
+        if value_deps is not None:
+            extra = await self._versions([dep for dep in value_deps(value) if dep not in versions])
+            if extra is None:
+                return value
+            versions.update(extra)
+
+        ttl = self._ttl * (1 + random.uniform(-self._ttl_jitter, self._ttl_jitter))
+        entry = json.dumps({"deps": versions, "value": adapter.dump_python(value, mode="json")})
+        try:
+            await self._backend.set(key, entry, ttl=ttl)
+        except Exception as e:
+            self.errors += 1
+            log.warning(f"Кэш недоступен, значение не сохранено: {e}")
+
+        return value
+
+    async def _versions(self, keys: Iterable[str]) -> Optional[Dict[str, Optional[str]]]:
+        keys = list(dict.fromkeys(keys))
+        try:
+            versions = await self._backend.get_many(keys)
+            missing = {key: uuid.uuid4().hex for key, version in zip(keys, versions) if version is None}
+            if missing:
+                # Только отсутствующие: одновременная инвалидация не перезаписывается
+                await self._backend.add_many(missing, ttl=self._version_ttl)
+                versions = await self._backend.get_many(keys)
+            return dict(zip(keys, versions))
+        except Exception as e:
+            self.errors += 1
+            log.warning(f"Кэш недоступен: {e}")
+            return None
+
+    async def _delete(self, key: str) -> None:
+        try:
+            await self._backend.delete(key)
+        except Exception as e:
+            self.errors += 1
+            log.warning(f"Кэш недоступен, запись не удалена: {e}")
+
+
+def _create_backend() -> Cache:
+    if config.CACHE_BACKEND == "redis":
+        return RedisCache(config.REDIS_HOST, config.REDIS_PORT, config.REDIS_PASSWORD, config.REDIS_DB)
+    return MemoryCache(max_size=config.CACHE_SIZE)
+
+
+entity_cache = EntityCache(_create_backend(), ttl=config.CACHE_TTL, ttl_jitter=config.CACHE_TTL_JITTER)
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """LRU-кэш в памяти процесса с ограничением размера и временем жизни записей"""
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[Any, Optional[float]]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получение значения по ключу"""
+
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """Сохранение значения. `expires_at` - unix time, по умолчанию now + ttl"""
+
+        if self._max_size <= 0:
+            return
+
+        if expires_at is None and self._ttl is not None:
+            expires_at = time.time() + self._ttl
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Удаление значения по ключу"""
+
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистка кэша"""
+
+        self._data.clear()
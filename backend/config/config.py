@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import os
+import tempfile
 from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from dotenv import find_dotenv
 
@@ -31,6 +33,51 @@ class Config(_Settings):
     BACKEND_PORT: int = Field(..., description="Backend port")
     BACKEND_RELOAD: bool = Field(..., description="Backend reload")
 
+    # Production server
+    BACKEND_WORKERS: int = Field(None, description="Worker processes, defaults to CPU count", validate_default=True)
+    BACKEND_LOOP: str = Field("auto", description="Event loop: auto, asyncio or uvloop")
+    BACKEND_HTTP: str = Field("auto", description="HTTP protocol: auto, h11 or httptools")
+    BACKEND_PRELOAD: bool = Field(True, description="Import the app in the master process before forking")
+    BACKEND_GRACEFUL_TIMEOUT: int = Field(30, description="Seconds to finish in-flight requests on shutdown")
+    BACKEND_KEEPALIVE: int = Field(5, description="Keep-alive timeout in seconds")
+
+    # Logging
+    LOG_DIR: str = Field("backend/logging/logs", description="Directory for daily log files")
+    LOG_JSON: bool = Field(False, description="Write logs as JSON lines")
+    LOG_BATCH_SIZE: int = Field(512, description="Max log records written to disk at once")
+    LOG_FLUSH_INTERVAL: float = Field(1.0, description="Seconds the log writer thread waits for new records")
+
+    # Metrics
+    METRICS_ENABLED: bool = Field(False, description="Record request latency and serve metrics at /metrics "
+                                                     "(unauthenticated, expose only to the scraper network)")
+    METRICS_DIR: Optional[str] = Field(None, description="Directory where workers share metrics, "
+                                                         "defaults to a temp directory with several workers",
+                                       validate_default=True)
+    METRICS_FLUSH_INTERVAL: float = Field(5, description="Seconds between worker metric snapshots in METRICS_DIR")
+
+    # Kafka
+    KAFKA_BOOTSTRAP_SERVERS: str = Field("localhost:9092", description="Kafka bootstrap servers")
+    KAFKA_BOOKING_TOPIC: str = Field("booking", description="Topic with booking commands")
+    KAFKA_GROUP_ID: str = Field("booking", description="Consumer group id")
+    KAFKA_BATCH_SIZE: int = Field(100, description="Max messages fetched at once")
+    KAFKA_CONCURRENCY: int = Field(8, description="Partitions processed in parallel")
+    KAFKA_MAX_PENDING: int = Field(1000, description="Unprocessed messages before fetching is paused")
+    KAFKA_MAX_RETRIES: int = Field(5, description="Retries of a message on database errors")
+
+    # Booking
+    BOOKING_SLOT_CAPACITY: int = Field(20, description="Seats per booking time unless the slot sets its own capacity")
+    EXPORT_BATCH_SIZE: int = Field(1000, description="Rows fetched from the export server-side cursor at once")
+
+    # Purge
+    PURGE_INTERVAL: float = Field(300, description="Seconds between maintenance runs with runmaintenance.py --loop")
+    PURGE_BATCH_SIZE: int = Field(500, description="Soft-deleted rows removed per transaction")
+
+    # Archive
+    ARCHIVE_RETENTION_DAYS: int = Field(365, description="Bookings older than this many days are moved to the archive")
+    ARCHIVE_BATCH_SIZE: int = Field(1000, description="Bookings moved to the archive per transaction")
+    ARCHIVE_LOAD_FACTOR: float = Field(1.0, description="Pause after each archive batch as a multiple of its duration")
+    ARCHIVE_MAX_REPLICATION_LAG: float = Field(10, description="Replica lag in seconds at which archiving waits")
+
     # Postgres
     POSTGRES_USER: str = Field(..., description="Postgres user")
     POSTGRES_PASSWORD: str = Field(..., description="Postgres password")
@@ -43,10 +90,74 @@ class Config(_Settings):
     JWT_SECRET: str = Field(..., description="JWT secret")
     JWT_ALGORITHM: str = Field(..., description="JWT algorithm")
     JWT_EXPIRES_AT: int = Field(..., description="JWT expires at")
+    JWT_CACHE_SIZE: int = Field(4096, description="Size of verified JWT cache")
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = Field(12, description="bcrypt cost factor, hashes with another cost are updated on login")
+    PASSWORD_HASH_WORKERS: int = Field(2, description="Threads for password hashing per worker process")
+
+    # Entity cache
+    CACHE_BACKEND: str = Field(None, description="Entity cache backend: memory (single process only) or redis, "
+                                                 "defaults to memory with one worker and redis otherwise",
+                               validate_default=True)
+    CACHE_SIZE: int = Field(10000, description="Entries in the memory cache backend")
+    CACHE_TTL: float = Field(60, description="Entity cache TTL in seconds")
+    CACHE_TTL_JITTER: float = Field(0.1, description="Random TTL spread as a fraction of CACHE_TTL")
+
+    # Redis
+    REDIS_HOST: str = Field("localhost", description="Redis host")
+    REDIS_PORT: int = Field(6379, description="Redis port")
+    REDIS_PASSWORD: Optional[str] = Field(None, description="Redis password")
+    REDIS_DB: int = Field(0, description="Redis database")
+
+    # Connection pool
+    DB_POOL_SIZE: int = Field(5, description="Number of persistent connections in the pool")
+    DB_MAX_OVERFLOW: int = Field(10, description="Connections allowed above the pool size")
+    DB_POOL_TIMEOUT: float = Field(30, description="Seconds to wait for a free connection")
+    DB_POOL_RECYCLE: int = Field(1800, description="Reconnect after this many seconds, -1 to disable")
+    DB_POOL_PRE_PING: bool = Field(False, description="Check connections on checkout")
+    DB_STATEMENT_CACHE_SIZE: int = Field(100, description="Prepared statement cache size per connection")
+    DB_STATEMENT_TIMEOUT: Optional[int] = Field(None, description="Postgres statement_timeout in milliseconds")
+    DB_PGBOUNCER: bool = Field(False, description="PgBouncer mode: no client pool, no prepared statement cache")
+    DB_POOL_BUDGET: Optional[int] = Field(None, description="Total connections for all workers, split evenly")
 
     DB_DSN: Optional[AsyncPostgresDsn] = Field(None, description="Postgres uri for docker containers", validate_default=True)
     EXTERNAL_DB_DSN: Optional[AsyncPostgresDsn] = Field(None, description="Postgres uri for alembic", validate_default=True)
 
+    # Read replicas
+    DB_REPLICA_DSNS: List[AsyncPostgresDsn] = Field([], description="Read replica uris (JSON list)")
+    DB_REPLICA_EJECT_SECONDS: float = Field(30, description="How long a failed replica is skipped")
+
+    # SQL tracing
+    SQL_TRACE: bool = Field(False, description="Count SQL statements per request and add a Server-Timing header "
+                                               "(tests and debugging, exposes DB timings to clients)")
+    SQL_TRACE_STRICT: bool = Field(False, description="Test mode: fail requests that exceed their query budget")
+    SQL_QUERY_BUDGET: int = Field(10, description="Statements per request for routes without their own budget")
+    SQL_N_PLUS_ONE_THRESHOLD: int = Field(3, description="Repeats of one statement in a request reported as N+1")
+
+    @field_validator("BACKEND_WORKERS", mode="before")
+    def default_workers(cls, v: Optional[int]) -> int:
+        return v or os.cpu_count() or 1
+
+    @field_validator("CACHE_BACKEND", mode="before")
+    def default_cache_backend(cls, v: Optional[str], info: FieldValidationInfo) -> str:
+        # Кэш в памяти не видит инвалидаций из других процессов: воркеры отдавали бы устаревшие данные до CACHE_TTL
+        single_process = info.data.get("BACKEND_RELOAD") or info.data.get("BACKEND_WORKERS") == 1
+        if not v:
+            return "memory" if single_process else "redis"
+        if v == "memory" and not single_process:
+            raise ValueError("memory cache backend requires BACKEND_WORKERS=1, use redis with several workers")
+        return v
+
+    @field_validator("METRICS_DIR", mode="before")
+    def default_metrics_dir(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
+        # Каждый опрос /metrics попадает в случайный воркер: без общего каталога счетчики скакали бы между опросами
+        if v or not info.data.get("METRICS_ENABLED"):
+            return v
+        if info.data.get("BACKEND_RELOAD") or info.data.get("BACKEND_WORKERS") == 1:
+            return None
+        return os.path.join(tempfile.gettempdir(), "backend-metrics")
+
     @field_validator("DB_DSN", mode="before")
     def create_db_uri(cls, v: Optional[str], info: FieldValidationInfo) -> Any:
         if isinstance(v, str):
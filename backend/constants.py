@@ -1,2 +1,16 @@
 MAX_LIMIT = 1000
 MAX_OFFSET = 9000000000000000000
+MAX_BATCH_SIZE = 1000
+MAX_OCCUPANCY_BUCKETS = 1000
+
+# SQL-запросов на HTTP-запрос в строгом режиме трассировки, остальным маршрутам - SQL_QUERY_BUDGET.
+# None - без ограничения: число запросов зависит от тела запроса
+QUERY_BUDGETS = {
+    "GET /booking/all": 3,
+    "GET /booking/id/{id}": 3,
+    "GET /booking/occupancy": 3,
+    "GET /booking/export": 3,
+    "POST /booking/new": 8,
+    "POST /booking/batch": None,
+    "POST /auth/signin": 3,
+}
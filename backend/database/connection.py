@@ -1,20 +1,85 @@
-from sqlalchemy import inspect
+from typing import Optional
+
+from sqlalchemy import URL, inspect, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import NullPool
 from sqlalchemy.schema import DropTable
 
 from backend.config import config
+from backend.config.config import AsyncPostgresDsn
+from backend.database.pool import MeteredQueuePool
+from backend.database import tracing
+from backend.database.replicas import ReplicaSet
 
-engine = create_async_engine(
-    config.DB_DSN.unicode_string(),
-    echo=config.DEBUG,
-)
+
+def _statement_cache_size() -> int:
+    return 0 if config.DB_PGBOUNCER else config.DB_STATEMENT_CACHE_SIZE
+
+
+def _pool_size() -> dict:
+    """Размер пула одного процесса. DB_POOL_BUDGET делится поровну между воркерами без overflow"""
+
+    if config.DB_POOL_BUDGET:
+        return {"pool_size": max(1, config.DB_POOL_BUDGET // config.BACKEND_WORKERS), "max_overflow": 0}
+
+    return {"pool_size": config.DB_POOL_SIZE, "max_overflow": config.DB_MAX_OVERFLOW}
+
+
+def _engine_options() -> dict:
+    """Параметры пула и asyncpg из конфигурации"""
+
+    connect_args = {"statement_cache_size": _statement_cache_size()}
+    if config.DB_STATEMENT_TIMEOUT:
+        connect_args["server_settings"] = {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT)}
+
+    options = {"echo": config.DEBUG, "pool_pre_ping": config.DB_POOL_PRE_PING, "connect_args": connect_args}
+    if config.DB_PGBOUNCER:
+        # Соединения держит PgBouncer, prepared statements не переживают смену серверного соединения
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=MeteredQueuePool,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            **_pool_size(),
+        )
+
+    return options
+
+
+def _engine_url(dsn: AsyncPostgresDsn) -> URL:
+    return make_url(dsn.unicode_string()).update_query_dict(
+        {"prepared_statement_cache_size": str(_statement_cache_size())}
+    )
+
+
+engine = create_async_engine(_engine_url(config.DB_DSN), **_engine_options())
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+replicas = ReplicaSet(
+    [create_async_engine(_engine_url(dsn), **_engine_options()) for dsn in config.DB_REPLICA_DSNS],
+    eject_seconds=config.DB_REPLICA_EJECT_SECONDS,
+)
 Base = declarative_base()
 
+if config.SQL_TRACE:
+    for traced_engine in [engine, *replicas.engines]:
+        tracing.install(traced_engine)
+
 async def get_session() -> AsyncSession:
     async with async_session() as session:
         yield session
+
+
+async def get_replica_session() -> Optional[AsyncSession]:
+    """Сессия реплики для чтения или None, если реплик нет или все недоступны"""
+
+    replica_session = replicas.choose()
+    if replica_session is None:
+        yield None
+        return
+
+    async with replica_session() as session:
+        yield session
@@ -1,2 +1,5 @@
 from backend.database.dao.user import UserDAO
+from backend.database.dao.booking_slot import BookingSlotDAO, SeatsUnavailable
+from backend.database.dao.booking_occupancy import BookingOccupancyDAO
+from backend.database.dao.booking_archive import BookingArchiveDAO
 # from backend.database.dao.service import ServiceDAO
\ No newline at end of file
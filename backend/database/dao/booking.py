@@ -1,11 +1,101 @@
-from typing import Optional, List
+import uuid
+from collections import defaultdict
+from datetime import datetime as dt
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 
 from pydantic import UUID4
-from sqlalchemy import func, select, update, delete
+from sqlalchemy import Row, Select, Subquery, Update, and_, insert, or_, select, union_all, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend import models
 from backend.database import tables
+from backend.database.dao.booking_archive import ARCHIVE_COLUMNS
+from backend.database.dao.booking_occupancy import BookingOccupancyDAO
+from backend.database.dao.booking_slot import BookingSlotDAO, SeatsUnavailable, booking_seats, seats_delta
+from backend.database.pagination import paginate
+from backend.utils.time import naive_utc
+
+BOOKING_GET_COLUMNS = (
+    tables.Booking.guid,
+    tables.Booking.user_guid,
+    tables.Booking.number_persons,
+    tables.Booking.datetime,
+    tables.Booking.status,
+    tables.User.first_name,
+    tables.User.middle_name,
+    tables.User.last_name,
+    tables.User.phone,
+    tables.Booking.user_created,
+    tables.Booking.user_updated,
+    tables.Booking.created_at,
+    tables.Booking.updated_at,
+)
+
+
+def _booking_get_query() -> Select:
+    """Запрос только тех колонок, которые нужны BookingGet, с одним join к пользователю брони.
+    Удаленные брони и брони удаленных пользователей не выбираются"""
+
+    return (
+        select(*BOOKING_GET_COLUMNS)
+        .join(tables.User, tables.User.guid == tables.Booking.user_guid)
+        .where(~tables.Booking.is_deleted, ~tables.User.is_deleted)
+    )
+
+
+def _booking_get_with_archive_query(user_id: Optional[UUID4] = None) -> Tuple[Select, Subquery]:
+    """Запрос колонок BookingGet по броням вместе с архивом. Возвращает запрос и подзапрос,
+    по колонкам которого сортируется страница"""
+
+    parts = []
+    for table in (tables.Booking, tables.BookingArchive):
+        part = select(*(getattr(table, column) for column in ARCHIVE_COLUMNS))
+        if table is tables.Booking:
+            part = part.where(~tables.Booking.is_deleted)
+        if user_id is not None:
+            part = part.where(table.user_guid == user_id)
+        parts.append(part)
+    bookings = union_all(*parts).subquery("bookings")
+
+    query = (
+        select(*(bookings.c[column.key] if column.class_ is tables.Booking else column
+                 for column in BOOKING_GET_COLUMNS))
+        .join(tables.User, tables.User.guid == bookings.c.user_guid)
+        .where(~tables.User.is_deleted)
+    )
+    return query, bookings
+
+
+def _booking_update_query(guid: UUID4) -> Update:
+    """UPDATE брони, который возвращает колонки BookingGet (пользователь брони через UPDATE ... FROM users)
+    и значения до изменения, по которым пересчитываются занятые места"""
+
+    old = (
+        select(tables.Booking.guid, tables.Booking.status, tables.Booking.number_persons, tables.Booking.datetime)
+        .where(tables.Booking.guid == guid, ~tables.Booking.is_deleted)
+        .with_for_update()
+        .cte("old")
+    )
+    return (
+        update(tables.Booking)
+        .where(tables.Booking.guid == old.c.guid, tables.User.guid == tables.Booking.user_guid, ~tables.User.is_deleted)
+        .returning(
+            *BOOKING_GET_COLUMNS,
+            old.c.status.label("old_status"),
+            old.c.number_persons.label("old_number_persons"),
+            old.c.datetime.label("old_datetime"),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _to_booking_get(row: Row) -> models.BookingGet:
+    """Сборка BookingGet из строки без повторной валидации данных из БД"""
+
+    return models.BookingGet.model_construct(**{
+        **{key: row._mapping[key] for key in models.BookingGet.model_fields},
+        "status": models.BookingStatusType(row.status),
+    })
 
 
 class BookingDAO:
@@ -13,185 +103,253 @@ class BookingDAO:
 
     def __init__(self, session: AsyncSession):
         self._session = session
+        self._slots = BookingSlotDAO(session)
+        self._occupancy = BookingOccupancyDAO(session)
 
     async def create(self, requester_id: UUID4, user_id: UUID4, booking: models.BookingCreate) -> models.BookingGet:
-        """Создание брони"""
-
-        db_booking = tables.Booking(status=booking.status,
-                                    number_persons=booking.number_persons,
-                                    datetime=booking.datetime,
-                                    user_guid=user_id, 
-                                    user_created=requester_id, 
-                                    user_updated=requester_id)
-
-        self._session.add(db_booking)
-        await self._session.flush()
-        await self._session.refresh(db_booking)
-
-        return models.BookingGet(
-                guid = db_booking.guid,
-                user_guid=db_booking.user_guid,
-                number_persons=db_booking.number_persons,
-                datetime=db_booking.datetime,
-                status=db_booking.status,
-                first_name=db_booking.user_rel.first_name,
-                middle_name=db_booking.user_rel.middle_name,
-                last_name=db_booking.user_rel.last_name,
-                phone=db_booking.user_rel.phone,
-                user_created=db_booking.user_created,
-                user_updated=db_booking.user_updated,
-                created_at=db_booking.created_at,
-                updated_at=db_booking.updated_at
-            )
+        """Создание брони одним INSERT ... RETURNING. SeatsUnavailable, если на это время нет мест"""
+
+        db_booking = (await self.create_many(requester_id=requester_id, bookings=[(user_id, booking)]))[0]
+        if db_booking is None:
+            raise SeatsUnavailable(booking.datetime)
+
+        return db_booking
+
+    async def create_many(self, requester_id: UUID4, bookings: List[Tuple[Optional[UUID4], models.BookingCreate]],
+                          reserved: Optional[List[bool]] = None) -> List[Optional[models.BookingGet]]:
+        """Создание броней одним INSERT, брони возвращаются в порядке `bookings`. None - на время брони нет мест.
+        `reserved` - результат reserve, если места уже заняты: брони с False не создаются, их клиент может быть None"""
+
+        rows = [
+            {
+                "guid": uuid.uuid4(),
+                "user_guid": user_id,
+                "status": booking.status,
+                "number_persons": booking.number_persons,
+                "datetime": naive_utc(booking.datetime),
+                "user_created": requester_id,
+                "user_updated": requester_id,
+                "is_deleted": False,
+            }
+            for user_id, booking in bookings
+        ]
+        if reserved is None:
+            reserved = await self.reserve([booking for _, booking in bookings])
+        accepted = [row for row, ok in zip(rows, reserved) if ok]
+        if not accepted:
+            return [None] * len(rows)
+
+        inserted = insert(tables.Booking).values(accepted).returning(*tables.Booking.__table__.columns).cte("inserted")
+        query = (
+            select(*(inserted.c[column.key] if column.class_ is tables.Booking else column
+                     for column in BOOKING_GET_COLUMNS))
+            .join(tables.User, tables.User.guid == inserted.c.user_guid)
+        )
+        created = {row.guid: _to_booking_get(row) for row in (await self._session.execute(query)).all()}
+        await self._occupancy.change(added=[(row["status"], row["datetime"], row["number_persons"]) for row in accepted])
+
+        return [created.get(row["guid"]) for row in rows]
+
+    async def reserve(self, bookings: List[models.BookingCreate]) -> List[bool]:
+        """Занятие мест под брони. Сначала одним UPDATE на каждое время, если не вышло - по одной брони.
+        False - на время брони нет мест"""
+
+        # Время с поясом переводится в UTC, как в колонках броней: иначе ключи нельзя было бы отсортировать
+        seats_by_booking = [booking_seats(booking.status, naive_utc(booking.datetime), booking.number_persons)
+                            for booking in bookings]
+        demand: Dict[dt, int] = defaultdict(int)
+        for seats_by_time in seats_by_booking:
+            for datetime, seats in seats_by_time.items():
+                demand[datetime] += seats
+
+        reserved = [True] * len(bookings)
+        for datetime in sorted(demand):
+            if not demand[datetime] or await self._slots.reserve(datetime, demand[datetime]):
+                continue
+            for index, seats_by_time in enumerate(seats_by_booking):
+                seats = seats_by_time.get(datetime)
+                if seats:
+                    reserved[index] = await self._slots.reserve(datetime, seats)
+
+        return reserved
 
     async def get_by_id(self, guid: UUID4) -> Optional[models.BookingGet]:
         """Получение брони по id"""
 
-        query = select(tables.Booking).where(tables.Booking.guid == guid)
-        db_booking = (await self._session.execute(query)).scalar()
-
-        return models.BookingGet(
-                guid = db_booking.guid,
-                user_guid=db_booking.user_guid,
-                number_persons=db_booking.number_persons,
-                datetime=db_booking.datetime,
-                status=db_booking.status,
-                first_name=db_booking.user_rel.first_name,
-                middle_name=db_booking.user_rel.middle_name,
-                last_name=db_booking.user_rel.last_name,
-                phone=db_booking.user_rel.phone,
-                user_created=db_booking.user_created,
-                user_updated=db_booking.user_updated,
-                created_at=db_booking.created_at,
-                updated_at=db_booking.updated_at
-            ) if db_booking else None
-    
-    async def get_all(self, limit: int, offset: int) -> List[models.BookingGet]:
-        """Получение всех броней"""
-
-        query = select(tables.Booking).limit(limit).offset(offset)
-        db_bookings = (await self._session.execute(query)).scalars().unique().all()
-
-        bookings = []
-        for db_booking in db_bookings:
-            bookings.append(models.BookingGet(
-                guid = db_booking.guid,
-                user_guid=db_booking.user_guid,
-                number_persons=db_booking.number_persons,
-                datetime=db_booking.datetime,
-                status=db_booking.status,
-                first_name=db_booking.user_rel.first_name,
-                middle_name=db_booking.user_rel.middle_name,
-                last_name=db_booking.user_rel.last_name,
-                phone=db_booking.user_rel.phone,
-                user_created=db_booking.user_created,
-                user_updated=db_booking.user_updated,
-                created_at=db_booking.created_at,
-                updated_at=db_booking.updated_at
-            ))
-
-        return bookings
-
-    async def get_all_by_user_id(self, user_id: UUID4, limit: int, offset: int) -> List[models.BookingGet]:
-        """Получение всех броней по id пользователя"""
-
-        query = select(tables.Booking).where(tables.Booking.user_guid == user_id).limit(limit).offset(offset)
-        db_bookings = (await self._session.execute(query)).scalars().unique().all()
-
-        bookings = []
-        for db_booking in db_bookings:
-            bookings.append(models.BookingGet(
-                guid = db_booking.guid,
-                user_guid=db_booking.user_guid,
-                number_persons=db_booking.number_persons,
-                datetime=db_booking.datetime,
-                status=db_booking.status,
-                first_name=db_booking.user_rel.first_name,
-                middle_name=db_booking.user_rel.middle_name,
-                last_name=db_booking.user_rel.last_name,
-                phone=db_booking.user_rel.phone,
-                user_created=db_booking.user_created,
-                user_updated=db_booking.user_updated,
-                created_at=db_booking.created_at,
-                updated_at=db_booking.updated_at
-            ))
+        query = _booking_get_query().where(tables.Booking.guid == guid)
+        row = (await self._session.execute(query)).first()
 
-        return bookings
+        return _to_booking_get(row) if row else None
     
-    async def get_cur_number_persons(self, service_id: UUID4) -> int:
-        """Получение текущего количества мест"""
-
-        query = select(func.sum(tables.Booking.number_persons)).where(tables.Booking.service_guid == service_id)
-        sum_of_number_persons  = (await self._session.execute(query)).scalar()
-
-        return sum_of_number_persons or 0
-
-    async def change_status(self, guid: UUID4, status: models.BookingStatusType) -> models.BookingGet:
-        """Изменение статуса брони"""
-
-        query = select(tables.Booking).where(tables.Booking.guid == guid)
-        db_booking = (await self._session.execute(query)).scalar()
-        
-        if not db_booking:
-            return None
-        
-        query = update(tables.Booking).where(tables.Booking.guid == guid).values(status=status)
-        await self._session.execute(query)
-
-        await self._session.flush()
-        await self._session.refresh(db_booking)
-
-        return models.BookingGet(
-                guid = db_booking.guid,
-                user_guid=db_booking.user_guid,
-                number_persons=db_booking.number_persons,
-                datetime=db_booking.datetime,
-                status=db_booking.status,
-                first_name=db_booking.user_rel.first_name,
-                middle_name=db_booking.user_rel.middle_name,
-                last_name=db_booking.user_rel.last_name,
-                phone=db_booking.user_rel.phone,
-                user_created=db_booking.user_created,
-                user_updated=db_booking.user_updated,
-                created_at=db_booking.created_at,
-                updated_at=db_booking.updated_at
-            )
-
-    async def change(self, guid: UUID4, booking: models.BookingUpdate) -> models.BookingGet:
-        """Изменение брони"""
-
-        query = select(tables.Booking).where(tables.Booking.guid == guid)
-        db_booking = (await self._session.execute(query)).scalar()
-
-        if not db_booking:
+    async def get_all(self, limit: int, offset: int, after: Optional[models.Cursor] = None,
+                      include_archived: bool = False) -> List[models.BookingGet]:
+        """Получение всех броней, с `include_archived` - вместе с архивом"""
+
+        if include_archived:
+            query, bookings = _booking_get_with_archive_query()
+            query = paginate(query, bookings.c.created_at, bookings.c.guid, limit=limit, offset=offset, after=after)
+        else:
+            query = paginate(_booking_get_query(), tables.Booking.created_at, tables.Booking.guid,
+                             limit=limit, offset=offset, after=after)
+        rows = (await self._session.execute(query)).all()
+
+        return [_to_booking_get(row) for row in rows]
+
+    async def get_all_by_user_id(self, user_id: UUID4, limit: int, offset: int, after: Optional[models.Cursor] = None,
+                                 include_archived: bool = False) -> List[models.BookingGet]:
+        """Получение всех броней по id пользователя, с `include_archived` - вместе с архивом"""
+
+        if include_archived:
+            query, bookings = _booking_get_with_archive_query(user_id=user_id)
+            query = paginate(query, bookings.c.created_at, bookings.c.guid, limit=limit, offset=offset, after=after)
+        else:
+            query = paginate(_booking_get_query().where(tables.Booking.user_guid == user_id),
+                             tables.Booking.created_at, tables.Booking.guid, limit=limit, offset=offset, after=after)
+        rows = (await self._session.execute(query)).all()
+
+        return [_to_booking_get(row) for row in rows]
+    
+    async def stream_all(self, batch_size: int) -> AsyncIterator[List[models.BookingGet]]:
+        """Чтение всех броней серверным курсором пачками по batch_size, без загрузки всей выборки в память"""
+
+        query = (
+            _booking_get_query()
+            .order_by(tables.Booking.created_at, tables.Booking.guid)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self._session.stream(query)
+        try:
+            async for rows in result.partitions():
+                yield [_to_booking_get(row) for row in rows]
+        finally:
+            await result.close()
+
+    async def get_reserved_seats(self, datetime: dt) -> int:
+        """Получение количества занятых мест на время"""
+
+        return await self._slots.get_reserved(datetime)
+
+    async def get_occupancy(self, start: dt, end: dt,
+                            bucket: models.OccupancyBucket) -> List[models.BookingOccupancyBucket]:
+        """Получение количества броней и человек по интервалам времени"""
+
+        return await self._occupancy.get(start=start, end=end, bucket=bucket)
+
+    async def rebuild_occupancy(self) -> int:
+        """Пересборка агрегата броней по часам"""
+
+        return await self._occupancy.rebuild()
+
+    async def change_status(self, guid: UUID4, status: models.BookingStatusType) -> Optional[models.BookingGet]:
+        """Изменение статуса брони. SeatsUnavailable, если бронь нельзя вернуть из отмены"""
+
+        return await self._update(_booking_update_query(guid).values(status=status))
+
+    async def change(self, guid: UUID4, booking: models.BookingUpdate) -> Optional[models.BookingGet]:
+        """Изменение брони. SeatsUnavailable, если на новое время или количество человек нет мест"""
+
+        return await self._update(_booking_update_query(guid).values(**booking.model_dump()))
+
+    async def delete(self, guid: UUID4) -> bool:
+        """Удаление брони: пометка с освобождением мест, запись удаляется очисткой. False, если брони не было"""
+
+        query = (
+            update(tables.Booking)
+            .where(tables.Booking.guid == guid, ~tables.Booking.is_deleted)
+            .values(is_deleted=True)
+            .returning(tables.Booking.status, tables.Booking.datetime, tables.Booking.number_persons)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await self._session.execute(query)).first()
+        if not row:
+            return False
+
+        await self._release([row])
+        return True
+
+    async def delete_by_user(self, user_id: UUID4) -> List[UUID4]:
+        """Пометка удаленными всех броней клиента с освобождением мест. Возвращает id броней"""
+
+        query = (
+            update(tables.Booking)
+            .where(tables.Booking.user_guid == user_id, ~tables.Booking.is_deleted)
+            .values(is_deleted=True)
+            .returning(tables.Booking.guid, tables.Booking.status, tables.Booking.datetime,
+                       tables.Booking.number_persons)
+            .execution_options(synchronize_session=False)
+        )
+        rows = (await self._session.execute(query)).all()
+        await self._release(rows)
+
+        return [row.guid for row in rows]
+
+    async def delete_where(self, *criteria) -> List[UUID4]:
+        """Физическое удаление броней по условию. Места освобождаются и агрегат пересчитывается только
+        для неудаленных броней, помеченные уже учтены. Возвращает id удаленных броней"""
+
+        query = (
+            delete(tables.Booking)
+            .where(*criteria)
+            .returning(tables.Booking.guid, tables.Booking.is_deleted, tables.Booking.status,
+                       tables.Booking.datetime, tables.Booking.number_persons)
+            .execution_options(synchronize_session=False)
+        )
+        rows = (await self._session.execute(query)).all()
+        await self._release([row for row in rows if not row.is_deleted])
+
+        return [row.guid for row in rows]
+
+    async def delete_by_users(self, user_ids: List[UUID4], limit: int) -> List[UUID4]:
+        """Физическое удаление не больше `limit` броней пользователей и помеченных броней, которые они создали
+        или изменили. Действующие брони других клиентов не удаляются. Возвращает id броней"""
+
+        bookings = (
+            select(tables.Booking.guid)
+            .where(or_(
+                tables.Booking.user_guid.in_(user_ids),
+                and_(tables.Booking.is_deleted, or_(tables.Booking.user_created.in_(user_ids),
+                                                    tables.Booking.user_updated.in_(user_ids))),
+            ))
+            .limit(limit)
+        )
+        return await self.delete_where(tables.Booking.guid.in_(bookings))
+
+    async def purge(self, limit: int) -> int:
+        """Физическое удаление не больше `limit` помеченных броней, старые первыми.
+        Строки, занятые другой очисткой, пропускаются"""
+
+        tombstones = (
+            select(tables.Booking.guid)
+            .where(tables.Booking.is_deleted)
+            .order_by(tables.Booking.updated_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query = delete(tables.Booking).where(tables.Booking.guid.in_(tombstones))
+        return (await self._session.execute(query)).rowcount
+
+    async def _release(self, rows: List[Row]) -> None:
+        """Освобождение мест и вычитание из агрегата удаленных броней"""
+
+        if not rows:
+            return
+
+        released: Dict[dt, int] = defaultdict(int)
+        for row in rows:
+            for datetime, seats in booking_seats(row.status, row.datetime, row.number_persons).items():
+                released[datetime] -= seats
+        await self._slots.change(released)
+        await self._occupancy.change(removed=[(row.status, row.datetime, row.number_persons) for row in rows])
+
+    async def _update(self, query: Update) -> Optional[models.BookingGet]:
+        row = (await self._session.execute(query)).first()
+        if not row:
             return None
 
-        query = update(tables.Booking).where(tables.Booking.guid == guid).values(**booking.model_dump())
-        await self._session.execute(query)
-
-        await self._session.flush()
-        await self._session.refresh(db_booking)
-
-        return models.BookingGet(
-                guid = db_booking.guid,
-                user_guid=db_booking.user_guid,
-                number_persons=db_booking.number_persons,
-                datetime=db_booking.datetime,
-                status=db_booking.status,
-                first_name=db_booking.user_rel.first_name,
-                middle_name=db_booking.user_rel.middle_name,
-                last_name=db_booking.user_rel.last_name,
-                phone=db_booking.user_rel.phone,
-                user_created=db_booking.user_created,
-                user_updated=db_booking.user_updated,
-                created_at=db_booking.created_at,
-                updated_at=db_booking.updated_at
-            )
-
-    async def delete(self, guid: UUID4) -> None:
-        """Удаление брони"""
-
-        query = delete(tables.Booking).where(tables.Booking.guid == guid)
-        await self._session.execute(query)
-
-        await self._session.flush()
+        await self._slots.change(seats_delta(
+            booking_seats(row.old_status, row.old_datetime, row.old_number_persons),
+            booking_seats(row.status, row.datetime, row.number_persons),
+        ))
+        await self._occupancy.change(removed=[(row.old_status, row.old_datetime, row.old_number_persons)],
+                                     added=[(row.status, row.datetime, row.number_persons)])
+        return _to_booking_get(row)
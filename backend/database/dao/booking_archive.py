@@ -0,0 +1,54 @@
+from datetime import datetime as dt
+from typing import List
+
+from pydantic import UUID4
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import tables
+
+# Колонки, общие для bookings и bookings_archive
+ARCHIVE_COLUMNS = (
+    "guid",
+    "user_guid",
+    "status",
+    "number_persons",
+    "datetime",
+    "user_created",
+    "user_updated",
+    "created_at",
+    "updated_at",
+)
+
+
+class BookingArchiveDAO:
+    """DAO для архива броней"""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def archive(self, before: dt, limit: int) -> List[UUID4]:
+        """Перенос не больше `limit` броней со временем раньше `before` в архив одним DELETE ... RETURNING в INSERT.
+        Помеченные удаленными брони не переносятся, их удаляет очистка. Возвращает id перенесенных броней"""
+
+        batch = (
+            select(tables.Booking.guid)
+            .where(tables.Booking.datetime < before, ~tables.Booking.is_deleted)
+            .order_by(tables.Booking.datetime)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        moved = (
+            delete(tables.Booking)
+            .where(tables.Booking.guid.in_(batch))
+            .returning(*(getattr(tables.Booking, column) for column in ARCHIVE_COLUMNS))
+            .cte("moved")
+        )
+        query = (
+            insert(tables.BookingArchive)
+            .from_select(ARCHIVE_COLUMNS, select(*(moved.c[column] for column in ARCHIVE_COLUMNS)))
+            .add_cte(moved)
+            .returning(tables.BookingArchive.guid)
+        )
+
+        return list((await self._session.execute(query)).scalars())
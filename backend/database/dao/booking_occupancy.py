@@ -0,0 +1,119 @@
+from collections import defaultdict
+from datetime import datetime as dt
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, literal_column, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import models
+from backend.database import tables
+
+# (статус, время, количество человек) брони - то, от чего зависит агрегат
+OccupancyRow = Tuple[str, dt, Optional[int]]
+
+
+def _hour(datetime: dt) -> dt:
+    return datetime.replace(minute=0, second=0, microsecond=0)
+
+
+def _trunc(bucket: str, column):
+    # Размер интервала подставляется литералом, иначе одинаковые выражения в SELECT и GROUP BY
+    # получают разные параметры и Postgres не считает их одной колонкой
+    return func.date_trunc(literal_column(f"'{models.OccupancyBucket(bucket).value}'"), column)
+
+
+class BookingOccupancyDAO:
+    """DAO для агрегата броней по часам"""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def change(self, removed: Iterable[OccupancyRow] = (), added: Iterable[OccupancyRow] = ()) -> None:
+        """Пересчет агрегата по удаленным и добавленным броням одним INSERT ... ON CONFLICT"""
+
+        delta: Dict[Tuple[dt, str], List[int]] = defaultdict(lambda: [0, 0])
+        for sign, rows in ((-1, removed), (1, added)):
+            for status, datetime, number_persons in rows:
+                counts = delta[_hour(datetime), models.BookingStatusType(status).value]
+                counts[0] += sign * (number_persons or 0)
+                counts[1] += sign
+
+        # Строки идут по порядку ключа, чтобы параллельные транзакции не блокировали друг друга по кругу
+        values = [
+            {"hour": hour, "status": status, "persons": persons, "bookings": bookings}
+            for (hour, status), (persons, bookings) in sorted(delta.items())
+            if persons or bookings
+        ]
+        if not values:
+            return
+
+        query = insert(tables.BookingOccupancy).values(values)
+        query = query.on_conflict_do_update(
+            index_elements=[tables.BookingOccupancy.hour, tables.BookingOccupancy.status],
+            set_={
+                "persons": tables.BookingOccupancy.persons + query.excluded.persons,
+                "bookings": tables.BookingOccupancy.bookings + query.excluded.bookings,
+                "updated_at": func.now(),
+            },
+        )
+        await self._session.execute(query)
+
+    async def get(self, start: dt, end: dt, bucket: models.OccupancyBucket) -> List[models.BookingOccupancyBucket]:
+        """Получение количества броней и человек по интервалам за [start, end). Границы округляются до часа"""
+
+        bucket_start = _trunc(bucket, tables.BookingOccupancy.hour)
+        query = (
+            select(
+                bucket_start.label("start"),
+                tables.BookingOccupancy.status,
+                func.sum(tables.BookingOccupancy.persons).label("persons"),
+                func.sum(tables.BookingOccupancy.bookings).label("bookings"),
+            )
+            .where(
+                tables.BookingOccupancy.hour >= _hour(start),
+                tables.BookingOccupancy.hour < end,
+                tables.BookingOccupancy.bookings > 0,
+            )
+            .group_by(bucket_start, tables.BookingOccupancy.status)
+            .order_by(bucket_start)
+        )
+        rows = (await self._session.execute(query)).all()
+
+        buckets: Dict[dt, models.BookingOccupancyBucket] = {}
+        for row in rows:
+            item = buckets.get(row.start)
+            if item is None:
+                item = buckets[row.start] = models.BookingOccupancyBucket.model_construct(
+                    start=row.start,
+                    persons={status: 0 for status in models.BookingStatusType},
+                    bookings={status: 0 for status in models.BookingStatusType},
+                )
+            status = models.BookingStatusType(row.status)
+            item.persons[status] += row.persons
+            item.bookings[status] += row.bookings
+
+        return list(buckets.values())
+
+    async def rebuild(self) -> int:
+        """Пересборка агрегата по всем броням. Записи броней ждут ее окончания, чтение не блокируется.
+        Возвращает количество строк агрегата"""
+
+        await self._session.execute(text("LOCK TABLE booking_occupancy IN EXCLUSIVE MODE"))
+        await self._session.execute(delete(tables.BookingOccupancy))
+
+        # Архивные брони остаются в агрегате: занятость за прошлые периоды не меняется от архивации
+        bookings = union_all(
+            select(tables.Booking.datetime, tables.Booking.status, tables.Booking.number_persons)
+            .where(~tables.Booking.is_deleted),
+            select(tables.BookingArchive.datetime, tables.BookingArchive.status, tables.BookingArchive.number_persons),
+        ).subquery("bookings")
+        hour = _trunc(models.OccupancyBucket.HOUR, bookings.c.datetime)
+        query = insert(tables.BookingOccupancy).from_select(
+            ["hour", "status", "persons", "bookings"],
+            select(hour, bookings.c.status, func.coalesce(func.sum(bookings.c.number_persons), 0), func.count())
+            .group_by(hour, bookings.c.status),
+        )
+        result = await self._session.execute(query)
+
+        return result.rowcount
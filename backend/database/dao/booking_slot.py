@@ -0,0 +1,100 @@
+from datetime import datetime as dt
+from typing import Dict, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import models
+from backend.config import config
+from backend.database import tables
+
+
+class SeatsUnavailable(Exception):
+    """Не хватает свободных мест на время брони"""
+
+    def __init__(self, datetime: dt):
+        super().__init__(f"Нет свободных мест на {datetime}")
+        self.datetime = datetime
+
+
+def booking_seats(status: str, datetime: dt, number_persons: Optional[int]) -> Dict[dt, int]:
+    """Места, которые занимает бронь. Отмененная бронь мест не занимает"""
+
+    if status == models.BookingStatusType.CANCELLED:
+        return {}
+    return {datetime: number_persons or 0}
+
+
+def seats_delta(old: Dict[dt, int], new: Dict[dt, int]) -> Dict[dt, int]:
+    """Изменение занятых мест по времени при переходе брони из `old` в `new`"""
+
+    delta = dict(new)
+    for datetime, seats in old.items():
+        delta[datetime] = delta.get(datetime, 0) - seats
+    return {datetime: seats for datetime, seats in delta.items() if seats}
+
+
+class BookingSlotDAO:
+    """DAO для счетчиков занятых мест"""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def get_reserved(self, datetime: dt) -> int:
+        """Получение количества занятых мест на время"""
+
+        query = select(tables.BookingSlot.reserved).where(tables.BookingSlot.datetime == datetime)
+        return (await self._session.execute(query)).scalar() or 0
+
+    async def change(self, delta: Dict[dt, int]) -> None:
+        """Изменение занятых мест. Времена обрабатываются по порядку, чтобы транзакции не ждали друг друга по кругу"""
+
+        for datetime, seats in sorted(delta.items()):
+            if seats > 0 and not await self.reserve(datetime, seats):
+                raise SeatsUnavailable(datetime)
+            if seats < 0:
+                await self.release(datetime, -seats)
+
+    async def reserve(self, datetime: dt, seats: int) -> bool:
+        """Занятие мест, если они есть. Обычно один UPDATE, для нового времени - INSERT"""
+
+        if await self._increment(datetime, seats):
+            return True
+
+        if seats > config.BOOKING_SLOT_CAPACITY:
+            return False
+
+        query = (
+            insert(tables.BookingSlot)
+            .values(datetime=datetime, reserved=seats)
+            .on_conflict_do_nothing(index_elements=[tables.BookingSlot.datetime])
+            .returning(tables.BookingSlot.reserved)
+        )
+        if (await self._session.execute(query)).first():
+            return True
+
+        # Время появилось между UPDATE и INSERT
+        return await self._increment(datetime, seats)
+
+    async def release(self, datetime: dt, seats: int) -> None:
+        """Освобождение мест"""
+
+        query = (
+            update(tables.BookingSlot)
+            .where(tables.BookingSlot.datetime == datetime)
+            .values(reserved=func.greatest(tables.BookingSlot.reserved - seats, 0))
+            .execution_options(synchronize_session=False)
+        )
+        await self._session.execute(query)
+
+    async def _increment(self, datetime: dt, seats: int) -> bool:
+        capacity = func.coalesce(tables.BookingSlot.capacity, config.BOOKING_SLOT_CAPACITY)
+        query = (
+            update(tables.BookingSlot)
+            .where(tables.BookingSlot.datetime == datetime, tables.BookingSlot.reserved + seats <= capacity)
+            .values(reserved=tables.BookingSlot.reserved + seats)
+            .returning(tables.BookingSlot.reserved)
+            .execution_options(synchronize_session=False)
+        )
+        return (await self._session.execute(query)).first() is not None
@@ -1,11 +1,18 @@
-from typing import Optional, List
+import uuid
+from typing import Dict, Optional, List
 
 from pydantic import UUID4
-from sqlalchemy import BigInteger, or_, select, update, delete
+from sqlalchemy import BigInteger, desc, exists, func, or_, select, text, update, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend import models
 from backend.database import tables
+from backend.database.loading import LoadStrategy, user_load_options
+from backend.database.pagination import paginate
+
+# Условие частичных уникальных индексов users.phone и users.email для ON CONFLICT
+NOT_DELETED = text("NOT is_deleted")
 
 
 class UserDAO:
@@ -25,73 +32,195 @@ class UserDAO:
 
         return models.UserGet.model_validate(db_user)
 
-    async def get_by_email(self, email: str) -> Optional[models.UserGet]:
+    async def upsert_by_phone(self, user: models.UserSignUp) -> UUID4:
+        """Получение id пользователя по номеру телефона с созданием отсутствующего одним запросом.
+        У существующего пользователя заполняются только пустые имя, отчество и фамилия"""
+
+        query = insert(tables.User).values(**user.model_dump(), guid=uuid.uuid4(), is_deleted=False)
+        query = query.on_conflict_do_update(
+            index_elements=[tables.User.phone],
+            index_where=NOT_DELETED,
+            set_={
+                column: func.coalesce(getattr(tables.User, column), getattr(query.excluded, column))
+                for column in ("first_name", "middle_name", "last_name")
+            },
+        ).returning(tables.User.guid)
+
+        return (await self._session.execute(query)).scalar_one()
+
+    async def get_or_create_by_phones(self, users: List[models.UserSignUp]) -> Dict[str, UUID4]:
+        """Получение id пользователей по номерам телефонов, отсутствующие пользователи создаются.
+        Как в upsert_by_phone, у существующих пользователей заполняются только пустые имя, отчество и фамилия"""
+
+        users_by_phone: Dict[str, models.UserSignUp] = {}
+        for user in users:
+            users_by_phone.setdefault(user.phone, user)
+
+        # Строки в порядке телефонов: одновременные пакеты блокируют существующих пользователей в одном порядке
+        query = insert(tables.User).values([
+            {**users_by_phone[phone].model_dump(), "guid": uuid.uuid4(), "is_deleted": False}
+            for phone in sorted(users_by_phone)
+        ])
+        query = query.on_conflict_do_update(
+            index_elements=[tables.User.phone],
+            index_where=NOT_DELETED,
+            set_={
+                column: func.coalesce(getattr(tables.User, column), getattr(query.excluded, column))
+                for column in ("first_name", "middle_name", "last_name")
+            },
+        ).returning(tables.User.phone, tables.User.guid)
+
+        return dict((await self._session.execute(query)).all())
+
+    async def get_by_email(self, email: str, load: LoadStrategy = LoadStrategy.NOLOAD) -> Optional[models.UserGet]:
         """Получение пользователя по email"""
 
-        query = select(tables.User).where(tables.User.email == email)
+        query = (
+            select(tables.User)
+            .where(tables.User.email == email, ~tables.User.is_deleted)
+            .options(*user_load_options(load))
+        )
         db_user = (await self._session.execute(query)).scalar()
 
         return models.UserGet.model_validate(db_user) if db_user else None
 
-    async def get_by_phone(self, phone: str) -> Optional[models.UserGet]:
+    async def get_by_phone(self, phone: str, load: LoadStrategy = LoadStrategy.NOLOAD) -> Optional[models.UserGet]:
         """Получение пользователя по номеру телефона"""
 
-        query = select(tables.User).where(tables.User.phone == phone)
+        query = (
+            select(tables.User)
+            .where(tables.User.phone == phone, ~tables.User.is_deleted)
+            .options(*user_load_options(load))
+        )
         db_user = (await self._session.execute(query)).scalar()
 
         return models.UserGet.model_validate(db_user) if db_user else None
 
-    async def get_by_id(self, guid: UUID4) -> Optional[models.UserGet]:
+    async def get_by_id(self, guid: UUID4, load: LoadStrategy = LoadStrategy.NOLOAD) -> Optional[models.UserGet]:
         """Получение пользователя по id"""
 
-        query = select(tables.User).where(tables.User.guid == guid)
+        query = (
+            select(tables.User)
+            .where(tables.User.guid == guid, ~tables.User.is_deleted)
+            .options(*user_load_options(load))
+        )
         db_user = (await self._session.execute(query)).scalar()
 
         return models.UserGet.model_validate(db_user) if db_user else None
 
-    async def get_all(self, limit: int, offset:int) -> Optional[models.UserGet]:
+    async def get_auth_by_phone_or_email(self, phone: Optional[str], email: Optional[str]) -> Optional[models.UserAuth]:
+        """Получение данных для входа по номеру телефона или email, совпадение по телефону в приоритете"""
+
+        conditions = [column == value for column, value in ((tables.User.phone, phone), (tables.User.email, email))
+                      if value]
+        if not conditions:
+            return None
+
+        query = (
+            select(tables.User.guid, tables.User.password, tables.User.role)
+            .where(or_(*conditions), ~tables.User.is_deleted)
+            .limit(1)
+        )
+        if phone:
+            query = query.order_by(desc(tables.User.phone == phone))
+        row = (await self._session.execute(query)).first()
+
+        return models.UserAuth.model_validate(row) if row else None
+
+    async def get_principal_by_id(self, guid: UUID4) -> Optional[models.Principal]:
+        """Получение роли пользователя по id"""
+
+        query = select(tables.User.guid, tables.User.role, tables.User.is_deleted).where(tables.User.guid == guid)
+        row = (await self._session.execute(query)).first()
+
+        return models.Principal(user_id=row.guid, role=row.role, is_deleted=bool(row.is_deleted)) if row else None
+
+    async def get_all(self, limit: int, offset:int, after: Optional[models.Cursor] = None,
+                      load: LoadStrategy = LoadStrategy.NOLOAD) -> List[models.UserGet]:
         """Получение списка пользователей"""
 
-        query = select(tables.User).limit(limit).offset(offset)
+        query = paginate(select(tables.User).where(~tables.User.is_deleted).options(*user_load_options(load)),
+                         tables.User.created_at, tables.User.guid, limit=limit, offset=offset, after=after)
         db_users = (await self._session.execute(query)).scalars().unique().all()
 
         return [models.UserGet.model_validate(db_user) for db_user in db_users]
 
-    async def get_all_with_role(self, limit: int, offset:int, role: models.UserRole) -> List[models.UserGet]:
+    async def get_all_with_role(self, limit: int, offset:int, role: models.UserRole,
+                                after: Optional[models.Cursor] = None,
+                                load: LoadStrategy = LoadStrategy.NOLOAD) -> List[models.UserGet]:
         """Получение всех пользователей с определенной ролью"""
 
-        query = select(tables.User).where(tables.User.role == role).limit(limit).offset(offset)
+        query = paginate(select(tables.User).where(tables.User.role == role, ~tables.User.is_deleted)
+                         .options(*user_load_options(load)),
+                         tables.User.created_at, tables.User.guid, limit=limit, offset=offset, after=after)
         db_users = (await self._session.execute(query)).scalars().unique().all()
 
         return [models.UserGet.model_validate(db_user) for db_user in db_users]
 
-    async def change(self, guid: UUID4, user: models.UserUpdate) -> models.UserGet:
+    async def change(self, guid: UUID4, user: models.UserUpdate) -> Optional[models.UserGet]:
         """Изменение пользователя"""
 
-        db_user = (await self._session.execute(select(tables.User).where(tables.User.guid == guid))).scalar()
+        query = (
+            update(tables.User)
+            .where(tables.User.guid == guid, ~tables.User.is_deleted)
+            .values(**user.model_dump())
+            .returning(*tables.User.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await self._session.execute(query)).first()
 
-        query = update(tables.User).where(tables.User.guid == guid).values(**user.model_dump())
-        await self._session.execute(query)
+        return models.UserGet.model_validate(row) if row else None
 
-        await self._session.flush()
-        await self._session.refresh(db_user)
+    async def change_password(self, guid: UUID4, password: str) -> bool:
+        """Изменение хэша пароля пользователя"""
 
-        return models.UserGet.model_validate(db_user)
+        query = (
+            update(tables.User)
+            .where(tables.User.guid == guid, ~tables.User.is_deleted)
+            .values(password=password)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(query)
+
+        return result.rowcount > 0
 
     async def delete(self, guid: UUID4) -> None:
-        """Удаление пользователя"""
-
-        booking_delete_query = (
-            delete(tables.Booking)
-            .where(or_(
-                tables.Booking.user_guid == guid,
-                tables.Booking.user_created == guid,
-                tables.Booking.user_updated == guid
-            ))
+        """Удаление пользователя: только пометка, записи удаляются очисткой (backend.maintenance).
+        Брони клиента помечает BookingDAO.delete_by_user"""
+
+        query = (
+            update(tables.User)
+            .where(tables.User.guid == guid, ~tables.User.is_deleted)
+            .values(is_deleted=True)
+            .execution_options(synchronize_session=False)
         )
-        await self._session.execute(booking_delete_query)
+        await self._session.execute(query)
 
-        user_delete_query = delete(tables.User).where(tables.User.guid == guid)
-        await self._session.execute(user_delete_query)
+    async def get_deleted_ids(self, limit: int) -> List[UUID4]:
+        """Получение id удаленных пользователей для очистки. Строки блокируются, занятые другой очисткой пропускаются.
+        Создатели и авторы изменений действующих броней других клиентов не очищаются, пока эти брони есть"""
 
-        await self._session.flush()
+        referenced = exists().where(
+            or_(tables.Booking.user_created == tables.User.guid, tables.Booking.user_updated == tables.User.guid),
+            tables.Booking.user_guid != tables.User.guid,
+            ~tables.Booking.is_deleted,
+        )
+        query = (
+            select(tables.User.guid)
+            .where(tables.User.is_deleted, ~referenced)
+            .order_by(tables.User.updated_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list((await self._session.execute(query)).scalars())
+
+    async def purge(self, guids: List[UUID4]) -> int:
+        """Физическое удаление удаленных пользователей, на которых не осталось броней"""
+
+        referenced = exists().where(or_(
+            tables.Booking.user_guid == tables.User.guid,
+            tables.Booking.user_created == tables.User.guid,
+            tables.Booking.user_updated == tables.User.guid,
+        ))
+        query = delete(tables.User).where(tables.User.guid.in_(guids), tables.User.is_deleted, ~referenced)
+        return (await self._session.execute(query)).rowcount
@@ -1,29 +1,121 @@
-from typing import List
+from datetime import datetime as dt
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar
 
 from fastapi import Depends
-from pydantic import UUID4
+from pydantic import UUID4, TypeAdapter
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend import models
-from backend.database.connection import get_session
+from backend.cache.entity import entity_cache
+from backend.database.connection import get_replica_session, get_session, replicas
+from backend.database.replicas import get_replication_lag, is_disconnect
 from backend.database.dao import *
 from backend.database.dao.booking import BookingDAO
 from backend.database.facade.interface import DBFacadeInterface
+from backend.logging import log
+from backend.metrics import db_facade_seconds, timed_methods
 
+T = TypeVar("T")
 
+_PRINCIPAL = TypeAdapter(models.Principal)
+_USER = TypeAdapter(models.UserGet)
+_USERS = TypeAdapter(List[models.UserGet])
+_BOOKING = TypeAdapter(models.BookingGet)
+_BOOKINGS = TypeAdapter(List[models.BookingGet])
+_OCCUPANCY = TypeAdapter(List[models.BookingOccupancyBucket])
+
+
+def _cursor_key(after: Optional[models.Cursor]) -> str:
+    return f"{after.created_at.isoformat()}:{after.guid}" if after else "-"
+
+
+async def _without_password(read: Awaitable[T]) -> T:
+    """Пользователь или список пользователей без хэша пароля: хэш не должен попадать в кэш"""
+
+    result = await read
+    if isinstance(result, list):
+        return [user.model_copy(update={"password": None}) for user in result]
+    return result.model_copy(update={"password": None}) if result is not None else None
+
+
+def _user_deps(users: Iterable[models.UserGet]) -> Iterable[str]:
+    return [f"user:{user.guid}" for user in users]
+
+
+def _booking_deps(bookings: Iterable[models.BookingGet]) -> Iterable[str]:
+    # В брони входят имя и телефон клиента, поэтому она зависит и от версий пользователей
+    return [
+        key
+        for booking in bookings
+        for key in (f"booking:{booking.guid}", f"user:{booking.user_guid}",
+                    f"user:{booking.user_created}", f"user:{booking.user_updated}")
+    ]
+
+
+@timed_methods(db_facade_seconds)
 class DBFacade(DBFacadeInterface):
     """Фасад для работы с базой данных"""
 
-    def __init__(self, session: AsyncSession = Depends(get_session)):
+    def __init__(self, session: AsyncSession = Depends(get_session),
+                 replica_session: Optional[AsyncSession] = Depends(get_replica_session)):
         self._session = session
         self._user_dao = UserDAO(session=session)
         # self._service_dao = ServiceDAO(session=session)
         self._booking_dao = BookingDAO(session=session)
+        self._booking_archive_dao = BookingArchiveDAO(session=session)
+
+        # Вне FastAPI (скрипты, бенчмарки) фасад создается только с основной сессией
+        self._replica_session = replica_session if isinstance(replica_session, AsyncSession) else None
+        if self._replica_session is not None:
+            self._replica_user_dao = UserDAO(session=replica_session)
+            self._replica_booking_dao = BookingDAO(session=replica_session)
+        # После записи чтения в рамках запроса идут в основную БД мимо кэша, чтобы видеть свои изменения
+        self._pinned = False
+        # Ключи версий кэша, которые меняются после коммита
+        self._stale: Set[str] = set()
+
+    async def _read(self, read: Callable[[UserDAO, BookingDAO], Awaitable[T]]) -> T:
+        """Чтение с реплики, если она есть и в запросе еще не было записи.
+        При ошибке соединения реплика временно исключается и чтение повторяется в основной БД,
+        ошибки запроса (таймаут, блокировка) реплику не исключают и передаются дальше"""
+
+        if self._replica_session is not None and not self._pinned:
+            try:
+                return await read(self._replica_user_dao, self._replica_booking_dao)
+            except (DBAPIError, OSError) as e:
+                if not is_disconnect(e):
+                    raise
+                log.warning(f"Реплика недоступна, чтение из основной БД: {e}")
+                replicas.eject(self._replica_session.bind)
+                self._replica_session = None
+
+        return await read(self._user_dao, self._booking_dao)
+
+    async def _cached(self, key: str, read: Callable[[UserDAO, BookingDAO], Awaitable[T]], adapter: TypeAdapter,
+                      deps: Sequence[str], value_deps: Callable[[T], Iterable[str]]) -> T:
+        """Чтение через кэш сущностей. Промах загружается только из основной БД: строка с отстающей реплики
+        попала бы в кэш под уже новой версией и оставалась бы в нем весь CACHE_TTL"""
+
+        if self._pinned:
+            return await self._read(read)
+
+        return await entity_cache.get_or_load(key, lambda: read(self._user_dao, self._booking_dao), adapter,
+                                              deps=deps, value_deps=value_deps)
+
+    def _write(self, *stale: str) -> None:
+        """Отметка записи: дальнейшие чтения из основной БД, версии `stale` сменятся после коммита"""
+
+        self._pinned = True
+        self._stale.update(stale)
 
     async def commit(self) -> None:
         """Применение изменений"""
 
+        self._pinned = True
         await self._session.commit()
+        await entity_cache.invalidate(*self._stale)
+        self._stale.clear()
 
     async def is_db_alive(self) -> bool:
         """Проверка работы БД"""
@@ -37,42 +129,102 @@ class DBFacade(DBFacadeInterface):
     async def signup(self, user: models.UserSignUp) -> models.UserGet:
         """Создание пользователя"""
 
+        self._write("users")
         return await self._user_dao.create(user=user)
 
-    async def get_all_users(self, limit: int, offset: int) -> List[models.UserGet]:
+    async def get_all_users(self, limit: int, offset: int,
+                            after: Optional[models.Cursor] = None) -> List[models.UserGet]:
         """Получение списка пользователей"""
 
-        return await self._user_dao.get_all(limit=limit, offset=offset)
+        return await self._cached(
+            f"users:all:{limit}:{offset}:{_cursor_key(after)}",
+            lambda users, bookings: _without_password(users.get_all(limit=limit, offset=offset, after=after)),
+            _USERS, deps=["users"], value_deps=_user_deps,
+        )
 
     async def get_user_by_id(self, guid: UUID4) -> models.UserGet:
-        """Получения пользователя по id"""
+        """Получения пользователя по id, без хэша пароля"""
 
-        return await self._user_dao.get_by_id(guid=guid)
+        return await self._cached(
+            f"user:{guid}:get",
+            lambda users, bookings: _without_password(users.get_by_id(guid=guid)),
+            _USER, deps=[f"user:{guid}"], value_deps=lambda user: (),
+        )
+
+    async def get_principal(self, guid: UUID4) -> Optional[models.Principal]:
+        """Получение роли пользователя по id через кэш сущностей.
+        Изменение и удаление пользователя меняют версию user:{guid} после коммита во всех воркерах"""
+
+        return await self._cached(
+            f"user:{guid}:principal",
+            lambda users, bookings: users.get_principal_by_id(guid=guid),
+            _PRINCIPAL, deps=[f"user:{guid}"], value_deps=lambda principal: (),
+        )
 
     async def get_user_by_email(self, email: str) -> models.UserGet:
         """Получения пользователя по email"""
 
-        return await self._user_dao.get_by_email(email=email)
+        return await self._read(lambda users, bookings: users.get_by_email(email=email))
 
     async def get_user_by_phone(self, phone: str) -> models.UserGet:
         """Получения пользователя по номеру телефона"""
 
-        return await self._user_dao.get_by_phone(phone=phone)
+        return await self._read(lambda users, bookings: users.get_by_phone(phone=phone))
+
+    async def upsert_user_by_phone(self, user: models.UserSignUp) -> UUID4:
+        """Получение id пользователя по номеру телефона с созданием отсутствующего"""
+
+        self._write("users")
+        guid = await self._user_dao.upsert_by_phone(user=user)
+        self._write(f"user:{guid}")
+        return guid
+
+    async def get_or_create_users_by_phones(self, users: List[models.UserSignUp]) -> Dict[str, UUID4]:
+        """Получение id пользователей по номерам телефонов с созданием отсутствующих"""
+
+        self._write("users")
+        guids = await self._user_dao.get_or_create_by_phones(users=users)
+        self._write(*(f"user:{guid}" for guid in guids.values()))
+        return guids
 
-    async def get_all_users_with_role(self, limit: int, offset: int, role: models.UserRole) -> List[models.UserGet]:
+    async def get_user_auth(self, phone: Optional[str], email: Optional[str]) -> Optional[models.UserAuth]:
+        """Получение данных для входа по номеру телефона или email"""
+
+        # Только основная БД: вход сразу после регистрации или смены пароля не должен зависеть от отставания реплики
+        return await self._user_dao.get_auth_by_phone_or_email(phone=phone, email=email)
+
+    async def get_all_users_with_role(self, limit: int, offset: int, role: models.UserRole,
+                                      after: Optional[models.Cursor] = None) -> List[models.UserGet]:
         """Получение всех пользователей с определенной ролью"""
 
-        return await self._user_dao.get_all_with_role(limit=limit, offset=offset, role=role)
+        return await self._cached(
+            f"users:{role.value}:{limit}:{offset}:{_cursor_key(after)}",
+            lambda users, bookings: _without_password(
+                users.get_all_with_role(limit=limit, offset=offset, role=role, after=after)),
+            _USERS, deps=["users"], value_deps=_user_deps,
+        )
 
-    async def change_user(self, guid: UUID4, user: models.UserUpdate) -> models.UserGet:
+    async def change_user(self, guid: UUID4, user: models.UserUpdate) -> Optional[models.UserGet]:
         """Изменения пользователя"""
 
+        # Смена роли переносит пользователя между списками, поэтому меняется и версия списков
+        self._write(f"user:{guid}", "users")
         return await self._user_dao.change(guid=guid, user=user)
 
+    async def change_user_password(self, guid: UUID4, password: str) -> bool:
+        """Изменение хэша пароля пользователя"""
+
+        self._write(f"user:{guid}")
+        return await self._user_dao.change_password(guid=guid, password=password)
+
     async def delete_user(self, guid: UUID4):
         """Удаления пользователя"""
 
-        return await self._user_dao.delete(guid=guid)
+        self._write(f"user:{guid}", "users", "bookings", f"bookings:user:{guid}", "occupancy")
+        await self._user_dao.delete(guid=guid)
+        # Брони клиента пропадают из чтений вместе с ним, поэтому их места освобождаются в той же транзакции
+        bookings = await self._booking_dao.delete_by_user(user_id=guid)
+        self._write(*(f"booking:{booking}" for booking in bookings))
 
     # async def create_service(self, service: models.ServiceCreate) -> models.ServiceGet:
     #     """Создания услуги"""
@@ -109,39 +261,132 @@ class DBFacade(DBFacadeInterface):
     async def create_booking(self, requester_id: UUID4, user_id: UUID4, booking: models.BookingCreate) -> models.BookingGet:
         """Создание брони"""
 
+        self._write("bookings", f"bookings:user:{user_id}", "occupancy")
         return await self._booking_dao.create(requester_id=requester_id, user_id=user_id, booking=booking)
 
+    async def reserve_seats(self, bookings: List[models.BookingCreate]) -> List[bool]:
+        """Занятие мест под брони до их создания"""
+
+        self._write()
+        return await self._booking_dao.reserve(bookings=bookings)
+
+    async def create_bookings(self, requester_id: UUID4, bookings: List[Tuple[Optional[UUID4], models.BookingCreate]],
+                              reserved: Optional[List[bool]] = None) -> List[Optional[models.BookingGet]]:
+        """Создание нескольких броней"""
+
+        self._write("bookings", "occupancy", *{f"bookings:user:{user_id}" for user_id, _ in bookings if user_id})
+        return await self._booking_dao.create_many(requester_id=requester_id, bookings=bookings, reserved=reserved)
+
     async def get_booking_by_id(self, guid: UUID4) -> models.BookingGet:
         """Получение брони по id"""
 
-        return await self._booking_dao.get_by_id(guid=guid)
+        return await self._cached(
+            f"booking:{guid}:get",
+            lambda users, bookings: bookings.get_by_id(guid=guid),
+            _BOOKING, deps=[f"booking:{guid}"], value_deps=lambda booking: _booking_deps([booking]),
+        )
 
-    async def get_all_bookings(self, limit: int, offset: int) -> List[models.BookingGet]:
+    async def get_all_bookings(self, limit: int, offset: int, after: Optional[models.Cursor] = None,
+                               include_archived: bool = False) -> List[models.BookingGet]:
         """Получение списка бронирований"""
 
-        return await self._booking_dao.get_all(limit=limit, offset=offset)
+        return await self._cached(
+            f"bookings:all:{limit}:{offset}:{_cursor_key(after)}:{int(include_archived)}",
+            lambda users, bookings: bookings.get_all(limit=limit, offset=offset, after=after,
+                                                     include_archived=include_archived),
+            _BOOKINGS, deps=["bookings"], value_deps=_booking_deps,
+        )
 
-    async def get_all_bookings_by_user_id(self, user_id: UUID4, limit: int, offset: int) -> List[models.BookingGet]:
+    async def get_all_bookings_by_user_id(self, user_id: UUID4, limit: int, offset: int,
+                                          after: Optional[models.Cursor] = None,
+                                          include_archived: bool = False) -> List[models.BookingGet]:
         """Получение всех бронирований по id пользователя"""
 
-        return await self._booking_dao.get_all_by_user_id(user_id=user_id, limit=limit, offset=offset)
+        return await self._cached(
+            f"bookings:user:{user_id}:{limit}:{offset}:{_cursor_key(after)}:{int(include_archived)}",
+            lambda users, bookings: bookings.get_all_by_user_id(user_id=user_id, limit=limit, offset=offset,
+                                                                after=after, include_archived=include_archived),
+            _BOOKINGS, deps=[f"bookings:user:{user_id}"], value_deps=_booking_deps,
+        )
     
-    async def get_cur_number_persons(self, service_id: UUID4) -> int:
-        """Получение текущего количества людей, которые пойдут на экскурсию"""
+    def stream_bookings(self, batch_size: int) -> AsyncIterator[List[models.BookingGet]]:
+        """Потоковое чтение всех броней пачками. С реплики, если она есть, без переключения при обрыве"""
+
+        if self._replica_session is not None and not self._pinned:
+            return self._replica_booking_dao.stream_all(batch_size=batch_size)
+        return self._booking_dao.stream_all(batch_size=batch_size)
+
+    async def get_reserved_seats(self, datetime: dt) -> int:
+        """Получение количества занятых мест на время брони"""
+
+        return await self._booking_dao.get_reserved_seats(datetime=datetime)
 
-        return await self._booking_dao.get_cur_number_persons(service_id=service_id)
+    async def get_booking_occupancy(self, start: dt, end: dt,
+                                    bucket: models.OccupancyBucket) -> List[models.BookingOccupancyBucket]:
+        """Получение количества броней и человек по интервалам времени"""
 
-    async def change_booking_status(self, guid: UUID4, status: models.BookingStatusType) -> models.BookingGet:
+        return await self._cached(
+            f"occupancy:{bucket.value}:{start.isoformat()}:{end.isoformat()}",
+            lambda users, bookings: bookings.get_occupancy(start=start, end=end, bucket=bucket),
+            _OCCUPANCY, deps=["occupancy"], value_deps=lambda buckets: (),
+        )
+
+    async def rebuild_booking_occupancy(self) -> int:
+        """Пересборка агрегата броней по часам"""
+
+        self._write("occupancy")
+        return await self._booking_dao.rebuild_occupancy()
+
+    async def change_booking_status(self, guid: UUID4, status: models.BookingStatusType) -> Optional[models.BookingGet]:
         """Изменение статуса брони"""
 
+        self._write(f"booking:{guid}", "occupancy")
         return await self._booking_dao.change_status(guid=guid, status=status)
 
-    async def change_booking(self, guid: UUID4, booking: models.BookingUpdate) -> models.BookingGet:
+    async def change_booking(self, guid: UUID4, booking: models.BookingUpdate) -> Optional[models.BookingGet]:
         """Изменение брони"""
 
+        self._write(f"booking:{guid}", "occupancy")
         return await self._booking_dao.change(guid=guid, booking=booking)
 
-    async def delete_booking(self, guid: UUID4):
+    async def delete_booking(self, guid: UUID4) -> bool:
         """Удаление брони"""
 
+        self._write(f"booking:{guid}", "occupancy")
         return await self._booking_dao.delete(guid=guid)
+
+    async def purge_deleted_bookings(self, limit: int) -> int:
+        """Физическое удаление помеченных броней"""
+
+        # Помеченные брони уже не видны в чтениях, версии кэша не меняются
+        return await self._booking_dao.purge(limit=limit)
+
+    async def get_deleted_user_ids(self, limit: int) -> List[UUID4]:
+        """Получение id удаленных пользователей для очистки"""
+
+        return await self._user_dao.get_deleted_ids(limit=limit)
+
+    async def delete_user_bookings(self, user_ids: List[UUID4], limit: int) -> int:
+        """Физическое удаление броней пользователей и помеченных броней, которые они создали или изменили"""
+
+        guids = await self._booking_dao.delete_by_users(user_ids=user_ids, limit=limit)
+        self._write("occupancy", *(f"booking:{guid}" for guid in guids))
+        return len(guids)
+
+    async def purge_users(self, user_ids: List[UUID4]) -> int:
+        """Физическое удаление удаленных пользователей без броней"""
+
+        return await self._user_dao.purge(guids=user_ids)
+
+    async def archive_bookings(self, before: dt, limit: int) -> int:
+        """Перенос старых броней в архив"""
+
+        guids = await self._booking_archive_dao.archive(before=before, limit=limit)
+        # Перенесенные брони пропадают из списков без архива и из получения по id
+        self._write(*(f"booking:{guid}" for guid in guids))
+        return len(guids)
+
+    async def get_replication_lag(self) -> Optional[float]:
+        """Отставание реплик в секундах"""
+
+        return await get_replication_lag(self._session)
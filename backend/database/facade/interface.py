@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List
+from datetime import datetime as dt
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from pydantic import UUID4
 
@@ -26,11 +27,17 @@ class DBFacadeInterface(ABC):
 
     @abstractmethod
     async def get_user_by_id(self, guid: UUID4) -> models.UserGet:
-        """Получения пользователя по id"""
+        """Получения пользователя по id, без хэша пароля"""
         ...
 
     @abstractmethod
-    async def get_all_users(self, limit: int, offset: int) -> List[models.UserGet]:
+    async def get_principal(self, guid: UUID4) -> Optional[models.Principal]:
+        """Получение роли пользователя по id"""
+        ...
+
+    @abstractmethod
+    async def get_all_users(self, limit: int, offset: int,
+                            after: Optional[models.Cursor] = None) -> List[models.UserGet]:
         """Получение списка пользователей"""
         ...
 
@@ -45,15 +52,36 @@ class DBFacadeInterface(ABC):
         ...
 
     @abstractmethod
-    async def get_all_users_with_role(self, limit: int, offset: int, role: models.UserRole) -> List[models.UserGet]:
+    async def upsert_user_by_phone(self, user: models.UserSignUp) -> UUID4:
+        """Получение id пользователя по номеру телефона с созданием отсутствующего"""
+        ...
+
+    @abstractmethod
+    async def get_or_create_users_by_phones(self, users: List[models.UserSignUp]) -> Dict[str, UUID4]:
+        """Получение id пользователей по номерам телефонов с созданием отсутствующих"""
+        ...
+
+    @abstractmethod
+    async def get_user_auth(self, phone: Optional[str], email: Optional[str]) -> Optional[models.UserAuth]:
+        """Получение данных для входа по номеру телефона или email"""
+        ...
+
+    @abstractmethod
+    async def get_all_users_with_role(self, limit: int, offset: int, role: models.UserRole,
+                                      after: Optional[models.Cursor] = None) -> List[models.UserGet]:
         """Получение списка пользователей"""
         ...
 
     @abstractmethod
-    async def change_user(self, guid: UUID4, user: models.UserUpdate) -> models.UserGet:
+    async def change_user(self, guid: UUID4, user: models.UserUpdate) -> Optional[models.UserGet]:
         """Изменения пользователя"""
         ...
 
+    @abstractmethod
+    async def change_user_password(self, guid: UUID4, password: str) -> bool:
+        """Изменение хэша пароля пользователя"""
+        ...
+
     @abstractmethod
     async def delete_user(self, guid: UUID4):
         """Удаления пользователя"""
@@ -94,37 +122,97 @@ class DBFacadeInterface(ABC):
         """Создание бронирования"""
         ...
 
+    @abstractmethod
+    async def reserve_seats(self, bookings: List[models.BookingCreate]) -> List[bool]:
+        """Занятие мест под брони до их создания"""
+        ...
+
+    @abstractmethod
+    async def create_bookings(self, requester_id: UUID4, bookings: List[Tuple[Optional[UUID4], models.BookingCreate]],
+                              reserved: Optional[List[bool]] = None) -> List[Optional[models.BookingGet]]:
+        """Создание нескольких броней"""
+        ...
+
     @abstractmethod
     async def get_booking_by_id(self, guid: UUID4) -> models.BookingGet:
         """Получение бронирования по id"""
         ...
 
     @abstractmethod
-    async def get_all_bookings(self, limit: int, offset: int) -> List[models.BookingGet]:
+    async def get_all_bookings(self, limit: int, offset: int, after: Optional[models.Cursor] = None,
+                               include_archived: bool = False) -> List[models.BookingGet]:
         """Получение списка бронирований"""
         ...
 
     @abstractmethod
-    async def get_all_bookings_by_user_id(self, user_id: UUID4, limit: int, offset: int) -> List[models.BookingGet]:
+    async def get_all_bookings_by_user_id(self, user_id: UUID4, limit: int, offset: int,
+                                          after: Optional[models.Cursor] = None,
+                                          include_archived: bool = False) -> List[models.BookingGet]:
         """Получение списка бронирований по id пользователя"""
         ...
 
     @abstractmethod
-    async def get_cur_number_persons(self, service_id: UUID4) -> int:
-        """Получение текущего количества людей, которые пойдут на экскурсию"""
+    def stream_bookings(self, batch_size: int) -> AsyncIterator[List[models.BookingGet]]:
+        """Потоковое чтение всех броней пачками"""
+        ...
+
+    @abstractmethod
+    async def get_reserved_seats(self, datetime: dt) -> int:
+        """Получение количества занятых мест на время брони"""
         ...
 
     @abstractmethod
-    async def change_booking_status(self, guid: UUID4, status: models.BookingStatusUpdate) -> models.BookingGet:
+    async def get_booking_occupancy(self, start: dt, end: dt,
+                                    bucket: models.OccupancyBucket) -> List[models.BookingOccupancyBucket]:
+        """Получение количества броней и человек по интервалам времени"""
+        ...
+
+    @abstractmethod
+    async def rebuild_booking_occupancy(self) -> int:
+        """Пересборка агрегата броней по часам"""
+        ...
+
+    @abstractmethod
+    async def change_booking_status(self, guid: UUID4, status: models.BookingStatusUpdate) -> Optional[models.BookingGet]:
         """Изменение статуса бронирования"""
         ...
 
     @abstractmethod
-    async def change_booking(self, guid: UUID4, booking: models.BookingUpdate) -> models.BookingGet:
+    async def change_booking(self, guid: UUID4, booking: models.BookingUpdate) -> Optional[models.BookingGet]:
         """Изменение бронирования"""
         ...
 
     @abstractmethod
-    async def delete_booking(self, guid: UUID4):
+    async def delete_booking(self, guid: UUID4) -> bool:
         """Удаление бронирования"""
         ...
+
+    @abstractmethod
+    async def purge_deleted_bookings(self, limit: int) -> int:
+        """Физическое удаление помеченных броней"""
+        ...
+
+    @abstractmethod
+    async def get_deleted_user_ids(self, limit: int) -> List[UUID4]:
+        """Получение id удаленных пользователей для очистки"""
+        ...
+
+    @abstractmethod
+    async def delete_user_bookings(self, user_ids: List[UUID4], limit: int) -> int:
+        """Физическое удаление броней пользователей и помеченных броней, которые они создали или изменили"""
+        ...
+
+    @abstractmethod
+    async def purge_users(self, user_ids: List[UUID4]) -> int:
+        """Физическое удаление удаленных пользователей без броней"""
+        ...
+
+    @abstractmethod
+    async def archive_bookings(self, before: dt, limit: int) -> int:
+        """Перенос старых броней в архив"""
+        ...
+
+    @abstractmethod
+    async def get_replication_lag(self) -> Optional[float]:
+        """Отставание реплик в секундах"""
+        ...
@@ -0,0 +1,42 @@
+from enum import Enum
+from typing import Iterable, List
+
+from sqlalchemy.orm import noload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from backend.database import tables
+
+
+class LoadStrategy(str, Enum):
+    NOLOAD = "noload"
+    RAISELOAD = "raiseload"
+    SELECTINLOAD = "selectinload"
+
+
+_LOADERS = {
+    LoadStrategy.NOLOAD: noload,
+    LoadStrategy.RAISELOAD: raiseload,
+    LoadStrategy.SELECTINLOAD: selectinload,
+}
+
+USER_COLLECTIONS = (
+    tables.User.bookings_rel,
+    tables.User.created_bookings_rel,
+    tables.User.updated_bookings_rel,
+)
+
+
+def load_options(relationships: Iterable, strategy: LoadStrategy) -> List[LoaderOption]:
+    """Опции загрузки связей для запроса"""
+
+    loader = _LOADERS[strategy]
+    return [loader(relationship) for relationship in relationships]
+
+
+def user_load_options(strategy: LoadStrategy = LoadStrategy.NOLOAD) -> List[LoaderOption]:
+    """Опции загрузки коллекций броней пользователя. Удаленные брони не загружаются"""
+
+    if strategy == LoadStrategy.SELECTINLOAD:
+        return load_options([relationship.and_(~tables.Booking.is_deleted) for relationship in USER_COLLECTIONS],
+                            strategy)
+    return load_options(USER_COLLECTIONS, strategy)
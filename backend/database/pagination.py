@@ -0,0 +1,18 @@
+from typing import Optional
+
+from sqlalchemy import Select, tuple_
+
+from backend import models
+
+
+def paginate(query: Select, created_at, guid, limit: int, offset: int, after: Optional[models.Cursor]) -> Select:
+    """Страница запроса в порядке (created_at, guid).
+
+    С курсором используется keyset-пагинация, иначе - limit/offset.
+    """
+
+    query = query.order_by(created_at, guid).limit(limit)
+    if after is not None:
+        return query.where(tuple_(created_at, guid) > tuple_(after.created_at, after.guid))
+
+    return query.offset(offset)
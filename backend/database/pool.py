@@ -0,0 +1,83 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from backend.metrics import db_pool_wait_seconds
+
+
+class PoolMetrics:
+    """Счетчики ожидания соединений из пула"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        """Учет времени ожидания одного соединения"""
+
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+    def reset(self) -> None:
+        """Сброс счетчиков"""
+
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+
+pool_metrics = PoolMetrics()
+
+# Время открытия соединений внутри текущего получения из пула, None - получение не измеряется.
+# Контекст свой у каждого потока и гринлета, поэтому одновременные получения не смешиваются
+_connect_seconds: ContextVar[Optional[float]] = ContextVar("pool_connect_seconds", default=None)
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который измеряет время ожидания свободного соединения.
+    Открытие нового соединения в ожидание не входит"""
+
+    def _do_get(self):
+        if _connect_seconds.get() is not None:
+            # Повторный вызов изнутри QueuePool._do_get: ожидание учитывает внешний вызов
+            return super()._do_get()
+
+        started = time.perf_counter()
+        token = _connect_seconds.set(0.0)
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started - _connect_seconds.get()
+            _connect_seconds.reset(token)
+            pool_metrics.observe_wait(waited)
+            db_pool_wait_seconds.observe(waited)
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            connecting = _connect_seconds.get()
+            if connecting is not None:
+                _connect_seconds.set(connecting + time.perf_counter() - started)
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """Текущее состояние пула и накопленные метрики ожидания"""
+
+    pool = engine.pool
+    status = {
+        "checkouts": pool_metrics.checkouts,
+        "wait_seconds_total": pool_metrics.wait_seconds_total,
+        "wait_seconds_max": pool_metrics.wait_seconds_max,
+    }
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+
+    return status
@@ -0,0 +1,63 @@
+import time
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+
+class ReplicaSet:
+    """Реплики для чтения: выбор по кругу, недоступная реплика пропускается eject_seconds секунд"""
+
+    def __init__(self, engines: Sequence[AsyncEngine], eject_seconds: float):
+        self._engines = list(engines)
+        self._eject_seconds = eject_seconds
+        self._sessions: Dict[AsyncEngine, sessionmaker] = {
+            engine: sessionmaker(engine, expire_on_commit=False, class_=AsyncSession) for engine in self._engines
+        }
+        self._ejected_until: Dict[AsyncEngine, float] = {engine: 0.0 for engine in self._engines}
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        return list(self._engines)
+
+    def choose(self) -> Optional[sessionmaker]:
+        """Фабрика сессий следующей доступной реплики или None, если доступных реплик нет"""
+
+        now = time.monotonic()
+        for _ in range(len(self._engines)):
+            engine = self._engines[self._next % len(self._engines)]
+            self._next += 1
+            if self._ejected_until[engine] <= now:
+                return self._sessions[engine]
+
+        return None
+
+    def eject(self, engine: AsyncEngine) -> None:
+        """Временное исключение реплики после ошибки соединения"""
+
+        if engine in self._ejected_until:
+            self._ejected_until[engine] = time.monotonic() + self._eject_seconds
+
+
+def is_disconnect(error: BaseException) -> bool:
+    """Ошибка соединения с БД (обрыв, отказ в подключении), а не ошибка самого запроса (таймаут, блокировка)"""
+
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated
+    # Ошибки подключения asyncpg приходят без обертки SQLAlchemy
+    return isinstance(error, OSError)
+
+
+async def get_replication_lag(session: AsyncSession) -> Optional[float]:
+    """Наибольшее отставание реплик в секундах по pg_stat_replication основной БД.
+    None, если реплик нет или у пользователя БД нет прав на pg_stat_replication (роль pg_monitor)"""
+
+    query = text("SELECT EXTRACT(EPOCH FROM max(replay_lag)) FROM pg_stat_replication")
+    lag = (await session.execute(query)).scalar()
+    return float(lag) if lag is not None else None
@@ -1,3 +1,6 @@
 from backend.database.tables.user import User
 # from backend.database.tables.service import Service
-from backend.database.tables.booking import Booking
\ No newline at end of file
+from backend.database.tables.booking import Booking
+from backend.database.tables.booking_slot import BookingSlot
+from backend.database.tables.booking_occupancy import BookingOccupancy
+from backend.database.tables.booking_archive import BookingArchive
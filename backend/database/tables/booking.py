@@ -1,11 +1,20 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, func, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, func, ForeignKey, Index, false, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from backend.database.connection import Base
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_created_at_guid", "created_at", "guid", postgresql_where=text("NOT is_deleted")),
+        Index("ix_bookings_user_guid_created_at_guid", "user_guid", "created_at", "guid",
+              postgresql_where=text("NOT is_deleted")),
+        Index("ix_bookings_datetime_status", "datetime", "status"),
+        Index("ix_bookings_user_created", "user_created"),
+        Index("ix_bookings_user_updated", "user_updated"),
+        Index("ix_bookings_deleted_updated_at", "updated_at", postgresql_where=text("is_deleted")),
+    )
 
     guid = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True, index=True)
     user_guid = Column(UUID(as_uuid=True), ForeignKey("users.guid"), nullable=False)  # Use "users" table name
@@ -16,7 +25,7 @@ class Booking(Base):
     user_created = Column(UUID(as_uuid=True), ForeignKey("users.guid"), nullable=False)  # Use "users" table name
     user_updated = Column(UUID(as_uuid=True), ForeignKey("users.guid"), nullable=False)  # Use "users" table name
 
-    is_deleted = Column(Boolean, default=False, nullable=False)
+    is_deleted = Column(Boolean, default=False, server_default=false(), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, func, Index
+from sqlalchemy.dialects.postgresql import UUID
+from backend.database.connection import Base
+
+class BookingArchive(Base):
+    """Брони старше срока хранения. Переносятся из bookings задачей архивации (runmaintenance.py)"""
+
+    __tablename__ = "bookings_archive"
+    __table_args__ = (
+        Index("ix_bookings_archive_created_at_guid", "created_at", "guid"),
+        Index("ix_bookings_archive_user_guid_created_at_guid", "user_guid", "created_at", "guid"),
+    )
+
+    guid = Column(UUID(as_uuid=True), primary_key=True)
+    user_guid = Column(UUID(as_uuid=True), nullable=False)
+    status = Column(String, nullable=False)
+    number_persons = Column(Integer, nullable=True)
+    datetime = Column(DateTime, nullable=False)
+
+    # Без внешних ключей: архив не мешает очистке пользователей
+    user_created = Column(UUID(as_uuid=True), nullable=False)
+    user_updated = Column(UUID(as_uuid=True), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
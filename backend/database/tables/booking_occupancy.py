@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from backend.database.connection import Base
+
+class BookingOccupancy(Base):
+    """Количество броней и человек по часам и статусам. Поддерживается вместе с бронями в той же транзакции"""
+
+    __tablename__ = "booking_occupancy"
+
+    hour = Column(DateTime, primary_key=True)  # время брони, округленное вниз до часа
+    status = Column(String, primary_key=True)
+    persons = Column(Integer, nullable=False, default=0)
+    bookings = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
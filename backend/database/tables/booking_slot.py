@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, func, CheckConstraint
+from backend.database.connection import Base
+
+class BookingSlot(Base):
+    """Занятые места на время брони. Поддерживается вместе с бронями в той же транзакции"""
+
+    __tablename__ = "booking_slots"
+    __table_args__ = (
+        CheckConstraint("reserved >= 0", name="ck_booking_slots_reserved"),
+    )
+
+    datetime = Column(DateTime, primary_key=True)
+    reserved = Column(Integer, nullable=False, default=0)
+    capacity = Column(Integer, nullable=True)  # NULL - BOOKING_SLOT_CAPACITY из конфигурации
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,11 +1,19 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime, func
+from sqlalchemy import Column, String, Boolean, DateTime, func, Index, false, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from backend.database.connection import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Удаленные пользователи остаются в таблице до очистки и не попадают в индексы чтения
+        Index("ix_users_created_at_guid", "created_at", "guid", postgresql_where=text("NOT is_deleted")),
+        Index("ix_users_role_created_at_guid", "role", "created_at", "guid", postgresql_where=text("NOT is_deleted")),
+        Index("ux_users_phone", "phone", unique=True, postgresql_where=text("NOT is_deleted")),
+        Index("ux_users_email", "email", unique=True, postgresql_where=text("NOT is_deleted")),
+        Index("ix_users_deleted_updated_at", "updated_at", postgresql_where=text("is_deleted")),
+    )
 
     guid = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True, index=True)
 
@@ -14,17 +22,17 @@ class User(Base):
     middle_name = Column(String(50), nullable=True)
     password = Column(String, nullable=True)
 
-    phone = Column(String, unique=True, nullable=False)
-    email = Column(String, unique=True, nullable=True)
+    phone = Column(String, nullable=False)
+    email = Column(String, nullable=True)
     role = Column(String, nullable=False)
 
-    is_deleted = Column(Boolean, default=False)
+    is_deleted = Column(Boolean, default=False, server_default=false(), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    bookings_rel = relationship("Booking", back_populates="user_rel", lazy="joined", uselist=True,
-                                foreign_keys='Booking.user_guid', cascade="all, delete-orphan")
-    created_bookings_rel = relationship("Booking", back_populates="user_created_rel", lazy="joined", uselist=True,
-                                        foreign_keys='Booking.user_created', cascade="all, delete-orphan")
-    updated_bookings_rel = relationship("Booking", back_populates="user_updated_rel", lazy="joined", uselist=True,
-                                        foreign_keys='Booking.user_updated', cascade="all, delete-orphan")
+    bookings_rel = relationship("Booking", back_populates="user_rel", lazy="select", uselist=True,
+                                foreign_keys='Booking.user_guid', passive_deletes=True)
+    created_bookings_rel = relationship("Booking", back_populates="user_created_rel", lazy="select", uselist=True,
+                                        foreign_keys='Booking.user_created', passive_deletes=True)
+    updated_bookings_rel = relationship("Booking", back_populates="user_updated_rel", lazy="select", uselist=True,
+                                        foreign_keys='Booking.user_updated', passive_deletes=True)
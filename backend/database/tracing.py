@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryTrace:
+    """SQL-запросы одного HTTP-запроса: количество, время в БД, строки и повторы одного и того же запроса"""
+
+    def __init__(self, n_plus_one_threshold: int):
+        self.statements = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self._n_plus_one_threshold = n_plus_one_threshold
+        self._repeats: Dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float, rows: int) -> None:
+        """Учет одного выполненного запроса"""
+
+        self.statements += 1
+        self.seconds += seconds
+        self.rows += rows
+        self._repeats[statement] = self._repeats.get(statement, 0) + 1
+
+    @property
+    def n_plus_one(self) -> Dict[str, int]:
+        """Одинаковые запросы, выполненные не меньше порога раз: вероятно, N+1"""
+
+        return {statement: count for statement, count in self._repeats.items()
+                if count >= self._n_plus_one_threshold}
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing"""
+
+        return f'db;dur={self.seconds * 1000:.3f};desc="{self.statements} queries, {self.rows} rows"'
+
+
+_current: ContextVar[Optional[QueryTrace]] = ContextVar("query_trace", default=None)
+
+
+@contextmanager
+def tracing(n_plus_one_threshold: int) -> Iterator[QueryTrace]:
+    """Учет SQL-запросов, выполненных в текущем контексте (задаче asyncio)"""
+
+    trace = QueryTrace(n_plus_one_threshold)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    trace = _current.get()
+    if trace is None:
+        return
+
+    started: List[float] = conn.info.get("query_started")
+    if not started:
+        return
+    # rowcount для SELECT asyncpg берет из статуса команды, для серверного курсора он -1
+    trace.record(statement, time.perf_counter() - started.pop(), max(cursor.rowcount, 0))
+
+
+def install(engine: AsyncEngine) -> None:
+    """Подключение учета запросов к движку. Вне tracing() обработчики только проверяют ContextVar"""
+
+    # SQLAlchemy выполняет запросы в greenlet с контекстом вызывающей задачи, поэтому ContextVar здесь виден
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
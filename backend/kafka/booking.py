@@ -1,145 +1,107 @@
+import asyncio
 import json
-from confluent_kafka import Consumer, KafkaException
-from fastapi import Depends
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-
-from backend.services.booking import BookingService
-
-from typing import Dict, List
-
-from fastapi import Depends
-from pydantic import UUID4
-
-from backend import config, models
+from typing import Any, Awaitable, Callable, Dict, List
+
+from fastapi import HTTPException
+from pydantic import UUID4, ValidationError
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from backend import models
+from backend.config import config
+from backend.database.connection import async_session
+from backend.database.facade import DBFacade
+from backend.database.replicas import is_disconnect
+from backend.kafka.broker import KafkaMessage
+from backend.logging import log
+from backend.middleware.auth import decode_access_token
 from backend.services.booking import BookingService
-from backend.utils.auth import get_user_from_access_token
-from jose import jwt
-
-schema_bearer = HTTPBearer()
-
-consumer = Consumer('booking', bootstrap_servers='localhost:9092')
 
 '''
 {
-    'command': 'create',
-    'token': [your_token]
+    'command': 'create_booking',
+    'token': [your_token],
     'value': {
         ...
     }
 }
 '''
-def read_kafka():
-    try:
-        while True:
-            msg = consumer.poll(timeout=1.0)  # ожидание сообщения
-            if msg is None:                   # если сообщений нет
-                continue
-            if msg.error():                   # обработка ошибок
-                raise KafkaException(msg.error())
-            
-            value = json.loads(msg.value())
-            
-            if value['command'] == 'create_booking':
-                create_booking(
-                    booking=models.BookingCreate.model_validate_json(value['value']),
-                    requester_id=verify_access_token(value['token']),
-                )
-            elif value['command'] == 'get_booking':
-                get_booking(
-                    id_=value['value']['id'],
-                    user_id=verify_access_token(value['token']),
-                )
-            elif value['command'] == 'get_all_bookings':
-                get_all_bookings(
-                    limit=value['value']['limit'],
-                    offset=value['value']['offset'],
-                    user_id=verify_access_token(value['token']),
-                )
-            elif value['command'] == 'change_booking_status':
-                change_booking_status(
-                    id_=value['value']['id'],
-                    status=models.BookingStatusUpdate(
-                        guid=value['value']['id'],
-                        status=value['value']['status'],
-                    ),
-                    user_id=verify_access_token(value['token']),
-                )
-            elif value['command'] == 'change_booking':
-                change_booking(
-                    id_=value['value']['id'],
-                    booking=models.BookingUpdate.model_validate_json(value['value']['booking']),
-                    user_id=verify_access_token(value['token']),
-                )
-            elif value['command'] == 'delete_booking':
-                delete_booking(
-                    id_=value['value']['id'],
-                    user_id=verify_access_token(value['token']),
-                )
-                
-    except KeyboardInterrupt:
-        pass 
-    finally:
-        consumer.close()
-    
-async def verify_access_token(access_token: HTTPAuthorizationCredentials = Depends(schema_bearer)):
+
+Command = Callable[[BookingService, UUID4, Dict[str, Any]], Awaitable[Any]]
+
+
+async def create_booking(service: BookingService, user_id: UUID4, value: Dict[str, Any]) -> None:
+    await service.create_booking(requester_id=user_id, booking=models.BookingCreate.model_validate(value))
+
+
+async def change_booking_status(service: BookingService, user_id: UUID4, value: Dict[str, Any]) -> None:
+    await service.change_booking_status(user_id=user_id, booking_id=value["id"],
+                                        status=models.BookingStatusUpdate(status=value["status"]))
+
+
+async def change_booking(service: BookingService, user_id: UUID4, value: Dict[str, Any]) -> None:
+    await service.change_booking(user_id=user_id, booking_id=value["id"],
+                                 booking=models.BookingUpdate.model_validate(value["booking"]))
+
+
+async def delete_booking(service: BookingService, user_id: UUID4, value: Dict[str, Any]) -> None:
+    await service.delete_booking(user_id=user_id, booking_id=value["id"])
+
+
+commands: Dict[str, Command] = {
+    "create_booking": create_booking,
+    "change_booking_status": change_booking_status,
+    "change_booking": change_booking,
+    "delete_booking": delete_booking,
+}
+
+# Ошибки в самом сообщении: повтор не поможет, сообщение пропускается
+_REJECTED = (HTTPException, ValidationError, ValueError, KeyError, TypeError)
+# Временные ошибки БД: сообщение повторяется
+_RETRIED = (OperationalError, InterfaceError)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Временная ошибка БД. Остальные ошибки БД (IntegrityError, DataError) вызваны данными сообщения:
+    повтор дал бы ту же ошибку и навсегда остановил бы партицию"""
+
+    return isinstance(error, _RETRIED) or is_disconnect(error)
+
+
+async def process_booking_batch(messages: List[KafkaMessage]) -> None:
+    """Обработка пачки сообщений одной партиции в одной сессии БД"""
+
+    async with async_session() as session:
+        service = BookingService(db_facade=DBFacade(session=session))
+        for message in messages:
+            for attempt in range(config.KAFKA_MAX_RETRIES + 1):
+                try:
+                    await _dispatch(service, message)
+                    break
+                except _REJECTED as e:
+                    await session.rollback()
+                    log.warning(f"Kafka: сообщение {message.partition}:{message.offset} отклонено: {e}")
+                    break
+                except (DBAPIError, OSError) as e:
+                    await session.rollback()
+                    if not _is_transient(e):
+                        log.warning(f"Kafka: сообщение {message.partition}:{message.offset} отклонено БД: {e}")
+                        break
+                    if attempt == config.KAFKA_MAX_RETRIES:
+                        raise
+                    log.warning(f"Kafka: сообщение {message.partition}:{message.offset}, повтор {attempt + 1}: {e}")
+                    await asyncio.sleep(min(2 ** attempt * 0.1, 5))
+
+
+async def _dispatch(service: BookingService, message: KafkaMessage) -> None:
+    payload = json.loads(message.value)
+
+    command = commands.get(payload["command"])
+    if command is None:
+        raise ValueError(f"Неизвестная команда {payload['command']}")
+
     try:
-        info = jwt.decode(
-            access_token.credentials,
-            config.JWT_SECRET,
-            algorithms=[config.JWT_ALGORITHM],
-            options={"verify_aud": False},
-        )
-        return info["sub"]
-    except Exception:
-        raise Exception("Неверный токен авторизации")
-
-async def create_booking(
-    booking: models.BookingCreate,
-    requester_id: UUID4,
-    booking_service: BookingService = Depends(),
-) -> models.BookingGet:
-    return await booking_service.create_booking(requester_id=requester_id, booking=booking)
-
-
-async def get_booking(
-    id_: UUID4,
-    user_id: UUID4,
-    booking_service: BookingService = Depends(),
-) -> models.BookingGet:
-    return await booking_service.get_booking_by_id(user_id=user_id, booking_id=id_)
-
-
-async def get_all_bookings(
-    limit: int,
-    offset: int,
-    user_id: UUID4,
-    booking_service: BookingService = Depends(),
-) -> Dict[str, List[models.BookingGet]]:
-    result = await booking_service.get_all_bookings(user_id=user_id, limit=limit, offset=offset)
-    return {"bookings": result}
-
-
-async def change_booking_status(
-    id_: UUID4,
-    status: models.BookingStatusUpdate,
-    user_id: UUID4,
-    booking_service: BookingService = Depends(),
-) -> models.BookingGet:
-    return await booking_service.change_booking_status(user_id=user_id, booking_id=id_, status=status)
-
-
-async def change_booking(
-    id_: UUID4,
-    booking: models.BookingUpdate,
-    user_id: UUID4,
-    booking_service: BookingService = Depends(),
-) -> models.BookingGet:
-    return await booking_service.change_booking(user_id=user_id, booking_id=id_, booking=booking)
-
-
-async def delete_booking(
-    booking_id: UUID4,
-    user_id: UUID4,
-    booking_service: BookingService = Depends(),
-):
-    return await booking_service.delete_booking(user_id=user_id, booking_id=booking_id)
\ No newline at end of file
+        principal = decode_access_token(payload["token"])
+    except Exception as e:
+        raise ValueError("Неверный токен авторизации") from e
+
+    await command(service, principal.user_id, payload["value"])
@@ -0,0 +1,154 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class KafkaMessage:
+    topic: str
+    partition: int
+    offset: int
+    value: bytes
+
+
+class Broker(ABC):
+    """Источник сообщений с ручной фиксацией смещений"""
+
+    @abstractmethod
+    async def fetch(self, max_records: int, timeout: float) -> List[KafkaMessage]:
+        pass
+
+    @abstractmethod
+    async def commit(self, topic: str, partition: int, offset: int) -> None:
+        """Фиксация смещения: `offset` - следующее необработанное сообщение"""
+        pass
+
+    @abstractmethod
+    async def pause(self) -> None:
+        pass
+
+    @abstractmethod
+    async def resume(self) -> None:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+
+class KafkaBroker(Broker):
+    """Consumer confluent_kafka. Все вызовы идут через один поток: consumer не потокобезопасен"""
+
+    def __init__(self, topics: Sequence[str], bootstrap_servers: str, group_id: str):
+        from confluent_kafka import Consumer
+
+        self._consumer = Consumer({
+            "bootstrap.servers": bootstrap_servers,
+            "group.id": group_id,
+            "enable.auto.commit": False,
+            "auto.offset.reset": "earliest",
+        })
+        self._consumer.subscribe(list(topics), on_assign=self._on_assign)
+        self._paused = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka")
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def fetch(self, max_records: int, timeout: float) -> List[KafkaMessage]:
+        from confluent_kafka import KafkaError, KafkaException
+
+        messages = []
+        for message in await self._call(self._consumer.consume, max_records, timeout):
+            if message.error():
+                if message.error().code() == KafkaError._PARTITION_EOF:
+                    continue
+                raise KafkaException(message.error())
+            messages.append(KafkaMessage(message.topic(), message.partition(), message.offset(), message.value()))
+        return messages
+
+    async def commit(self, topic: str, partition: int, offset: int) -> None:
+        from confluent_kafka import TopicPartition
+
+        await self._call(lambda: self._consumer.commit(offsets=[TopicPartition(topic, partition, offset)],
+                                                       asynchronous=False))
+
+    def _on_assign(self, consumer, partitions) -> None:
+        # Вызывается из consume() в потоке consumer. Партиции, полученные при ребалансировке
+        # во время паузы, приостанавливаются сразу после назначения, иначе пауза их не касалась бы
+        consumer.assign(partitions)
+        if self._paused:
+            consumer.pause(partitions)
+
+    def _set_paused(self, paused: bool) -> None:
+        self._paused = paused
+        if paused:
+            self._consumer.pause(self._consumer.assignment())
+        else:
+            self._consumer.resume(self._consumer.assignment())
+
+    async def pause(self) -> None:
+        await self._call(self._set_paused, True)
+
+    async def resume(self) -> None:
+        await self._call(self._set_paused, False)
+
+    async def close(self) -> None:
+        await self._call(self._consumer.close)
+        self._executor.shutdown()
+
+
+class MemoryBroker(Broker):
+    """Брокер в памяти процесса для тестов и бенчмарков"""
+
+    def __init__(self, topic: str, partitions: int):
+        self.topic = topic
+        self._log: Dict[int, List[bytes]] = {partition: [] for partition in range(partitions)}
+        self._positions: Dict[int, int] = defaultdict(int)
+        self.committed: Dict[Tuple[str, int], int] = {}
+        self.paused = False
+        self._available = asyncio.Event()
+
+    def produce(self, partition: int, value: bytes) -> None:
+        self._log[partition].append(value)
+        self._available.set()
+
+    async def fetch(self, max_records: int, timeout: float) -> List[KafkaMessage]:
+        messages = self._take(max_records)
+        if not messages:
+            self._available.clear()
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            messages = self._take(max_records)
+        return messages
+
+    def _take(self, max_records: int) -> List[KafkaMessage]:
+        if self.paused:
+            return []
+
+        messages = []
+        for partition, log in self._log.items():
+            position = self._positions[partition]
+            count = min(len(log) - position, max_records - len(messages))
+            messages += [KafkaMessage(self.topic, partition, offset, log[offset])
+                         for offset in range(position, position + count)]
+            self._positions[partition] = position + count
+        return messages
+
+    async def commit(self, topic: str, partition: int, offset: int) -> None:
+        self.committed[(topic, partition)] = offset
+
+    async def pause(self) -> None:
+        self.paused = True
+
+    async def resume(self) -> None:
+        self.paused = False
+        self._available.set()
+
+    async def close(self) -> None:
+        pass
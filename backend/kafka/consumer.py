@@ -0,0 +1,105 @@
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.kafka.broker import Broker, KafkaMessage
+from backend.logging import log
+
+Partition = Tuple[str, int]
+
+
+class BatchConsumer:
+    """Асинхронный обработчик сообщений пачками.
+
+    Сообщения одной партиции обрабатываются строго по порядку, разные партиции - параллельно,
+    не больше `concurrency` одновременно. Смещение фиксируется после того, как `process`
+    обработал пачку (и закоммитил ее в БД). Если необработанных сообщений набралось `max_pending`,
+    чтение из брокера приостанавливается до разгрузки. Если `process` завершился ошибкой, смещения
+    партиции дальше не фиксируются и обработчик останавливается: после перезапуска сообщения
+    будут получены повторно с последнего зафиксированного смещения.
+    """
+
+    def __init__(
+            self,
+            broker: Broker,
+            process: Callable[[List[KafkaMessage]], Awaitable[None]],
+            batch_size: int = 100,
+            concurrency: int = 8,
+            max_pending: int = 1000,
+            fetch_timeout: float = 1.0,
+    ):
+        self._broker = broker
+        self._process = process
+        self._batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._max_pending = max_pending
+        self._fetch_timeout = fetch_timeout
+
+        self._tails: Dict[Partition, asyncio.Task] = {}
+        self._failed: Set[Partition] = set()
+        self._pending = 0
+        self._paused = False
+        self._stopping = asyncio.Event()
+
+        self.processed = 0
+
+    def stop(self) -> None:
+        """Остановка после обработки уже полученных сообщений"""
+
+        self._stopping.set()
+
+    async def run(self) -> bool:
+        """Чтение и обработка до вызова `stop`. Возвращает False, если обработка завершилась ошибкой"""
+
+        try:
+            while not self._stopping.is_set():
+                await self._backpressure()
+                messages = await self._broker.fetch(self._batch_size, self._fetch_timeout)
+
+                batches: Dict[Partition, List[KafkaMessage]] = defaultdict(list)
+                for message in messages:
+                    batches[(message.topic, message.partition)].append(message)
+
+                for partition, batch in batches.items():
+                    self._pending += len(batch)
+                    previous = self._tails.get(partition)
+                    self._tails[partition] = asyncio.create_task(self._handle(partition, batch, previous))
+
+            await asyncio.gather(*self._tails.values(), return_exceptions=True)
+        finally:
+            await self._broker.close()
+
+        return not self._failed
+
+    async def _backpressure(self) -> None:
+        if not self._paused and self._pending >= self._max_pending:
+            log.debug(f"Kafka: {self._pending} необработанных сообщений, чтение приостановлено")
+            await self._broker.pause()
+            self._paused = True
+        elif self._paused and self._pending < self._max_pending // 2:
+            await self._broker.resume()
+            self._paused = False
+
+    async def _handle(self, partition: Partition, batch: List[KafkaMessage],
+                      previous: Optional[asyncio.Task]) -> None:
+        try:
+            if previous is not None:
+                # Пачки одной партиции идут по цепочке, чтобы сохранить порядок
+                await asyncio.gather(previous, return_exceptions=True)
+
+            if partition in self._failed:
+                return
+
+            async with self._semaphore:
+                await self._process(batch)
+                await self._broker.commit(partition[0], partition[1], batch[-1].offset + 1)
+                self.processed += len(batch)
+        except Exception as e:
+            log.exception(f"Kafka: ошибка обработки {partition[0]}[{partition[1]}] "
+                          f"с {batch[0].offset} по {batch[-1].offset}: {e}")
+            self._failed.add(partition)
+            self.stop()
+        finally:
+            self._pending -= len(batch)
+            if self._tails.get(partition) is asyncio.current_task():
+                del self._tails[partition]
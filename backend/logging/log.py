@@ -1,15 +1,26 @@
+import atexit
+
 from loguru import logger
 
 from backend.config import config
+from backend.logging.sink import BatchingFileSink
 
 logger.remove()
 
+sink = BatchingFileSink(
+    path=f"{config.LOG_DIR}/%d-%m-%Y.{'jsonl' if config.LOG_JSON else 'log'}",
+    batch_size=config.LOG_BATCH_SIZE,
+    flush_interval=config.LOG_FLUSH_INTERVAL,
+)
+
 logger.add(
-    sink="backend/logging/logs/{time:DD-MM-YYYY}.log",
-    rotation="00:00",
+    sink=sink,
     format="{time:HH:mm:ss DD-MM-YYYY} | {level: <8} | {message}",
+    serialize=config.LOG_JSON,
     backtrace=False,
     level="DEBUG" if config.DEBUG else "INFO",
 )
 
+atexit.register(sink.stop)
+
 log = logger
@@ -0,0 +1,110 @@
+import os
+import queue
+import threading
+import time
+from typing import List, Optional, TextIO
+
+
+class BatchingFileSink:
+    """Приемник логов loguru: запись в очередь без блокировки, сброс на диск пачками в отдельном потоке.
+
+    Файл выбирается по шаблону `path` (strftime) на момент записи пачки, так файлы меняются по дням.
+    """
+
+    def __init__(self, path: str, batch_size: int = 512, flush_interval: float = 1.0):
+        self._path = path
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._file: Optional[TextIO] = None
+        self._file_path: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Поток не переживает fork: воркер, созданный из мастера с preload, получил бы объект
+        # неработающего потока, и его сообщения копились бы в очереди без записи
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @property
+    def pending(self) -> int:
+        """Сообщения в очереди, еще не записанные на диск"""
+
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        """Поток записи запущен"""
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def write(self, message: str) -> None:
+        """Постановка сообщения в очередь"""
+
+        if self._thread is None:
+            self._start()
+        self._queue.put(message)
+
+    def stop(self) -> None:
+        """Запись оставшихся сообщений и остановка потока"""
+
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _after_fork(self) -> None:
+        # Очередь и блокировка могли быть захвачены потоками родителя, сообщения в очереди пишет родитель,
+        # файл закрывать не нужно: его дескриптор общий с родителем
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file = None
+        self._file_path = None
+
+    def _start(self) -> None:
+        # Поток запускается при первой записи, чтобы после fork у каждого воркера был свой
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            try:
+                message = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+
+            batch: List[str] = []
+            stopped = message is None
+            if not stopped:
+                batch.append(message)
+            while not stopped and len(batch) < self._batch_size:
+                try:
+                    message = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if message is None:
+                    stopped = True
+                else:
+                    batch.append(message)
+
+            if batch:
+                self._write_batch(batch)
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch: List[str]) -> None:
+        path = time.strftime(self._path)
+        if path != self._file_path:
+            if self._file is not None:
+                self._file.close()
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+            self._file_path = path
+
+        self._file.write("".join(batch))
+        self._file.flush()
@@ -1,13 +1,16 @@
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from backend.cache.entity import entity_cache
 from backend.config import config
+from backend.metrics.multiprocess import shared_metrics
 from backend.middleware import *
 from backend.routers.user import router as user_router
 from backend.routers.auth import router as auth_router
 # from backend.routers.service import router_with_token as service_router_with_token
 # from backend.routers.service import router_without_token as service_router_without_token
 from backend.routers.booking import router as booking_router
+from backend.routers.metrics import router as metrics_router
 
 tags_metadata = [
     {"name": "auth", "description": "Работа с авторизацией"},
@@ -24,7 +27,22 @@ app = FastAPI(
     description=config.BACKEND_DESCRIPTION,
 )
 
-# cache = RedisCache(config.REDIS_HOST, config.REDIS_PORT, config.REDIS_PASSWORD, config.REDIS_DB)
+
+@app.on_event("startup")
+async def start_shared_metrics():
+    if config.METRICS_ENABLED and shared_metrics:
+        shared_metrics.start()
+
+
+@app.on_event("shutdown")
+async def stop_shared_metrics():
+    if config.METRICS_ENABLED and shared_metrics:
+        await shared_metrics.stop()
+
+
+@app.on_event("shutdown")
+async def close_cache():
+    await entity_cache.close()
 
 # add_exception_handlers(app)
 
@@ -37,9 +55,15 @@ app.add_middleware(
     expose_headers=["*"],
 )
 app.add_middleware(LoggingMiddleware)
+if config.SQL_TRACE:
+    app.add_middleware(QueryTraceMiddleware)
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(user_router, tags=["user"])
 app.include_router(auth_router, tags=["auth"])
 # app.include_router(service_router_with_token, tags=["service"])
 # app.include_router(service_router_without_token, tags=["service"])
 app.include_router(booking_router, tags=["booking"])
+if config.METRICS_ENABLED:
+    app.include_router(metrics_router)
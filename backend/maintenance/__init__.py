@@ -0,0 +1,2 @@
+from backend.maintenance.archiver import Archiver, archiver
+from backend.maintenance.purger import Purger, purger
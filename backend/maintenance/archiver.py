@@ -0,0 +1,82 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from backend.config import config
+from backend.database.connection import async_session
+from backend.database.facade import DBFacade
+from backend.logging import log
+
+LAG_CHECK_INTERVAL = 1.0
+PROGRESS_INTERVAL = 10.0
+
+
+class Archiver:
+    """Перенос броней старше `retention` в bookings_archive.
+
+    Каждая пачка из `batch_size` броней переносится одним DELETE ... RETURNING в INSERT в своей
+    транзакции. Между пачками задача уступает БД: пауза равна времени пачки, умноженному на
+    `load_factor`, а пока реплики отстают больше чем на `max_replication_lag` секунд, новые пачки
+    не начинаются.
+    """
+
+    def __init__(self, retention: timedelta, batch_size: int, load_factor: float, max_replication_lag: float):
+        self._retention = retention
+        self._batch_size = batch_size
+        self._load_factor = load_factor
+        self._max_replication_lag = max_replication_lag
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Остановка после текущей пачки"""
+
+        self._stopping.set()
+
+    async def archive(self, before: Optional[datetime] = None) -> int:
+        """Перенос всех броней со временем раньше `before` (по умолчанию - срок хранения назад).
+        Возвращает количество перенесенных броней"""
+
+        before = before or datetime.now() - self._retention
+        started = reported = time.perf_counter()
+        total = 0
+
+        while not self._stopping.is_set():
+            await self._wait_for_replicas()
+
+            batch_started = time.perf_counter()
+            async with async_session() as session:
+                db_facade = DBFacade(session=session)
+                moved = await db_facade.archive_bookings(before=before, limit=self._batch_size)
+                await db_facade.commit()
+            batch_seconds = time.perf_counter() - batch_started
+            total += moved
+
+            if time.perf_counter() - reported >= PROGRESS_INTERVAL:
+                reported = time.perf_counter()
+                log.info(f"Архивация: перенесено {total} броней, {total / (reported - started):.0f} строк/с")
+            if moved < self._batch_size:
+                break
+            await asyncio.sleep(batch_seconds * self._load_factor)
+
+        elapsed = time.perf_counter() - started
+        log.info(f"Архивация: перенесено {total} броней до {before} за {elapsed:.1f} с, "
+                 f"{total / elapsed if elapsed else 0:.0f} строк/с")
+        return total
+
+    async def _wait_for_replicas(self) -> None:
+        while not self._stopping.is_set():
+            async with async_session() as session:
+                lag = await DBFacade(session=session).get_replication_lag()
+            if lag is None or lag <= self._max_replication_lag:
+                return
+            log.info(f"Архивация: отставание реплик {lag:.1f} с, ожидание")
+            await asyncio.sleep(LAG_CHECK_INTERVAL)
+
+
+archiver = Archiver(
+    retention=timedelta(days=config.ARCHIVE_RETENTION_DAYS),
+    batch_size=config.ARCHIVE_BATCH_SIZE,
+    load_factor=config.ARCHIVE_LOAD_FACTOR,
+    max_replication_lag=config.ARCHIVE_MAX_REPLICATION_LAG,
+)
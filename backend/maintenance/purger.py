@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from backend.config import config
+from backend.database.connection import async_session
+from backend.database.facade import DBFacade
+from backend.logging import log
+
+
+class Purger:
+    """Физическое удаление помеченных броней и пользователей.
+
+    Удаление в API только помечает запись, здесь записи удаляются пачками по `batch_size`,
+    каждая пачка в своей транзакции, чтобы не держать долгих блокировок. Брони удаленного
+    пользователя удаляются раньше него самого. Пользователь, который создал или изменил действующие брони
+    других клиентов (удаленный работник), остается помеченным, пока эти брони есть. Помеченные записи
+    выбираются с SKIP LOCKED, поэтому одновременные запуски делят работу, а не ждут друг друга.
+    Запускается отдельно от веб-воркеров: runmaintenance.py purge [--loop].
+    """
+
+    def __init__(self, batch_size: int):
+        self._batch_size = batch_size
+        self._stopping = asyncio.Event()
+
+    async def purge_bookings(self) -> int:
+        """Удаление помеченных броней. Возвращает количество строк"""
+
+        total = 0
+        while not self._stopping.is_set():
+            async with async_session() as session:
+                db_facade = DBFacade(session=session)
+                purged = await db_facade.purge_deleted_bookings(limit=self._batch_size)
+                await db_facade.commit()
+            total += purged
+            if purged < self._batch_size:
+                break
+        return total
+
+    async def purge_users(self) -> int:
+        """Удаление помеченных пользователей вместе с их бронями. Возвращает количество строк"""
+
+        total = 0
+        while not self._stopping.is_set():
+            async with async_session() as session:
+                db_facade = DBFacade(session=session)
+                user_ids = await db_facade.get_deleted_user_ids(limit=self._batch_size)
+                if not user_ids:
+                    break
+
+                purged = await db_facade.delete_user_bookings(user_ids=user_ids, limit=self._batch_size)
+                # Пока на пользователей остались брони, следующая пачка снова начнется с них
+                if purged < self._batch_size:
+                    purged += await db_facade.purge_users(user_ids=user_ids)
+                await db_facade.commit()
+            if not purged:
+                break
+            total += purged
+        return total
+
+    async def purge(self) -> int:
+        """Один проход очистки. Возвращает количество удаленных строк"""
+
+        started = time.perf_counter()
+        rows = await self.purge_bookings() + await self.purge_users()
+        if rows:
+            log.info(f"Очистка: удалено строк: {rows} за {time.perf_counter() - started:.1f} с")
+        return rows
+
+    def stop(self) -> None:
+        """Остановка после текущей пачки"""
+
+        self._stopping.set()
+
+
+purger = Purger(batch_size=config.PURGE_BATCH_SIZE)
@@ -0,0 +1,4 @@
+from backend.metrics.registry import Counter, Histogram, Registry, registry
+from backend.metrics.metrics import http_request_seconds, db_facade_seconds, db_pool_wait_seconds, \
+    entity_cache_lookup_seconds, password_hash_seconds, password_hash_wait_seconds, token_decode_seconds, \
+    timed_methods
@@ -0,0 +1,60 @@
+from backend.cache.entity import entity_cache
+from backend.database.connection import engine, replicas
+from backend.database.pool import pool_status
+from backend.logging.log import sink
+from backend.metrics.registry import registry
+from backend.middleware.auth import token_cache
+from backend.utils.password import password_hasher
+
+
+def _pools():
+    yield "primary", engine
+    for index, replica in enumerate(replicas.engines):
+        yield f"replica{index}", replica
+
+
+@registry.collected("db_pool_connections", "gauge", "Pool connections by state", labels=("pool", "state"))
+def _pool_connections():
+    for name, pool_engine in _pools():
+        status = pool_status(pool_engine)
+        for state in ("size", "checked_out", "overflow"):
+            if state in status:
+                yield (name, state), status[state]
+
+
+@registry.collected("db_pool_checkouts_total", "counter", "Connections taken from all pools")
+def _pool_checkouts():
+    yield (), pool_status(engine)["checkouts"]
+
+
+@registry.collected("cache_requests_total", "counter", "Cache lookups by cache and result", labels=("cache", "result"))
+def _cache_requests():
+    for name, cache in (("entity", entity_cache), ("token", token_cache)):
+        yield (name, "hit"), cache.hits
+        yield (name, "miss"), cache.misses
+
+
+@registry.collected("entity_cache_errors_total", "counter", "Entity cache backend errors")
+def _entity_cache_errors():
+    yield (), entity_cache.errors
+
+
+@registry.collected("password_hash_calls_total", "counter", "bcrypt hash/verify calls")
+def _password_hash_calls():
+    yield (), password_hasher.metrics.calls
+
+
+@registry.collected("password_hash_tasks", "gauge", "bcrypt calls by state", labels=("state",))
+def _password_hash_tasks():
+    yield ("running",), password_hasher.metrics.running
+    yield ("waiting",), password_hasher.metrics.waiting
+
+
+@registry.collected("log_sink_pending", "gauge", "Log records queued for the writer thread")
+def _log_sink_pending():
+    yield (), sink.pending
+
+
+@registry.collected("log_sink_running", "gauge", "Log writer thread is alive")
+def _log_sink_running():
+    yield (), int(sink.running)
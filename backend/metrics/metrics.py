@@ -0,0 +1,57 @@
+import functools
+import inspect
+import time
+
+from backend.metrics.registry import Histogram, registry
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    labels=("method", "route", "status"),
+)
+db_facade_seconds = registry.histogram(
+    "db_facade_duration_seconds", "DBFacade method latency, including pool wait", labels=("method",),
+)
+db_pool_wait_seconds = registry.histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a free pool connection, excluding connects",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+entity_cache_lookup_seconds = registry.histogram(
+    "entity_cache_lookup_duration_seconds", "Entity cache lookup latency", labels=("result",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+password_hash_seconds = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time in the thread pool", labels=("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+password_hash_wait_seconds = registry.histogram(
+    "password_hash_wait_seconds", "Time bcrypt calls wait for a free thread",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+token_decode_seconds = registry.histogram(
+    "auth_token_decode_duration_seconds", "Access token verification time", labels=("result",),
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005),
+)
+
+
+def timed_methods(histogram: Histogram):
+    """Декоратор класса: время каждого публичного async-метода в `histogram` с меткой имени метода"""
+
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, _timed(histogram, name, method))
+        return cls
+
+    return decorate
+
+
+def _timed(histogram: Histogram, name: str, method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, name)
+
+    return wrapper
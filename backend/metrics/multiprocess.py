@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+from backend.config import config
+from backend.logging import log
+from backend.metrics.registry import Registry, Snapshot, merge_snapshots, registry, render_snapshot
+
+# Счетчики и гистограммы завершившихся воркеров, сложенные в один файл
+DEAD_FILE = "dead.json"
+
+
+def _write(path: str, snapshot: Snapshot) -> None:
+    # Запись во временный файл и переименование: читатель не увидит файл наполовину
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as file:
+        json.dump(snapshot, file)
+    os.replace(tmp, path)
+
+
+def _read(path: str) -> Optional[Snapshot]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _without_gauges(snapshot: Snapshot) -> Snapshot:
+    return {name: metric for name, metric in snapshot.items() if metric["kind"] != "gauge"}
+
+
+class SharedMetrics:
+    """Метрики воркеров gunicorn через общий каталог.
+
+    Каждый воркер раз в `flush_interval` секунд сохраняет снимок своих метрик в `<pid>.json`.
+    /metrics в любом воркере сохраняет свой снимок и отдает сумму всех файлов, поэтому счетчики
+    не скачут между опросами, попавшими в разные воркеры. Счетчики завершившихся воркеров
+    остаются в сумме (dead.json), их gauge-метрики отбрасываются.
+    """
+
+    def __init__(self, directory: str, registry: Registry, flush_interval: float):
+        self._directory = directory
+        self._registry = registry
+        self._flush_interval = flush_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запуск периодического сохранения снимка в воркере"""
+
+        os.makedirs(self._directory, exist_ok=True)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановка сохранения с сохранением последнего снимка"""
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Сохранение снимка метрик процесса"""
+
+        _write(self._path(os.getpid()), self._registry.snapshot())
+
+    def render(self) -> str:
+        """Сумма метрик всех воркеров в текстовом формате Prometheus"""
+
+        self.flush()
+        snapshots: List[Snapshot] = []
+        for name in sorted(os.listdir(self._directory)):
+            if name.endswith(".json"):
+                snapshot = _read(os.path.join(self._directory, name))
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        return render_snapshot(merge_snapshots(snapshots))
+
+    def clear(self) -> None:
+        """Удаление снимков прошлого запуска. Вызывается в мастер-процессе до запуска воркеров"""
+
+        os.makedirs(self._directory, exist_ok=True)
+        for name in os.listdir(self._directory):
+            if name.endswith(".json") or name.endswith(".tmp"):
+                os.remove(os.path.join(self._directory, name))
+
+    def mark_dead(self, pid: int) -> None:
+        """Перенос счетчиков завершившегося воркера в dead.json. Вызывается в мастер-процессе"""
+
+        path = self._path(pid)
+        snapshot = _read(path)
+        if snapshot is None:
+            return
+
+        dead_path = os.path.join(self._directory, DEAD_FILE)
+        dead = _read(dead_path) or {}
+        _write(dead_path, merge_snapshots([dead, _without_gauges(snapshot)]))
+        os.remove(path)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                # Запись в потоке event loop: файл в несколько КБ, и снимки не обгоняют друг друга
+                self.flush()
+            except OSError as e:
+                log.warning(f"Метрики не сохранены в {self._directory}: {e}")
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self._directory, f"{pid}.json")
+
+
+shared_metrics = SharedMetrics(config.METRICS_DIR, registry, config.METRICS_FLUSH_INTERVAL) \
+    if config.METRICS_DIR else None
@@ -0,0 +1,197 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Секунды: от 1 мс до 10 с
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+# Снимок метрик: имя -> {"kind", "documentation", "labels", "series"[, "buckets"]}, сериализуется в JSON
+Snapshot = Dict[str, Dict[str, Any]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Счетчик с метками. Запись без блокировок: метрики меняются только из потока event loop"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Увеличение счетчика серии с метками `labels`"""
+
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def series(self) -> List[list]:
+        """Серии: [значения меток, значение]"""
+
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами и метками.
+
+    Наблюдение - поиск корзины и два сложения, без блокировок: метрики меняются только из потока event loop.
+    Корзины хранятся не накопленными и суммируются при выдаче.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._bounds = tuple(sorted(buckets))
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Учет одного значения серии с метками `labels`"""
+
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self._bounds) + 1), 0.0]
+        series[0][bisect_left(self._bounds, value)] += 1
+        series[1] += value
+
+    @property
+    def buckets(self) -> List[float]:
+        return list(self._bounds)
+
+    def series(self) -> List[list]:
+        """Серии: [значения меток, количества по корзинам без накопления, сумма]"""
+
+        return [[list(labels), list(counts), total] for labels, (counts, total) in self._series.items()]
+
+
+class Collected:
+    """Метрика, значения которой читаются в момент выдачи (размер пула, счетчики кэша)"""
+
+    def __init__(self, name: str, kind: str, documentation: str, labels: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Labels, float]]]):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._collect = collect
+
+    def series(self) -> List[list]:
+        return [[list(labels), value] for labels, value in self._collect()]
+
+
+class Registry:
+    """Метрики процесса в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collected(self, name: str, kind: str, documentation: str, labels: Sequence[str] = ()):
+        """Декоратор функции, которая возвращает пары (значения меток, значение)"""
+
+        def register(collect: Callable[[], Iterable[Tuple[Labels, float]]]):
+            self._register(Collected(name, kind, documentation, labels, collect))
+            return collect
+
+        return register
+
+    def snapshot(self) -> Snapshot:
+        """Текущие значения всех метрик процесса"""
+
+        snapshot = {}
+        for metric in self._metrics.values():
+            item = snapshot[metric.name] = {
+                "kind": metric.kind,
+                "documentation": metric.documentation,
+                "labels": list(metric.labels),
+                "series": metric.series(),
+            }
+            if isinstance(metric, Histogram):
+                item["buckets"] = metric.buckets
+        return snapshot
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus 0.0.4"""
+
+        return render_snapshot(self.snapshot())
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def merge_snapshots(snapshots: Iterable[Snapshot]) -> Snapshot:
+    """Сумма снимков нескольких процессов: значения серий с одинаковыми метками складываются"""
+
+    merged: Snapshot = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "series": {}})
+            for labels, *values in metric["series"]:
+                current = target["series"].get(tuple(labels))
+                if current is None:
+                    target["series"][tuple(labels)] = [list(value) if isinstance(value, list) else value
+                                                       for value in values]
+                elif metric["kind"] == "histogram" and len(current[0]) == len(values[0]):
+                    current[0] = [a + b for a, b in zip(current[0], values[0])]
+                    current[1] += values[1]
+                elif metric["kind"] != "histogram":
+                    current[0] += values[0]
+
+    for metric in merged.values():
+        metric["series"] = [[list(labels), *values] for labels, values in metric["series"].items()]
+    return merged
+
+
+def render_snapshot(snapshot: Snapshot) -> str:
+    """Снимок метрик в текстовом формате Prometheus 0.0.4"""
+
+    lines = []
+    for name, metric in snapshot.items():
+        lines.append(f"# HELP {name} {metric['documentation']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labels"]
+        if metric["kind"] != "histogram":
+            lines.extend(f"{name}{_labels(names, labels)} {_number(value)}" for labels, value in metric["series"])
+            continue
+
+        for labels, counts, total in metric["series"]:
+            cumulative = 0
+            for bound, count in zip((*metric["buckets"], float("inf")), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
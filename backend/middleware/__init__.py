@@ -1,2 +1,4 @@
 from backend.middleware.logging import LoggingMiddleware
-from backend.middleware.exception import add_exception_handlers
\ No newline at end of file
+from backend.middleware.exception import add_exception_handlers
+from backend.middleware.metrics import MetricsMiddleware
+from backend.middleware.query_trace import QueryTraceMiddleware
\ No newline at end of file
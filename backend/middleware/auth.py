@@ -1,23 +1,62 @@
+import hashlib
+import time
+
 from fastapi import Request, status, Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt
+
+from backend import models
+from backend.cache.lru import LRUCache
 from backend.config import config
+from backend.metrics import token_decode_seconds
 
 schema_bearer = HTTPBearer()
 
+token_cache = LRUCache(max_size=config.JWT_CACHE_SIZE)
+
+
+def decode_access_token(access_token: str) -> models.Principal:
+    """Проверка JWT токена. Уже проверенные токены берутся из кэша до истечения срока действия"""
+
+    started = time.perf_counter()
+    key = hashlib.sha256(access_token.encode()).digest()
+    principal = token_cache.get(key)
+    if principal is not None:
+        token_decode_seconds.observe(time.perf_counter() - started, "cached")
+        return principal
 
-async def verify_access_token(request: Request,access_token: HTTPAuthorizationCredentials = Depends(schema_bearer)):
+    info = jwt.decode(
+        access_token,
+        config.JWT_SECRET,
+        algorithms=[config.JWT_ALGORITHM],
+        options={"verify_aud": False},
+    )
+    principal = models.Principal(
+        user_id=info["sub"],
+        jti=info.get("jti"),
+        exp=info.get("exp"),
+        role=info.get("role"),
+    )
+    token_cache.set(key, principal, expires_at=principal.exp)
+    token_decode_seconds.observe(time.perf_counter() - started, "decoded")
+
+    return principal
+
+
+async def verify_access_token(
+    request: Request,
+    access_token: HTTPAuthorizationCredentials = Depends(schema_bearer),
+) -> models.Principal:
     try:
-        info = jwt.decode(
-            access_token.credentials,
-            config.JWT_SECRET,
-            algorithms=[config.JWT_ALGORITHM],
-            options={"verify_aud": False},
-        )
-        request.state.user_id = info["sub"]
+        principal = decode_access_token(access_token.credentials)
     except Exception as e:
         raise HTTPException(
             status.HTTP_401_UNAUTHORIZED,
             "Неверный токен авторизации",
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
+
+    request.state.principal = principal
+    request.state.user_id = principal.user_id
+
+    return principal
@@ -1,16 +1,51 @@
+import time
 from http import HTTPStatus
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from backend.logging import log
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        log.info(f"{request.client.host}:{request.client.port} | {request.method} {request.url.path} - {response.status_code} "
-                 f"{HTTPStatus(response.status_code).phrase}")
+def _route_path(scope: Scope) -> str:
+    """Шаблон пути маршрута, например /user/{id}"""
 
-        return response
\ No newline at end of file
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(str(value), "{" + name + "}")
+    return path
+
+
+class LoggingMiddleware:
+    """Журнал запросов: метод, шаблон пути, статус и длительность"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            client = scope.get("client") or ("-", 0)
+            method, route = scope["method"], _route_path(scope)
+            log.bind(method=method, route=route, status=status_code, duration_ms=round(duration_ms, 3)).info(
+                f"{client[0]}:{client[1]} | {method} {route} - {status_code} {HTTPStatus(status_code).phrase} "
+                f"{duration_ms:.1f}ms"
+            )
@@ -0,0 +1,34 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.metrics import http_request_seconds
+
+
+class MetricsMiddleware:
+    """Гистограмма длительности запросов по методу, шаблону пути и статусу"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Путь без маршрута (404) не попадает в метки, иначе число серий не ограничено
+            route = scope.get("route")
+            http_request_seconds.observe(time.perf_counter() - started, scope["method"],
+                                         route.path if route is not None else "unmatched", str(status_code))
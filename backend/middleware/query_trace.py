@@ -0,0 +1,72 @@
+from typing import Optional
+
+from starlette import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend import constants
+from backend.config import config
+from backend.database.tracing import QueryTrace, tracing
+from backend.logging import log
+
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+
+def _over_budget(name: str, trace: QueryTrace) -> Optional[str]:
+    """Описание превышения бюджета запросов маршрута или None"""
+
+    budget = constants.QUERY_BUDGETS.get(name, config.SQL_QUERY_BUDGET)
+    if budget is not None and trace.statements > budget:
+        return f"{name}: {trace.statements} SQL-запросов при бюджете {budget}"
+    return None
+
+
+class QueryTraceMiddleware:
+    """Учет SQL-запросов HTTP-запроса: заголовок Server-Timing, предупреждение о вероятных N+1,
+    в строгом режиме - ответ 500 при превышении бюджета запросов маршрута"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rejected = False
+        with tracing(config.SQL_N_PLUS_ONE_THRESHOLD) as trace:
+            async def send_with_timing(message: Message) -> None:
+                nonlocal rejected
+                if rejected:
+                    return
+
+                if message["type"] == "http.response.start":
+                    server_timing = trace.server_timing()
+                    # Бюджет проверяется до отправки заголовков: после них клиент уже получил бы 200
+                    exceeded = _over_budget(_route_name(scope), trace) if config.SQL_TRACE_STRICT else None
+                    if exceeded is not None:
+                        rejected = True
+                        response = JSONResponse({"detail": exceeded}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                                headers={"server-timing": server_timing})
+                        await response(scope, receive, send)
+                        return
+
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        name = _route_name(scope)
+        for statement, count in trace.n_plus_one.items():
+            log.bind(route=name, repeats=count).warning(
+                f"{name}: вероятно N+1, запрос выполнен {count} раз: {' '.join(statement.split())[:200]}")
+
+        # Потоковые ответы выполняют запросы и после заголовков: такое превышение можно только записать в лог
+        exceeded = _over_budget(name, trace) if config.SQL_TRACE_STRICT and not rejected else None
+        if exceeded is not None:
+            log.bind(route=name).error(f"Бюджет SQL-запросов превышен после отправки заголовков: {exceeded}")
@@ -1,7 +1,10 @@
 from backend.models.user import UserSignUp, UserSignIn, UserGet, UserUpdate, UserPatch, UserChangePassword, \
-    UserForgotPassword, UserRole, UserGetWithoutPassword
+    UserForgotPassword, UserRole, UserGetWithoutPassword, UserList, UserAuth
 from backend.models.token import Token
+from backend.models.principal import Principal
+from backend.models.pagination import Cursor
 from backend.models import errors
 # from backend.models.service import ServiceCreate, ServiceUpdate, ServicePatch, ServiceGet, ServiceType
 from backend.models.booking import BookingCreate, BookingUpdate, BookingPatch, BookingGet, BookingStatusType, \
-    BookingStatusUpdate
+    BookingStatusUpdate, BookingList, BookingBatchCreate, BookingBatchItem, BookingBatchResult, \
+    OccupancyBucket, BookingOccupancyBucket, BookingOccupancy, BookingOccupancyRebuild, ExportFormat
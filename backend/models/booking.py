@@ -1,8 +1,9 @@
 from datetime import datetime as dt
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional
 import phonenumbers
 from pydantic import ConfigDict, UUID4, Field, field_validator
+from backend.constants import MAX_BATCH_SIZE
 from backend.models.utils import ApiModel
 
 
@@ -12,12 +13,23 @@ class BookingStatusType(str, Enum):
     CANCELLED = 'cancelled'
 
 
+class OccupancyBucket(str, Enum):
+    HOUR = 'hour'
+    DAY = 'day'
+    WEEK = 'week'
+
+
+class ExportFormat(str, Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
 class BookingStatusUpdate(ApiModel):
     status: BookingStatusType = Field(..., description="Статус брони")
 
 
 class BookingBase(ApiModel):
-    number_persons: int = Field(..., description="Количество человек")
+    number_persons: int = Field(..., ge=1, description="Количество человек")
     status: BookingStatusType = Field(..., description="Статус брони")
     datetime: dt = Field(..., description="Время бронирования")
 
@@ -68,3 +80,38 @@ class BookingGet(BookingBase):
 
     created_at: dt = Field(..., description="Время создания услуги в формате RFC-3339")
     updated_at: dt = Field(..., description="Время последнего обновления услуги в формате RFC-3339")
+
+
+class BookingList(ApiModel):
+    bookings: List[BookingGet] = Field(..., description="Список броней")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы")
+
+
+class BookingBatchCreate(ApiModel):
+    bookings: List[BookingCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Брони")
+
+
+class BookingBatchItem(ApiModel):
+    index: int = Field(..., description="Номер брони в запросе")
+    booking: Optional[BookingGet] = Field(None, description="Созданная бронь")
+    error: Optional[str] = Field(None, description="Причина, по которой бронь не создана")
+
+
+class BookingBatchResult(ApiModel):
+    created: int = Field(..., description="Количество созданных броней")
+    items: List[BookingBatchItem] = Field(..., description="Результат по каждой брони в порядке запроса")
+
+
+class BookingOccupancyBucket(ApiModel):
+    start: dt = Field(..., description="Начало интервала")
+    persons: Dict[BookingStatusType, int] = Field(..., description="Количество человек по статусам брони")
+    bookings: Dict[BookingStatusType, int] = Field(..., description="Количество броней по статусам")
+
+
+class BookingOccupancy(ApiModel):
+    bucket: OccupancyBucket = Field(..., description="Размер интервала")
+    buckets: List[BookingOccupancyBucket] = Field(..., description="Интервалы с бронями по возрастанию времени")
+
+
+class BookingOccupancyRebuild(ApiModel):
+    rows: int = Field(..., description="Количество строк пересобранного агрегата")
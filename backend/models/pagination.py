@@ -0,0 +1,10 @@
+from datetime import datetime as dt
+
+from pydantic import UUID4, Field
+
+from backend.models.utils import ApiModel
+
+
+class Cursor(ApiModel):
+    created_at: dt = Field(..., description="Время создания последнего объекта страницы")
+    guid: UUID4 = Field(..., description="Идентификатор последнего объекта страницы")
@@ -0,0 +1,16 @@
+from typing import Optional
+
+from pydantic import ConfigDict, UUID4, Field
+
+from backend.models.user import UserRole
+from backend.models.utils import ApiModel
+
+
+class Principal(ApiModel):
+    user_id: UUID4 = Field(..., description="Идентификатор пользователя")
+    jti: Optional[str] = Field(None, description="Идентификатор токена")
+    exp: Optional[int] = Field(None, description="Время истечения токена (unix time)")
+    role: Optional[UserRole] = Field(None, description="Роль пользователя")
+    is_deleted: bool = Field(False, description="Пользователь удален")
+
+    model_config = ConfigDict(frozen=True)
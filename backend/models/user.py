@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 from pydantic import field_validator, UUID4, EmailStr, Field
@@ -104,5 +104,14 @@ class UserGet(UserSignUp):
     created_at: datetime = Field(..., description="Время создания пользователя в формате RFC-3339")
     updated_at: datetime = Field(..., description="Время последнего обновления пользователя в формате RFC-3339")
 
+class UserAuth(ApiModel):
+    guid: UUID4 = Field(..., description="Идентификатор пользователя")
+    password: Optional[str] = Field(None, description="Хэш пароля")
+    role: UserRole = Field(..., description="Роль пользователя")
+
 class UserGetWithoutPassword(UserBase):
     guid: UUID4 = Field(..., description="Идентификатор пользователя")
+
+class UserList(ApiModel):
+    users: List[UserGetWithoutPassword] = Field(..., description="Список пользователей")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы")
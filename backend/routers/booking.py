@@ -1,6 +1,8 @@
-from typing import Dict, List
+from datetime import datetime
+from typing import Optional
 
 from fastapi import APIRouter, Body, Depends, Path, Query
+from fastapi.responses import StreamingResponse
 from pydantic import UUID4
 from starlette import status
 
@@ -8,6 +10,8 @@ from backend import constants, models
 from backend.middleware.auth import verify_access_token
 from backend.services.booking import BookingService
 from backend.utils.auth import get_user_from_access_token
+from backend.utils.export import MEDIA_TYPES
+from backend.utils.pagination import get_next_cursor
 
 router = APIRouter(dependencies=[Depends(verify_access_token)], prefix="/booking")
 
@@ -36,6 +40,30 @@ async def create_booking(
     return await booking_service.create_booking(requester_id=requester_id, booking=booking)
 
 
+@router.post(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+    summary="Создать несколько броней",
+    response_description="Результат создания по каждой брони",
+    response_model=models.BookingBatchResult,
+    responses={
+        400: models.errors.BAD_REQUEST,
+        401: models.errors.UNAUTHORIZED,
+        403: models.errors.FORBIDDEN,
+        422: models.errors.UNPROCESSABLE_ENTITY,
+        429: models.errors.TOO_MANY_REQUESTS,
+        500: models.errors.INTERNAL_SERVER_ERROR,
+        503: models.errors.SERVICE_UNAVAILABLE,
+    },
+)
+async def create_bookings(
+    batch: models.BookingBatchCreate = Body(..., description=f"Брони, не больше {constants.MAX_BATCH_SIZE} за запрос"),
+    requester_id: UUID4 = Depends(get_user_from_access_token),
+    booking_service: BookingService = Depends(),
+) -> models.BookingBatchResult:
+    return await booking_service.create_bookings(requester_id=requester_id, bookings=batch.bookings)
+
+
 @router.get(
     "/id/{id}",
     status_code=status.HTTP_200_OK,
@@ -65,7 +93,7 @@ async def get_booking(
     status_code=status.HTTP_200_OK,
     summary="Получить информацию о брони",
     response_description="Информация о брони успешно получена",
-    response_model=Dict[str, List[models.BookingGet]],
+    response_model=models.BookingList,
     responses={
         400: models.errors.BAD_REQUEST,
         401: models.errors.UNAUTHORIZED,
@@ -78,12 +106,94 @@ async def get_booking(
 )
 async def get_all_bookings(
     limit: int = Query(constants.MAX_LIMIT, ge=1, le=constants.MAX_LIMIT, description="Ограничение на количество броней"),
-    offset: int = Query(0, ge=0, le=constants.MAX_OFFSET, description="Смещение"),
+    offset: int = Query(0, ge=0, le=constants.MAX_OFFSET, description="Смещение (игнорируется, если передан курсор)"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из next_cursor"),
+    include_archived: bool = Query(False, description="Включить брони, перенесенные в архив"),
     user_id: UUID4 = Depends(get_user_from_access_token),
     booking_service: BookingService = Depends(),
-) -> Dict[str, List[models.BookingGet]]:
-    result = await booking_service.get_all_bookings(user_id=user_id, limit=limit, offset=offset)
-    return {"bookings": result}
+) -> models.BookingList:
+    result = await booking_service.get_all_bookings(user_id=user_id, limit=limit, offset=offset, cursor=cursor,
+                                                    include_archived=include_archived)
+    return {"bookings": result, "next_cursor": get_next_cursor(result, limit)}
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    summary="Выгрузить все брони",
+    response_description="Брони в формате NDJSON или CSV, строки отправляются по мере чтения из БД",
+    response_class=StreamingResponse,
+    responses={
+        400: models.errors.BAD_REQUEST,
+        401: models.errors.UNAUTHORIZED,
+        403: models.errors.FORBIDDEN,
+        422: models.errors.UNPROCESSABLE_ENTITY,
+        429: models.errors.TOO_MANY_REQUESTS,
+        500: models.errors.INTERNAL_SERVER_ERROR,
+        503: models.errors.SERVICE_UNAVAILABLE,
+    },
+)
+async def export_bookings(
+    export_format: models.ExportFormat = Query(models.ExportFormat.NDJSON, description="Формат выгрузки",
+                                               alias="format"),
+    user_id: UUID4 = Depends(get_user_from_access_token),
+    booking_service: BookingService = Depends(),
+) -> StreamingResponse:
+    content = await booking_service.export_bookings(user_id=user_id, export_format=export_format)
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="bookings.{export_format.value}"'},
+    )
+
+
+@router.get(
+    "/occupancy",
+    status_code=status.HTTP_200_OK,
+    summary="Получить занятость по интервалам времени",
+    response_description="Количество броней и человек по статусам успешно получено",
+    response_model=models.BookingOccupancy,
+    responses={
+        400: models.errors.BAD_REQUEST,
+        401: models.errors.UNAUTHORIZED,
+        403: models.errors.FORBIDDEN,
+        422: models.errors.UNPROCESSABLE_ENTITY,
+        429: models.errors.TOO_MANY_REQUESTS,
+        500: models.errors.INTERNAL_SERVER_ERROR,
+        503: models.errors.SERVICE_UNAVAILABLE,
+    },
+)
+async def get_occupancy(
+    start: datetime = Query(..., description="Начало периода (округляется вниз до часа), время с поясом "
+                                             "переводится в UTC", alias="from"),
+    end: datetime = Query(..., description="Конец периода, не включается", alias="to"),
+    bucket: models.OccupancyBucket = Query(models.OccupancyBucket.HOUR, description="Размер интервала"),
+    user_id: UUID4 = Depends(get_user_from_access_token),
+    booking_service: BookingService = Depends(),
+) -> models.BookingOccupancy:
+    return await booking_service.get_occupancy(user_id=user_id, start=start, end=end, bucket=bucket)
+
+
+@router.post(
+    "/occupancy/rebuild",
+    status_code=status.HTTP_200_OK,
+    summary="Пересобрать занятость по всем броням",
+    response_description="Занятость успешно пересобрана",
+    response_model=models.BookingOccupancyRebuild,
+    responses={
+        400: models.errors.BAD_REQUEST,
+        401: models.errors.UNAUTHORIZED,
+        403: models.errors.FORBIDDEN,
+        429: models.errors.TOO_MANY_REQUESTS,
+        500: models.errors.INTERNAL_SERVER_ERROR,
+        503: models.errors.SERVICE_UNAVAILABLE,
+    },
+)
+async def rebuild_occupancy(
+    user_id: UUID4 = Depends(get_user_from_access_token),
+    booking_service: BookingService = Depends(),
+) -> models.BookingOccupancyRebuild:
+    return await booking_service.rebuild_occupancy(user_id=user_id)
+
 
 @router.put(
     "/{id}/status",
@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette import status
+
+import backend.metrics.collectors  # noqa: F401 - регистрация метрик пула, кэшей, хэширования и логов
+from backend.metrics import registry
+from backend.metrics.multiprocess import shared_metrics
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    summary="Метрики всех воркеров в формате Prometheus",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+async def get_metrics() -> PlainTextResponse:
+    text = shared_metrics.render() if shared_metrics else registry.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -8,6 +8,7 @@ from backend import constants, models
 from backend.middleware.auth import verify_access_token
 from backend.services.user import UserService
 from backend.utils.auth import get_user_from_access_token
+from backend.utils.pagination import get_next_cursor, set_next_cursor_header
 
 router = APIRouter(dependencies=[Depends(verify_access_token)], prefix="/user")
 
@@ -123,12 +124,19 @@ async def patch_current_user(
     },
 )
 async def get_user_bookings(
+    response: Response,
     limit: int = Query(default=10, description="Количество забронированных услуг", alias="limit"),
-    offset: int = Query(default=0, description="Смещение", alias="offset"),
+    offset: int = Query(default=0, description="Смещение (игнорируется, если передан курсор)", alias="offset"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    include_archived: bool = Query(False, description="Включить брони, перенесенные в архив"),
     user_id: UUID4 = Depends(get_user_from_access_token),
     user_service: UserService = Depends(),
 ) -> models.UserGet:
-    return await user_service.get_all_bookings_by_id(recipient_id=user_id, user_id=user_id, limit=limit, offset=offset)
+    result = await user_service.get_all_bookings_by_id(recipient_id=user_id, user_id=user_id, limit=limit,
+                                                       offset=offset, cursor=cursor,
+                                                       include_archived=include_archived)
+    set_next_cursor_header(response, get_next_cursor(result, limit))
+    return result
 
 @router.get(
     "/{id}/bookings",
@@ -147,20 +155,27 @@ async def get_user_bookings(
     },
 )
 async def get_user_bookings(
+    response: Response,
     limit: int = Query(default=10, description="Количество забронированных услуг", alias="limit"),
-    offset: int = Query(default=0, description="Смещение", alias="offset"),
+    offset: int = Query(default=0, description="Смещение (игнорируется, если передан курсор)", alias="offset"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    include_archived: bool = Query(False, description="Включить брони, перенесенные в архив"),
     user_id: UUID4 = Path(..., description="Идентификатор пользователя", alias="id"),
     recipient_id: UUID4 = Depends(get_user_from_access_token),
     user_service: UserService = Depends(),
 ) -> models.UserGet:
-    return await user_service.get_all_bookings_by_id(recipient_id=recipient_id, user_id=user_id, limit=limit, offset=offset)
+    result = await user_service.get_all_bookings_by_id(recipient_id=recipient_id, user_id=user_id, limit=limit,
+                                                       offset=offset, cursor=cursor,
+                                                       include_archived=include_archived)
+    set_next_cursor_header(response, get_next_cursor(result, limit))
+    return result
 
 @router.get(
     "/all",
     status_code=status.HTTP_200_OK,
     summary="Получить список пользователей",
     response_description="Список пользователей успешно получен",
-    response_model=Dict[str, List[models.UserGetWithoutPassword]],
+    response_model=models.UserList,
     responses={
         400: models.errors.BAD_REQUEST,
         401: models.errors.UNAUTHORIZED,
@@ -173,19 +188,20 @@ async def get_user_bookings(
 )
 async def get_all_users(
     limit: int = Query(default=10, description="Количество пользователей", alias="limit"),
-    offset: int = Query(default=0, description="Смещение", alias="offset"),
+    offset: int = Query(default=0, description="Смещение (игнорируется, если передан курсор)", alias="offset"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из next_cursor"),
     user_id: UUID4 = Depends(get_user_from_access_token),
     user_service: UserService = Depends(),
-) -> Dict[str, List[models.UserGetWithoutPassword]]:
-    result = await user_service.get_all_users(user_id=user_id, limit=limit, offset=offset)
-    return {"users": result}
+) -> models.UserList:
+    result = await user_service.get_all_users(user_id=user_id, limit=limit, offset=offset, cursor=cursor)
+    return {"users": result, "next_cursor": get_next_cursor(result, limit)}
 
 @router.get(
     "/all/{role}",
     status_code=status.HTTP_200_OK,
     summary="Получить список пользователей с определенной ролью",
     response_description="Список пользователей успешно получен",
-    response_model=Dict[str, List[models.UserGetWithoutPassword]],
+    response_model=models.UserList,
     responses={
         400: models.errors.BAD_REQUEST,
         401: models.errors.UNAUTHORIZED,
@@ -198,13 +214,15 @@ async def get_all_users(
 )
 async def get_all_users(
     limit: int = Query(default=10, description="Количество пользователей", alias="limit"),
-    offset: int = Query(default=0, description="Смещение", alias="offset"),
+    offset: int = Query(default=0, description="Смещение (игнорируется, если передан курсор)", alias="offset"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из next_cursor"),
     role: models.UserRole = Path(description="Роль пользователя", alias="role"),
     user_id: UUID4 = Depends(get_user_from_access_token),
     user_service: UserService = Depends(),
-) -> Dict[str, List[models.UserGetWithoutPassword]]:
-    result = await user_service.get_all_users_with_role(user_id=user_id, limit=limit, offset=offset, role=role)
-    return {"users": result}
+) -> models.UserList:
+    result = await user_service.get_all_users_with_role(user_id=user_id, limit=limit, offset=offset, role=role,
+                                                        cursor=cursor)
+    return {"users": result, "next_cursor": get_next_cursor(result, limit)}
 
 @router.get(
     "/{id}",
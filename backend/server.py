@@ -0,0 +1,74 @@
+from typing import Any, Dict
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.util import import_app
+from uvicorn.workers import UvicornWorker
+
+from backend.config import config
+
+APP = "backend.main:app"
+
+
+class Worker(UvicornWorker):
+    """Воркер uvicorn с циклом событий и HTTP-парсером из конфигурации"""
+
+    CONFIG_KWARGS = {"loop": config.BACKEND_LOOP, "http": config.BACKEND_HTTP}
+
+
+def post_fork(server, worker) -> None:
+    """Соединения пула, открытые в мастер-процессе при preload, не должны использоваться воркерами"""
+
+    from backend.database.connection import engine, replicas
+
+    for db_engine in [engine, *replicas.engines]:
+        db_engine.sync_engine.dispose(close=False)
+
+
+def on_starting(server) -> None:
+    """Снимки метрик прошлого запуска не должны попасть в сумму"""
+
+    from backend.metrics.multiprocess import shared_metrics
+
+    if config.METRICS_ENABLED and shared_metrics:
+        shared_metrics.clear()
+
+
+def child_exit(server, worker) -> None:
+    """Счетчики завершившегося воркера остаются в сумме метрик"""
+
+    from backend.metrics.multiprocess import shared_metrics
+
+    if config.METRICS_ENABLED and shared_metrics:
+        shared_metrics.mark_dead(worker.pid)
+
+
+def gunicorn_options() -> Dict[str, Any]:
+    """Настройки gunicorn из конфигурации"""
+
+    return {
+        "bind": f"{config.BACKEND_HOST}:{config.BACKEND_PORT}",
+        "workers": config.BACKEND_WORKERS,
+        "worker_class": f"{__name__}.Worker",
+        "preload_app": config.BACKEND_PRELOAD,
+        "graceful_timeout": config.BACKEND_GRACEFUL_TIMEOUT,
+        "keepalive": config.BACKEND_KEEPALIVE,
+        "post_fork": post_fork,
+        "on_starting": on_starting,
+        "child_exit": child_exit,
+    }
+
+
+class Application(BaseApplication):
+    """Gunicorn с несколькими воркерами uvicorn"""
+
+    def __init__(self, app: str = APP, options: Dict[str, Any] = None):
+        self._app = app
+        self._options = options or gunicorn_options()
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self._options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return import_app(self._app)
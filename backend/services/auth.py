@@ -1,13 +1,13 @@
-from typing import Union
+from typing import Optional, Union
 
 from fastapi import Depends, HTTPException, status
 from backend.logging import log
 from pydantic import UUID4
-from passlib.hash import bcrypt
 
 from backend import models
 from backend.database.facade import DBFacadeInterface, get_db_facade
 from backend.services.token import TokenService
+from backend.utils.password import password_hasher
 
 
 class AuthService:
@@ -20,10 +20,12 @@ class AuthService:
 
         log.debug(f"Регистрация нового пользователя: {user.phone or user.email}")
 
-        if not (exc := await self._check_user_exists(user=user)):
-            raise exc
+        if await self._get_user_auth(user=user):
+            log.warning(f"Пользователь {user.phone or user.email} уже существует")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail="Пользователь с таким номером телефона или почтой уже существует")
 
-        hashed_password = self._crypt_password(password=user.password)
+        hashed_password = await self._crypt_password(password=user.password)
         user.password = hashed_password
 
         new_user = await self._db_facade.signup(user=user)
@@ -40,14 +42,18 @@ class AuthService:
 
         log.debug(f"Авторизация Пользователя {user.email or user.phone}")
 
-        if await self._check_user_exists(user=user):
+        db_user = await self._get_user_auth(user=user)
+        if not db_user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный логин или пароль")
 
-        db_user = await self._db_facade.get_user_by_phone(user.phone) or \
-                  await self._db_facade.get_user_by_email(user.email)
-
         await self._check_user_password(user=user, db_user=db_user)
 
+        if password_hasher.needs_rehash(db_user.password):
+            log.debug(f"Пользователь {db_user.guid}: пересчет хэша пароля")
+            await self._db_facade.change_user_password(guid=db_user.guid,
+                                                       password=await self._crypt_password(password=user.password))
+            await self._db_facade.commit()
+
         token = await self._token_service.generate_auth_token(user=db_user)
         log.debug(f"Пользователь {user.email or user.phone} успешно авторизован")
 
@@ -58,13 +64,13 @@ class AuthService:
 
         log.debug(f"Получение пользователя без пароля: {user.email or user.phone}")
 
-        if await self._check_user_exists(user=user):
+        db_user = await self._get_user_auth(user=user)
+        if not db_user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден")
 
         log.debug(f"Пользователь без пароля {user.email or user.phone} успешно получен")
 
-        return await self._db_facade.get_user_by_phone(user.phone) \
-            or await self._db_facade.get_user_by_email(user.email)
+        return await self._db_facade.get_user_by_id(guid=db_user.guid)
 
     async def change_password(self, user: models.UserChangePassword) -> models.UserGet:
         """Изменить пароль пользователя"""
@@ -75,8 +81,8 @@ class AuthService:
         if not db_user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден")
 
-        db_user.password = self._crypt_password(password=user.password)
-
+        await self._db_facade.change_user_password(guid=user.guid,
+                                                   password=await self._crypt_password(password=user.password))
         await self._db_facade.commit()
 
         token = await self._token_service.generate_auth_token(user=db_user)
@@ -86,30 +92,25 @@ class AuthService:
         return token
 
     @staticmethod
-    def _crypt_password(password: str) -> str:
+    async def _crypt_password(password: str) -> str:
         """Шифрование пароля"""
 
-        return bcrypt.hash(password)
+        return await password_hasher.hash(password)
 
     @staticmethod
-    async def _check_user_password(user: models.UserSignIn, db_user: models.UserGet) -> None:
+    async def _check_user_password(user: models.UserSignIn, db_user: models.UserAuth) -> None:
         """Проверка правильности пароля пользователя"""
 
-        if not bcrypt.verify(user.password, db_user.password):
+        if not db_user.password or not await password_hasher.verify(user.password, db_user.password):
             log.warning(f"Попытка входа пользователя {user.email or user.phone} c неверным паролем")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный логин или пароль")
 
-    async def _check_user_exists(self, user: Union[models.UserSignIn, models.UserSignUp, models.UserForgotPassword]) -> HTTPException:
-        """Проверка пользователя на существование"""
-
-        if user.phone and not await self._db_facade.get_user_by_phone(user.phone):
-            log.warning(f"Пользователь с номером телефона {user.phone} не существует")
-            return HTTPException(status_code=status.HTTP_409_CONFLICT,
-                                detail="Пользователь с таким номером телефона не существует")
+    async def _get_user_auth(self, user: Union[models.UserSignIn, models.UserSignUp, models.UserForgotPassword]
+                             ) -> Optional[models.UserAuth]:
+        """Получение данных для входа по номеру телефона или почте одним запросом"""
 
-        elif not await self._db_facade.get_user_by_email(user.email):
-            log.warning(f"Пользователь с email {user.email} не существует")
-            return HTTPException(status_code=status.HTTP_409_CONFLICT,
-                                detail="Пользователь с такой почтой уже существует")
+        db_user = await self._db_facade.get_user_auth(phone=user.phone, email=user.email)
+        if not db_user:
+            log.warning(f"Пользователь {user.phone or user.email} не существует")
 
-        return None
\ No newline at end of file
+        return db_user
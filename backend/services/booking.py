@@ -1,14 +1,32 @@
-import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional
 
 from fastapi import Depends, HTTPException, status
 from backend.logging import log
 from pydantic import UUID4
 
-from backend import models
+from backend import constants, models
+from backend.config import config
+from backend.database.dao import SeatsUnavailable
 from backend.database.facade import DBFacadeInterface, get_db_facade
+from backend.utils.export import encode_export
+from backend.utils.pagination import decode_cursor
+from backend.utils.time import naive_utc
 from backend.utils.user import check_user_existence_and_access
 
+SEATS_UNAVAILABLE = "Нет свободных мест на это время"
+
+OCCUPANCY_BUCKETS = {
+    models.OccupancyBucket.HOUR: timedelta(hours=1),
+    models.OccupancyBucket.DAY: timedelta(days=1),
+    models.OccupancyBucket.WEEK: timedelta(weeks=1),
+}
+
+
+def _seats_unavailable(e: SeatsUnavailable) -> HTTPException:
+    log.debug(f"Нет свободных мест на {e.datetime}")
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=SEATS_UNAVAILABLE)
+
 
 class BookingService:
     def __init__(self, db_facade: DBFacadeInterface = Depends(get_db_facade)):
@@ -19,13 +37,45 @@ class BookingService:
 
         log.debug(f"Пользователь {requester_id}: запрос на создание брони")
 
-        requester = await self._db_facade.get_user_by_id(guid=requester_id)
+        requester = await self._db_facade.get_principal(guid=requester_id)
         await check_user_existence_and_access(user_id=requester_id, user=requester, roles=(models.UserRole.WORKER,
                                                                 models.UserRole.ADMIN))
         
-        user = await self._db_facade.get_user_by_phone(phone=booking.phone)
-        if not user:
-            new_user = models.UserSignUp(
+        # Один INSERT ... ON CONFLICT: одновременные брони на новый номер не конфликтуют на users.phone
+        user_id = await self._db_facade.upsert_user_by_phone(user=models.UserSignUp(
+            first_name=booking.first_name,
+            middle_name=booking.middle_name,
+            last_name=booking.last_name,
+            phone=booking.phone,
+            role=models.UserRole.USER,
+            password=None
+        ))
+
+        try:
+            db_booking = await self._db_facade.create_booking(requester_id=requester_id, user_id=user_id, booking=booking)
+        except SeatsUnavailable as e:
+            raise _seats_unavailable(e) from e
+        await self._db_facade.commit()
+
+        log.debug(f"Пользователь {requester_id}: бронь успешно создана")
+
+        return db_booking
+
+    async def create_bookings(self, requester_id: UUID4, bookings: List[models.BookingCreate]) -> models.BookingBatchResult:
+        """Создать несколько броней"""
+
+        log.debug(f"Пользователь {requester_id}: запрос на создание {len(bookings)} броней")
+
+        requester = await self._db_facade.get_principal(guid=requester_id)
+        await check_user_existence_and_access(user_id=requester_id, user=requester, roles=(models.UserRole.WORKER,
+                                                                models.UserRole.ADMIN))
+
+        # Места занимаются до создания клиентов: для отклоненных броней клиенты не создаются
+        reserved = await self._db_facade.reserve_seats(bookings=bookings)
+        accepted = [booking for booking, ok in zip(bookings, reserved) if ok]
+
+        user_ids = await self._db_facade.get_or_create_users_by_phones(users=[
+            models.UserSignUp(
                 first_name=booking.first_name,
                 middle_name=booking.middle_name,
                 last_name=booking.last_name,
@@ -33,39 +83,34 @@ class BookingService:
                 role=models.UserRole.USER,
                 password=None
             )
-            user = await self._db_facade.signup(user=new_user)
-        
-        # service = await self._db_facade.get_service_by_id(guid=booking.service_guid)
-        # if not service:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_404_NOT_FOUND,
-        #         detail="Услуга не найдена",
-        #     )
-        # if service.datetime < datetime.datetime.now():
-        #     raise HTTPException(
-        #         status_code=status.HTTP_409_CONFLICT,
-        #         detail="Услуга уже прошла",
-        #     )
-        # cur_number_persons = await self._db_facade.get_cur_number_persons(service_id=booking.service_guid)
-        # if (booking.number_persons + cur_number_persons) > service.max_number_persons:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_409_CONFLICT,
-        #         detail=f"Нет свободных мест. В текущий момент уже забронировано мест: {str(cur_number_persons)}",
-        #     )
-
-        db_booking = await self._db_facade.create_booking(requester_id=requester_id, user_id=user.guid, booking=booking)
+            for booking in accepted
+        ]) if accepted else {}
+
+        db_bookings = await self._db_facade.create_bookings(
+            requester_id=requester_id,
+            bookings=[(user_ids.get(booking.phone), booking) for booking in bookings],
+            reserved=reserved,
+        )
         await self._db_facade.commit()
 
-        log.debug(f"Пользователь {requester_id}: бронь успешно создана")
+        created = sum(db_booking is not None for db_booking in db_bookings)
+        log.debug(f"Пользователь {requester_id}: создано броней: {created} из {len(db_bookings)}")
 
-        return db_booking
+        return models.BookingBatchResult(
+            created=created,
+            items=[
+                models.BookingBatchItem(index=index, booking=db_booking) if db_booking
+                else models.BookingBatchItem(index=index, error=SEATS_UNAVAILABLE)
+                for index, db_booking in enumerate(db_bookings)
+            ],
+        )
 
     async def get_booking_by_id(self, user_id: UUID4, booking_id: UUID4) -> models.BookingGet:
         """Получить услугу по id"""
 
         log.debug(f"Пользователь {user_id}: запрос на получение услуги по id: {booking_id}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.USER,
                                                                 models.UserRole.WORKER,
                                                                 models.UserRole.ADMIN))
@@ -76,32 +121,92 @@ class BookingService:
 
         return db_service
     
-    async def get_all_bookings(self, user_id: UUID4, limit: int, offset: int) -> List[models.BookingGet]:
+    async def get_all_bookings(self, user_id: UUID4, limit: int, offset: int, cursor: Optional[str] = None,
+                               include_archived: bool = False) -> List[models.BookingGet]:
         """Получить все брони"""
 
         log.debug(f"Пользователь {user_id}: запрос на получение всех броней")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER,
                                                                 models.UserRole.ADMIN))
 
-        db_bookings = await self._db_facade.get_all_bookings(limit=limit, offset=offset)
+        db_bookings = await self._db_facade.get_all_bookings(limit=limit, offset=offset, after=decode_cursor(cursor),
+                                                             include_archived=include_archived)
 
         log.debug(f"Пользователь {user_id}: все брони успешно получены")
 
         return db_bookings
 
+    async def export_bookings(self, user_id: UUID4, export_format: models.ExportFormat) -> AsyncIterator[bytes]:
+        """Выгрузить все брони. Права проверяются до начала ответа, строки читаются по мере отправки"""
+
+        log.debug(f"Пользователь {user_id}: запрос на выгрузку броней в {export_format.value}")
+
+        user = await self._db_facade.get_principal(guid=user_id)
+        await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER,
+                                                                models.UserRole.ADMIN))
+
+        batches = self._db_facade.stream_bookings(batch_size=config.EXPORT_BATCH_SIZE)
+        return encode_export(batches, models.BookingGet, export_format)
+
+    async def get_occupancy(self, user_id: UUID4, start: datetime, end: datetime,
+                            bucket: models.OccupancyBucket) -> models.BookingOccupancy:
+        """Получить количество броней и человек по интервалам времени"""
+
+        log.debug(f"Пользователь {user_id}: запрос на получение занятости с {start} по {end}")
+
+        user = await self._db_facade.get_principal(guid=user_id)
+        await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER,
+                                                                models.UserRole.ADMIN))
+
+        start, end = naive_utc(start), naive_utc(end)
+        if end <= start:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Конец периода должен быть позже начала"
+            )
+        if (end - start) / OCCUPANCY_BUCKETS[bucket] > constants.MAX_OCCUPANCY_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Период больше {constants.MAX_OCCUPANCY_BUCKETS} интервалов, увеличьте размер интервала"
+            )
+
+        buckets = await self._db_facade.get_booking_occupancy(start=start, end=end, bucket=bucket)
+
+        log.debug(f"Пользователь {user_id}: занятость успешно получена")
+
+        return models.BookingOccupancy(bucket=bucket, buckets=buckets)
+
+    async def rebuild_occupancy(self, user_id: UUID4) -> models.BookingOccupancyRebuild:
+        """Пересобрать агрегат занятости по всем броням"""
+
+        log.debug(f"Пользователь {user_id}: запрос на пересборку занятости")
+
+        user = await self._db_facade.get_principal(guid=user_id)
+        await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.ADMIN,))
+
+        rows = await self._db_facade.rebuild_booking_occupancy()
+        await self._db_facade.commit()
+
+        log.debug(f"Пользователь {user_id}: занятость пересобрана, строк: {rows}")
+
+        return models.BookingOccupancyRebuild(rows=rows)
+
     async def change_booking_status(self, user_id: UUID4, booking_id: UUID4, status: models.BookingStatusUpdate) -> models.BookingGet:
         """Изменить статус брони"""
 
         log.debug(f"Пользователь {user_id}: запрос на изменение статуса брони по id: {booking_id}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER, models.UserRole.ADMIN))
 
-        await self._check_booking_exists_by_id(user_id=user_id, booking_id=booking_id)
-
-        db_booking = await self._db_facade.change_booking_status(guid=booking_id, status=status.status)
+        try:
+            db_booking = await self._db_facade.change_booking_status(guid=booking_id, status=status.status)
+        except SeatsUnavailable as e:
+            raise _seats_unavailable(e) from e
+        if not db_booking:
+            raise HTTPException(status_code=404, detail="Бронь не найдена")
         await self._db_facade.commit()
 
         log.debug(f"Пользователь {user_id}: статус брони {booking_id} успешно изменен")
@@ -113,16 +218,18 @@ class BookingService:
 
         log.debug(f"Пользователь {user_id}: запрос на изменение брони по id: {booking_id}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER, models.UserRole.ADMIN))
 
-        if not await self._check_booking_exists_by_id(user_id=user_id, booking_id=booking_id):
+        try:
+            db_booking = await self._db_facade.change_booking(guid=booking_id, booking=booking)
+        except SeatsUnavailable as e:
+            raise _seats_unavailable(e) from e
+        if not db_booking:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Бронь не найдена"
             )
-
-        db_booking = await self._db_facade.change_booking(guid=booking_id, booking=booking)
         await self._db_facade.commit()
 
         log.debug(f"Пользователь {user_id}: бронь успешно изменена")
@@ -134,16 +241,14 @@ class BookingService:
 
         log.debug(f"Пользователь {user_id}: запрос на удаление брони по id: {booking_id}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER, models.UserRole.ADMIN))
 
-        if not await self._check_booking_exists_by_id(user_id=user_id, booking_id=booking_id):
+        if not await self._db_facade.delete_booking(guid=booking_id):
             raise  HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Бронь не найдена"
             )
-
-        await self._db_facade.delete_booking(guid=booking_id)
         await self._db_facade.commit()
 
         log.debug(f"Пользователь {user_id}: бронь успешно удалена")
@@ -159,13 +264,3 @@ class BookingService:
 
     #     log.debug(f"Пользователь {user_id}: бронь не существует")
     #     return False
-
-    async def _check_booking_exists_by_id(self, user_id: UUID4, booking_id: UUID4) -> bool:
-        db_booking = await self._db_facade.get_booking_by_id(guid=booking_id)
-
-        if db_booking:
-            log.debug(f"Пользователь {user_id}: бронь c id {booking_id} уже существует")
-            return True
-
-        log.debug(f"Пользователь {user_id}: бронь с id {booking_id} не существует")
-        return False
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import Depends, HTTPException
 from backend.logging import log
@@ -6,6 +6,7 @@ from pydantic import UUID4
 
 from backend import models
 from backend.database.facade import DBFacadeInterface, get_db_facade
+from backend.utils.pagination import decode_cursor
 from backend.utils.user import check_user_existence_and_access
 
 
@@ -18,7 +19,7 @@ class UserService:
 
         log.debug(f"Пользователь {requester_id}: запрос на создание пользователя: {user}")
 
-        requester = await self._db_facade.get_user_by_id(guid=requester_id)
+        requester = await self._db_facade.get_principal(guid=requester_id)
         await check_user_existence_and_access(user_id=requester_id, user=requester, roles=(models.UserRole.ADMIN))
 
         db_user = await self._db_facade.signup(user=user)
@@ -28,15 +29,16 @@ class UserService:
 
         return db_user
 
-    async def get_all_users(self, user_id: UUID4, limit: int, offset: int) -> List[models.UserGet]:
+    async def get_all_users(self, user_id: UUID4, limit: int, offset: int,
+                            cursor: Optional[str] = None) -> List[models.UserGet]:
         """Получить список пользователей"""
 
         log.debug(f"Пользователь {user_id}: запрос на получение всех пользователей: {limit}, {offset}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER, models.UserRole.ADMIN))
 
-        db_users = await self._db_facade.get_all_users(limit=limit, offset=offset)
+        db_users = await self._db_facade.get_all_users(limit=limit, offset=offset, after=decode_cursor(cursor))
 
         log.debug(f"Пользователь {user_id}: успешно получены пользователи")
 
@@ -47,7 +49,7 @@ class UserService:
 
         log.debug(f"Пользователь {user_id}: запрос на получение пользователя по id: {guid}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER, models.UserRole.ADMIN))
 
         db_user = await self._db_facade.get_user_by_id(guid=guid)
@@ -62,7 +64,7 @@ class UserService:
 
         log.debug(f"Пользователь {user_id}: запрос на получение пользователя по email: {email}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.WORKER, models.UserRole.ADMIN))
 
         db_user = await self._db_facade.get_user_by_email(email=email)
@@ -71,31 +73,37 @@ class UserService:
 
         return db_user
 
-    async def get_all_users_with_role(self, user_id: UUID4, limit: int, offset: int, role: models.UserRole) -> List[models.UserGet]:
+    async def get_all_users_with_role(self, user_id: UUID4, limit: int, offset: int, role: models.UserRole,
+                                      cursor: Optional[str] = None) -> List[models.UserGet]:
         """Получить список пользователей с определенным ролем"""
 
         log.debug(f"Пользователь {user_id}: запрос на получение всех пользователей с определенным ролем: {limit}, {offset}, {role}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
+        user = await self._db_facade.get_principal(guid=user_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=models.UserRole.ADMIN)
 
-        db_users = await self._db_facade.get_all_users_with_role(limit=limit, offset=offset, role=role)
+        db_users = await self._db_facade.get_all_users_with_role(limit=limit, offset=offset, role=role,
+                                                                 after=decode_cursor(cursor))
 
         log.debug(f"Пользователь {user_id}: успешно получены пользователи с ролью {role}")
 
         return db_users
 
-    async def get_all_bookings_by_id(self, recipient_id: UUID4, user_id: UUID4, limit: int, offset: int) -> List[models.BookingGet]:
+    async def get_all_bookings_by_id(self, recipient_id: UUID4, user_id: UUID4, limit: int, offset: int,
+                                     cursor: Optional[str] = None,
+                                     include_archived: bool = False) -> List[models.BookingGet]:
         """Получить список брони по id пользователя"""
 
         log.debug(f"Пользователь {recipient_id}: запрос на получение всех бронирований пользователя {user_id}: {limit}, {offset}")
 
-        user = await self._db_facade.get_user_by_id(guid=recipient_id)
+        user = await self._db_facade.get_principal(guid=recipient_id)
         await check_user_existence_and_access(user_id=user_id, user=user, roles=(models.UserRole.ADMIN,
                                                                 models.UserRole.WORKER,
                                                                 models.UserRole.USER))
 
-        db_bookings = await self._db_facade.get_all_bookings_by_user_id(user_id=user_id, limit=limit, offset=offset)
+        db_bookings = await self._db_facade.get_all_bookings_by_user_id(user_id=user_id, limit=limit, offset=offset,
+                                                                        after=decode_cursor(cursor),
+                                                                        include_archived=include_archived)
 
         log.debug(f"Пользователь {recipient_id}: успешно получены бронирования")
 
@@ -106,10 +114,12 @@ class UserService:
 
         log.debug(f"Пользователь {user_id}: запрос на изменение пользователя по id: {guid}")
 
-        user = await self._db_facade.get_user_by_id(guid=user_id)
-        await check_user_existence_and_access(user_id=user_id, user=user, roles=models.UserRole.ADMIN)
+        requester = await self._db_facade.get_principal(guid=user_id)
+        await check_user_existence_and_access(user_id=user_id, user=requester, roles=models.UserRole.ADMIN)
 
-        db_user = await self._db_facade.change_user(guid=user_id, user=user)
+        db_user = await self._db_facade.change_user(guid=guid, user=user)
+        if not db_user:
+            raise HTTPException(status_code=404, detail="Пользователь не найден")
         await self._db_facade.commit()
 
         log.debug(f"Пользователь {guid} успешно изменен")
@@ -122,7 +132,7 @@ class UserService:
         log.debug(f"Пользователь {user_id}: запрос на удаление пользователя по id: {guid}")
 
         if user_id != guid:
-            user = await self._db_facade.get_user_by_id(guid=user_id)
+            user = await self._db_facade.get_principal(guid=user_id)
             await check_user_existence_and_access(user_id=user_id, user=user, roles=models.UserRole.ADMIN)
 
             await self._db_facade.delete_user(guid=guid)
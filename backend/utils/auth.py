@@ -1,16 +1,9 @@
-from fastapi import Request
+from fastapi import Depends
 from pydantic import UUID4
-from jose import jwt
 
-from backend.config import config
+from backend import models
+from backend.middleware.auth import verify_access_token
 
 
-def get_user_from_access_token(request: Request) -> UUID4:
-    access_token = request.headers["Authorization"].split()[1]
-    info = jwt.decode(
-        access_token,
-        config.JWT_SECRET,
-        algorithms=[config.JWT_ALGORITHM],
-        options={"verify_aud": False},
-    )
-    return info["sub"]
+def get_user_from_access_token(principal: models.Principal = Depends(verify_access_token)) -> UUID4:
+    return principal.user_id
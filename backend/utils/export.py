@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Iterable, List, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from backend import models
+
+MEDIA_TYPES = {
+    models.ExportFormat.NDJSON: "application/x-ndjson",
+    models.ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _encode_ndjson(items: List[dict]) -> str:
+    return "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+
+
+def _encode_csv(rows: Iterable[Iterable[Any]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def encode_export(batches: AsyncIterator[List[BaseModel]], model: Type[BaseModel],
+                        export_format: models.ExportFormat) -> AsyncIterator[bytes]:
+    """Кодирование пачек моделей в NDJSON или CSV, в памяти только текущая пачка.
+    Значения сериализуются так же, как в ответах API"""
+
+    adapter = TypeAdapter(List[model])
+
+    if export_format == models.ExportFormat.CSV:
+        yield _encode_csv([model.model_fields]).encode()
+
+    async for batch in batches:
+        items = adapter.dump_python(batch, mode="json")
+        if export_format == models.ExportFormat.CSV:
+            yield _encode_csv(item.values() for item in items).encode()
+        else:
+            yield _encode_ndjson(items).encode()
@@ -0,0 +1,42 @@
+import base64
+import binascii
+from typing import Optional, Sequence, Union
+
+from fastapi import HTTPException, Response, status
+from pydantic import ValidationError
+
+from backend import models
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(item: Union[models.BookingGet, models.UserGet]) -> str:
+    """Курсор, указывающий на позицию сразу после `item`"""
+
+    cursor = models.Cursor(created_at=item.created_at, guid=item.guid)
+    return base64.urlsafe_b64encode(cursor.model_dump_json().encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[models.Cursor]:
+    """Разбор курсора, полученного от клиента"""
+
+    if not cursor:
+        return None
+
+    try:
+        return models.Cursor.model_validate_json(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, ValidationError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор") from e
+
+
+def get_next_cursor(items: Sequence[Union[models.BookingGet, models.UserGet]], limit: int) -> Optional[str]:
+    """Курсор следующей страницы или None, если страница последняя"""
+
+    return encode_cursor(items[-1]) if items and len(items) >= limit else None
+
+
+def set_next_cursor_header(response: Response, cursor: Optional[str]) -> None:
+    """Курсор следующей страницы для эндпоинтов, которые возвращают список без обертки"""
+
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
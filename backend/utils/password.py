@@ -0,0 +1,91 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from passlib.hash import bcrypt
+
+from backend.config import config
+from backend.metrics import password_hash_seconds, password_hash_wait_seconds
+
+T = TypeVar("T")
+
+
+class PasswordHasherMetrics:
+    """Счетчики очереди хэширования паролей"""
+
+    def __init__(self):
+        self.calls = 0
+        self.running = 0
+        self.waiting = 0
+        self.waiting_max = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def reset(self) -> None:
+        """Сброс счетчиков"""
+
+        self.__init__()
+
+
+class PasswordHasher:
+    """Хэширование и проверка паролей bcrypt в пуле потоков.
+
+    bcrypt отпускает GIL, поэтому хэширование в потоках не блокирует event loop.
+    Одновременно выполняется не больше `workers` операций, остальные ждут в очереди.
+    """
+
+    def __init__(self, rounds: int, workers: int):
+        self._bcrypt = bcrypt.using(rounds=rounds)
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.metrics = PasswordHasherMetrics()
+
+    async def hash(self, password: str) -> str:
+        """Хэширование пароля"""
+
+        return await self._run("hash", self._bcrypt.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Проверка пароля"""
+
+        return await self._run("verify", self._bcrypt.verify, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Хэш создан с другой стоимостью и должен быть пересчитан"""
+
+        return self._bcrypt.needs_update(hashed)
+
+    async def _run(self, operation: str, func: Callable[..., T], *args) -> T:
+        if self._executor is None:
+            # Пул и семафор создаются в воркере при первом вызове, а не в мастер-процессе до fork
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="password")
+            self._semaphore = asyncio.Semaphore(self._workers)
+
+        metrics = self.metrics
+        metrics.calls += 1
+        metrics.waiting += 1
+        metrics.waiting_max = max(metrics.waiting_max, metrics.waiting)
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            metrics.waiting -= 1
+
+        waited = time.perf_counter() - started
+        metrics.wait_seconds_total += waited
+        metrics.wait_seconds_max = max(metrics.wait_seconds_max, waited)
+        password_hash_wait_seconds.observe(waited)
+        metrics.running += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            password_hash_seconds.observe(time.perf_counter() - started, operation)
+            metrics.running -= 1
+            self._semaphore.release()
+
+
+password_hasher = PasswordHasher(rounds=config.BCRYPT_ROUNDS, workers=config.PASSWORD_HASH_WORKERS)
@@ -0,0 +1,9 @@
+from datetime import datetime, timezone
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Время без часового пояса, как в колонках броней. Время с поясом переводится в UTC"""
+
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,13 +1,14 @@
 from fastapi import HTTPException, status
-from typing import  Tuple
+from typing import  Optional, Tuple
 from pydantic import UUID4
 
 from backend import models
 from backend.logging import log
 
 
-async def check_user_existence_and_access(user_id: UUID4, user: models.UserGet, roles: Tuple[models.UserRole, ...]) -> None:
-    if not user:
+async def check_user_existence_and_access(user_id: UUID4, user: Optional[models.Principal],
+                                          roles: Tuple[models.UserRole, ...]) -> None:
+    if not user or user.is_deleted:
         log.warning(f"Попытка получения пользователя с несуществующим id: {user_id}")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -15,8 +16,8 @@ async def check_user_existence_and_access(user_id: UUID4, user: models.UserGet,
         )
 
     if user.role not in roles:
-        log.warning(f"Пользователь {user.guid}: недостаточно прав для выполнения этого действия")
+        log.warning(f"Пользователь {user.user_id}: недостаточно прав для выполнения этого действия")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Пользователь не имеет прав на выполнение этого действия",
-        )
\ No newline at end of file
+            detail="Пользователь не имеет прав на выполнение этого действия",
+        )
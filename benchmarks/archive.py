@@ -0,0 +1,115 @@
+"""Архивация старых броней пачками (backend.maintenance.Archiver)
+
+Клиент получает `--bookings` броней в 1990 году и столько же в 2034. Архивация до 1991 года должна
+перенести в bookings_archive все старые брони и не тронуть новые. Список броней клиента без
+include_archived должен содержать только новые брони, с include_archived - все, а агрегат занятости
+за 1990 год после пересборки должен остаться прежним. Выводится скорость переноса в строках в секунду.
+Созданные данные удаляются в конце. Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.archive [--bookings 10000] [--batch-size 1000] [--load-factor 0]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from backend.maintenance import Archiver
+from benchmarks.seed import insert_chunked, make_users
+
+OLD_START = datetime(1990, 1, 1)
+NEW_START = datetime(2034, 1, 1)
+ARCHIVE_BEFORE = datetime(1991, 1, 1)
+
+
+async def main(count: int, batch_size: int, load_factor: float) -> int:
+    rng = random.Random()
+    worker = make_users(rng, 1, models.UserRole.WORKER, phone_prefix="+7 903")[0]
+    customer = make_users(rng, 1, models.UserRole.USER, phone_prefix="+7 904")[0]
+    times = [start + timedelta(minutes=i) for start in (OLD_START, NEW_START) for i in range(count)]
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, [worker, customer])
+        # Телефон в BookingCreate не используется: id клиента передается явно
+        for first in range(0, len(times), 1000):
+            await BookingDAO(session).create_many(requester_id=worker["guid"], bookings=[
+                (customer["guid"], models.BookingCreate(number_persons=1, status=models.BookingStatusType.PENDING,
+                                                        datetime=at, first_name="Archive", phone="+7 916 000-00-00"))
+                for at in times[first:first + 1000]
+            ])
+        await session.commit()
+
+    async def occupancy() -> tuple:
+        async with async_session() as session:
+            return tuple((await session.execute(
+                select(func.coalesce(func.sum(tables.BookingOccupancy.persons), 0),
+                       func.coalesce(func.sum(tables.BookingOccupancy.bookings), 0))
+                .where(tables.BookingOccupancy.hour >= OLD_START, tables.BookingOccupancy.hour < ARCHIVE_BEFORE)
+            )).one())
+
+    async def customer_bookings(include_archived: bool) -> int:
+        async with async_session() as session:
+            return len(await BookingDAO(session).get_all_by_user_id(
+                user_id=customer["guid"], limit=len(times) + 1, offset=0, include_archived=include_archived))
+
+    try:
+        occupancy_before = await occupancy()
+
+        started = time.perf_counter()
+        moved = await Archiver(retention=timedelta(0), batch_size=batch_size, load_factor=load_factor,
+                               max_replication_lag=float("inf")).archive(before=ARCHIVE_BEFORE)
+        archive_seconds = time.perf_counter() - started
+
+        async with async_session() as session:
+            live = (await session.execute(select(func.count()).select_from(tables.Booking)
+                                          .where(tables.Booking.user_guid == customer["guid"]))).scalar_one()
+            archived = (await session.execute(select(func.count()).select_from(tables.BookingArchive)
+                                              .where(tables.BookingArchive.user_guid == customer["guid"]))).scalar_one()
+        without_archive = await customer_bookings(include_archived=False)
+        with_archive = await customer_bookings(include_archived=True)
+
+        async with async_session() as session:
+            await BookingDAO(session).rebuild_occupancy()
+            await session.commit()
+        occupancy_after = await occupancy()
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(tables.BookingArchive)
+                                  .where(tables.BookingArchive.user_guid == customer["guid"]))
+            await BookingDAO(session).delete_where(tables.Booking.user_guid == customer["guid"])
+            await session.execute(delete(tables.User).where(tables.User.guid.in_([worker["guid"], customer["guid"]])))
+            await session.execute(delete(tables.BookingSlot).where(tables.BookingSlot.datetime.in_(times)))
+            await session.commit()
+            await BookingDAO(session).rebuild_occupancy()
+            await session.commit()
+
+    checks = {
+        f"{count} old bookings archived": archived == count,
+        f"{count} new bookings kept": live == count,
+        "list without archive": without_archive == count,
+        "list with archive": with_archive == 2 * count,
+        "occupancy unchanged after rebuild": occupancy_after == occupancy_before,
+    }
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+    print(f"archive {moved / archive_seconds:>8.0f} rows/s ({moved} rows, batch {batch_size}, "
+          f"load factor {load_factor})")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--load-factor", type=float, default=0.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.bookings, args.batch_size, args.load_factor)))
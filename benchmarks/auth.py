@@ -0,0 +1,42 @@
+"""Сравнение проверки JWT: двойной jwt.decode на запрос против однократной проверки с кэшем
+
+Запуск: python -m benchmarks.auth
+"""
+import asyncio
+import uuid
+
+from jose import jwt
+
+from backend import models
+from backend.config import config
+from backend.middleware.auth import decode_access_token, token_cache
+from backend.services.token import TokenService
+from benchmarks.utils import ops_per_second
+
+
+def _decode(token: str) -> dict:
+    return jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM], options={"verify_aud": False})
+
+
+def main() -> None:
+    user = models.UserGetWithoutPassword(guid=uuid.uuid4(), first_name=None, last_name=None,
+                                         phone="+7 999 000-00-00", role=models.UserRole.USER)
+    token = asyncio.run(TokenService().generate_auth_token(user=user)).access_token
+
+    def before():
+        _decode(token)
+        _decode(token)
+
+    def after_cold():
+        token_cache.clear()
+        decode_access_token(token)
+
+    def after_warm():
+        decode_access_token(token)
+
+    for name, func in (("before (2x decode)", before), ("after, cold cache", after_cold), ("after, warm cache", after_warm)):
+        print(f"{name:<20} {ops_per_second(func):>12.0f} verifications/s")
+
+
+if __name__ == "__main__":
+    main()
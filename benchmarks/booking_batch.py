@@ -0,0 +1,74 @@
+"""Создание броней по одной через BookingService.create_booking против одного вызова create_bookings
+
+В обоих случаях у каждой брони новый клиент. Данные откатываются в конце.
+Запуск: python -m benchmarks.booking_batch [--bookings 1000]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import event
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import engine
+from backend.database.facade import DBFacade
+from backend.services.booking import BookingService
+from benchmarks.seed import insert_chunked, make_users, rollback_session
+
+
+def make_requests(count: int, operator_code: int) -> List[models.BookingCreate]:
+    start = datetime(2030, 1, 1)
+    return [
+        models.BookingCreate(
+            number_persons=2,
+            status=models.BookingStatusType.PENDING,
+            datetime=start + timedelta(hours=i),
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            phone=f"+7 {operator_code} {i // 10000:03d}-{i // 100 % 100:02d}-{i % 100:02d}",
+        )
+        for i in range(count)
+    ]
+
+
+async def main(count: int) -> None:
+    worker = make_users(random.Random(42), 1, models.UserRole.WORKER, phone_prefix="+7 901")
+    worker_guid = worker[0]["guid"]
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def counter(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    async with rollback_session() as session:
+        await insert_chunked(session, tables.User, worker)
+        booking_service = BookingService(db_facade=DBFacade(session=session))
+
+        single, batch = make_requests(count, 912), make_requests(count, 913)
+
+        statements, started = 0, time.perf_counter()
+        for booking in single:
+            await booking_service.create_booking(requester_id=worker_guid, booking=booking)
+        single_elapsed, single_statements = time.perf_counter() - started, statements
+
+        statements, started = 0, time.perf_counter()
+        result = await booking_service.create_bookings(requester_id=worker_guid, bookings=batch)
+        batch_elapsed, batch_statements = time.perf_counter() - started, statements
+        assert result.created == count
+
+    for name, elapsed, sent in (("single", single_elapsed, single_statements),
+                                ("batch", batch_elapsed, batch_statements)):
+        print(f"{name:<7} {count} bookings  {elapsed * 1000:>9.1f} ms  {count / elapsed:>8.0f} bookings/s  "
+              f"{sent:>6} statements")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1000)
+    asyncio.run(main(parser.parse_args().bookings))
@@ -0,0 +1,120 @@
+"""Одновременные брони на одно время: мест не должно быть занято больше вместимости
+
+Каждая бронь создается через BookingService в своей сессии и транзакции, у каждой свой клиент.
+Проверяется, что отказы - только 409, счетчик не превышает вместимость и совпадает с суммой
+созданных броней, а пакет броней на заполненное время не создает клиентов. Созданные данные удаляются
+в конце. Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.booking_capacity [--concurrency 500] [--capacity 100]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from backend.database.facade import DBFacade
+from backend.services.booking import BookingService
+from benchmarks.seed import insert_chunked, make_users
+
+
+async def main(concurrency: int, capacity: int) -> int:
+    rng = random.Random()
+    worker = make_users(rng, 1, models.UserRole.WORKER, phone_prefix="+7 901")
+    worker_guid = worker[0]["guid"]
+    slot = datetime(2031, 1, 1) + timedelta(minutes=rng.randrange(10 ** 6))
+    operator = rng.choice((915, 916, 917, 925, 926))
+    phones = [f"+7 {operator} {rng.randrange(1000):03d}-{i // 100:02d}-{i % 100:02d}" for i in range(concurrency)]
+    batch_phones = [f"+7 {operator + 1} {rng.randrange(1000):03d}-00-{i:02d}" for i in range(10)]
+
+    async with async_session() as session:
+        if (await session.execute(select(tables.BookingSlot).where(tables.BookingSlot.datetime == slot))).first() \
+                or (await session.execute(select(tables.User.guid).where(
+                    tables.User.phone.in_(phones + batch_phones)))).first():
+            print(f"Время {slot} или номера клиентов уже заняты, повторите запуск")
+            return 1
+        await insert_chunked(session, tables.User, worker)
+        await insert_chunked(session, tables.BookingSlot, [{"datetime": slot, "reserved": 0, "capacity": capacity}])
+        await session.commit()
+
+    async def create(i: int):
+        booking = models.BookingCreate(
+            number_persons=rng.randint(1, 3),
+            status=models.BookingStatusType.PENDING,
+            datetime=slot,
+            first_name=f"First{i}",
+            phone=phones[i],
+        )
+        async with async_session() as session:
+            return await BookingService(db_facade=DBFacade(session=session)).create_booking(
+                requester_id=worker_guid, booking=booking)
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(create(i) for i in range(concurrency)), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+
+        created = [result for result in results if isinstance(result, models.BookingGet)]
+        rejected = [result for result in results if isinstance(result, HTTPException) and result.status_code == 409]
+        errors = [result for result in results if isinstance(result, Exception) and result not in rejected]
+        async with async_session() as session:
+            reserved = (await session.execute(
+                select(tables.BookingSlot.reserved).where(tables.BookingSlot.datetime == slot))).scalar_one()
+            booked = (await session.execute(
+                select(func.coalesce(func.sum(tables.Booking.number_persons), 0))
+                .where(tables.Booking.datetime == slot, tables.Booking.user_created == worker_guid)
+            )).scalar_one()
+
+        # Время заполнено: брони пакета отклоняются до создания клиентов
+        async with async_session() as session:
+            batch = await BookingService(db_facade=DBFacade(session=session)).create_bookings(
+                requester_id=worker_guid,
+                bookings=[
+                    models.BookingCreate(number_persons=3, status=models.BookingStatusType.PENDING, datetime=slot,
+                                         first_name=f"Batch{i}", phone=phone)
+                    for i, phone in enumerate(batch_phones)
+                ],
+            )
+        async with async_session() as session:
+            batch_customers = (await session.execute(
+                select(func.count()).select_from(tables.User).where(tables.User.phone.in_(batch_phones))
+            )).scalar_one()
+    finally:
+        async with async_session() as session:
+            await BookingDAO(session).delete_where(tables.Booking.user_created == worker_guid)
+            await session.execute(delete(tables.User).where(tables.User.phone.in_(phones + batch_phones)))
+            await session.execute(delete(tables.User).where(tables.User.guid == worker_guid))
+            await session.execute(delete(tables.BookingSlot).where(tables.BookingSlot.datetime == slot))
+            await session.commit()
+
+    checks = {
+        "only 409 rejections": not errors,
+        f"reserved {reserved} <= capacity {capacity}": reserved <= capacity,
+        "counter matches bookings": reserved == booked == sum(booking.number_persons for booking in created),
+        "slot filled": reserved > capacity - 3 or not rejected,
+        "rejected batch creates no customers": batch.created > 0 or batch_customers == 0,
+    }
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+    for error in errors[:3]:
+        print(f"      {type(error).__name__}: {error}")
+    print(f"{len(created)} created, {len(rejected)} rejected, {concurrency / elapsed:>8.0f} requests/s")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=100)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.concurrency, args.capacity)))
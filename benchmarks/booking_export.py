@@ -0,0 +1,79 @@
+"""Выгрузка всех броней через BookingService.export_bookings: память не должна расти с числом строк
+
+Брони создаются пачками в транзакции, которая откатывается в конце. Во время выгрузки
+замеряется прирост RSS относительно уровня после заполнения. Завершается с кодом 1,
+если прирост больше --max-rss-mb или выгружены не все строки.
+Запуск: python -m benchmarks.booking_export [--bookings 1000000] [--format ndjson] [--max-rss-mb 64]
+"""
+import argparse
+import asyncio
+import gc
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from backend import models
+from backend.config import config
+from backend.database import tables
+from backend.database.facade import DBFacade
+from backend.services.booking import BookingService
+from benchmarks.seed import insert_chunked, make_bookings, make_users, rollback_session
+from benchmarks.utils import rss_bytes
+
+SEED_BATCH = 100000
+
+
+async def main(bookings_count: int, export_format: models.ExportFormat, max_rss_mb: float) -> int:
+    rng = random.Random(42)
+    workers = make_users(rng, 10, models.UserRole.WORKER, phone_prefix="+7 901")
+    customers = make_users(rng, 1000, models.UserRole.USER, phone_prefix="+7 902")
+    admin = make_users(rng, 1, models.UserRole.ADMIN, phone_prefix="+7 903")
+
+    async with rollback_session() as session:
+        await insert_chunked(session, tables.User, workers + customers + admin)
+        # Пачками, чтобы сами тестовые данные не поднимали RSS процесса
+        for start in range(0, bookings_count, SEED_BATCH):
+            await insert_chunked(session, tables.Booking, make_bookings(
+                rng, min(SEED_BATCH, bookings_count - start), [c["guid"] for c in customers],
+                [w["guid"] for w in workers], start=datetime(2023, 1, 1) + timedelta(seconds=start)))
+        await session.execute(text("ANALYZE bookings"))
+        session.expunge_all()
+
+        gc.collect()
+        baseline = peak = rss_bytes()
+        service = BookingService(db_facade=DBFacade(session=session))
+
+        lines, size = 0, 0
+        started = time.perf_counter()
+        chunks = await service.export_bookings(user_id=admin[0]["guid"], export_format=export_format)
+        async for chunk in chunks:
+            lines += chunk.count(b"\n")
+            size += len(chunk)
+            peak = max(peak, rss_bytes())
+        elapsed = time.perf_counter() - started
+
+    rows = lines - (export_format == models.ExportFormat.CSV)
+    growth_mb = (peak - baseline) / 2 ** 20
+    checks = {
+        f"{bookings_count} rows exported": rows == bookings_count,
+        f"RSS growth {growth_mb:.1f} MB <= {max_rss_mb} MB": growth_mb <= max_rss_mb,
+    }
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+    print(f"{rows / elapsed:>10.0f} rows/s  {size / 2 ** 20 / elapsed:>7.1f} MB/s  batch={config.EXPORT_BATCH_SIZE}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--format", type=models.ExportFormat, default=models.ExportFormat.NDJSON)
+    parser.add_argument("--max-rss-mb", type=float, default=64)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.bookings, args.format, args.max_rss_mb)))
@@ -0,0 +1,95 @@
+"""Занятость по интервалам: агрегат booking_occupancy против GROUP BY по bookings на лету
+
+Данные создаются в транзакции, которая откатывается в конце. Завершается с кодом 1,
+если агрегат расходится с GROUP BY.
+Запуск: python -m benchmarks.booking_occupancy [--bookings 1000000]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, literal_column, select, text
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from benchmarks.seed import insert_chunked, make_bookings, make_users
+
+ROUNDS = 5
+
+
+def group_by_query(start: datetime, end: datetime, bucket: models.OccupancyBucket):
+    bucket_start = func.date_trunc(literal_column(f"'{bucket.value}'"), tables.Booking.datetime)
+    return (
+        select(bucket_start.label("start"), tables.Booking.status,
+               func.coalesce(func.sum(tables.Booking.number_persons), 0).label("persons"),
+               func.count().label("bookings"))
+        .where(tables.Booking.datetime >= start, tables.Booking.datetime < end)
+        .group_by(bucket_start, tables.Booking.status)
+        .order_by(bucket_start)
+    )
+
+
+async def main(bookings_count: int) -> int:
+    rng = random.Random(42)
+    workers = make_users(rng, 10, models.UserRole.WORKER, phone_prefix="+7 901")
+    customers = make_users(rng, 1000, models.UserRole.USER, phone_prefix="+7 902")
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, workers + customers)
+        await insert_chunked(session, tables.Booking, make_bookings(
+            rng, bookings_count, [c["guid"] for c in customers], [w["guid"] for w in workers]))
+
+        dao = BookingDAO(session=session)
+        started = time.perf_counter()
+        rows = await dao.rebuild_occupancy()
+        print(f"{'rebuild':<28} {(time.perf_counter() - started) * 1000:>10.1f} ms  {rows} rows")
+        await session.execute(text("ANALYZE bookings"))
+        await session.execute(text("ANALYZE booking_occupancy"))
+
+        ranges = {
+            "2 weeks by hour": (datetime(2023, 6, 1), datetime(2023, 6, 15), models.OccupancyBucket.HOUR),
+            "year by day": (datetime(2023, 1, 1), datetime(2024, 1, 1), models.OccupancyBucket.DAY),
+        }
+
+        failed = 0
+        for name, (start, end, bucket) in ranges.items():
+            cases = {
+                f"aggregate, {name}": lambda: dao.get_occupancy(start=start, end=end, bucket=bucket),
+                f"GROUP BY, {name}": lambda: session.execute(group_by_query(start, end, bucket)),
+            }
+            for case, read in cases.items():
+                timings = []
+                for _ in range(ROUNDS):
+                    started = time.perf_counter()
+                    await read()
+                    timings.append(time.perf_counter() - started)
+                print(f"{case:<28} {min(timings) * 1000:>10.1f} ms")
+
+            aggregate = {
+                (item.start, status.value): (item.persons[status], item.bookings[status])
+                for item in await dao.get_occupancy(start=start, end=end, bucket=bucket)
+                for status in models.BookingStatusType
+                if item.bookings[status]
+            }
+            scanned = {
+                (row.start, row.status): (row.persons, row.bookings)
+                for row in (await session.execute(group_by_query(start, end, bucket))).all()
+            }
+            if aggregate != scanned:
+                failed += 1
+                print(f"FAIL  {name}: aggregate differs from GROUP BY")
+
+        await session.rollback()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1000000)
+    sys.exit(asyncio.run(main(parser.parse_args().bookings)))
@@ -0,0 +1,83 @@
+"""CPU на строку при чтении /booking/all?limit=1000: ORM-сущности с ручным копированием против проекции колонок
+
+Данные создаются в транзакции, которая откатывается в конце.
+Запуск: python -m benchmarks.booking_projection [--bookings 10000] [--limit 1000]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from benchmarks.seed import insert_chunked, make_bookings, make_users
+
+ROUNDS = 10
+
+
+async def entity_get_all(session: AsyncSession, limit: int, offset: int) -> List[models.BookingGet]:
+    """Прежний путь: полные сущности Booking с тремя joined-связями и копирование полей в цикле"""
+
+    query = select(tables.Booking).limit(limit).offset(offset)
+    db_bookings = (await session.execute(query)).scalars().unique().all()
+
+    return [
+        models.BookingGet(
+            guid=db_booking.guid,
+            user_guid=db_booking.user_guid,
+            number_persons=db_booking.number_persons,
+            datetime=db_booking.datetime,
+            status=db_booking.status,
+            first_name=db_booking.user_rel.first_name,
+            middle_name=db_booking.user_rel.middle_name,
+            last_name=db_booking.user_rel.last_name,
+            phone=db_booking.user_rel.phone,
+            user_created=db_booking.user_created,
+            user_updated=db_booking.user_updated,
+            created_at=db_booking.created_at,
+            updated_at=db_booking.updated_at,
+        )
+        for db_booking in db_bookings
+    ]
+
+
+async def main(bookings_count: int, limit: int) -> None:
+    rng = random.Random(42)
+    workers = make_users(rng, 10, models.UserRole.WORKER, phone_prefix="+7 901")
+    customers = make_users(rng, 1000, models.UserRole.USER, phone_prefix="+7 902")
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, workers + customers)
+        await insert_chunked(session, tables.Booking, make_bookings(
+            rng, bookings_count, [c["guid"] for c in customers], [w["guid"] for w in workers]))
+
+        dao = BookingDAO(session=session)
+        paths = {
+            "entities (old)": lambda: entity_get_all(session, limit, 0),
+            "projection (new)": lambda: dao.get_all(limit=limit, offset=0),
+        }
+
+        for name, read in paths.items():
+            cpu = []
+            for _ in range(ROUNDS):
+                session.expunge_all()
+                started = time.process_time()
+                rows = await read()
+                cpu.append(time.process_time() - started)
+            print(f"{name:<18} {min(cpu) / len(rows) * 1e6:>8.1f} us CPU/row  ({len(rows)} rows)")
+
+        await session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.limit))
@@ -0,0 +1,79 @@
+"""Проверка кэша сущностей на хранилище в памяти: попадания, инвалидация по версиям, потеря версий и single-flight
+
+Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.entity_cache [--concurrency 100]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from pydantic import TypeAdapter
+
+from backend.cache.cache import MemoryCache
+from backend.cache.entity import EntityCache
+
+_ADAPTER = TypeAdapter(dict)
+
+
+async def main(concurrency: int) -> int:
+    backend = MemoryCache(max_size=1000)
+    cache = EntityCache(backend, ttl=60, ttl_jitter=0.1)
+    loads = 0
+    value = {"guid": "1", "name": "first"}
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        return dict(value)
+
+    def get():
+        return cache.get_or_load("entity:1:get", load, _ADAPTER, deps=["entity:1"],
+                                 value_deps=lambda v: [f"owner:{v['guid']}"])
+
+    checks = {}
+
+    results = await asyncio.gather(*(get() for _ in range(concurrency)))
+    checks["single-flight: one load for concurrent misses"] = loads == 1 and all(r == value for r in results)
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        await get()
+    hit_us = (time.perf_counter() - started) / 1000 * 1e6
+    checks["hit: no load"] = loads == 1
+
+    value["name"] = "second"
+    await cache.invalidate("entity:1")
+    checks["entity version change reloads"] = (await get())["name"] == "second" and loads == 2
+
+    value["name"] = "third"
+    await cache.invalidate("owner:1")
+    checks["dependency version change reloads"] = (await get())["name"] == "third" and loads == 3
+
+    checks["other keys untouched"] = (await get())["name"] == "third" and loads == 3
+
+    # Вытесненная или истекшая версия не должна возвращать запись, запомненную с прежней версией
+    value["name"] = "fourth"
+    await backend.delete("owner:1")
+    checks["lost version reloads"] = (await get())["name"] == "fourth" and loads == 4
+
+    await backend.set("entity:1:get", json.dumps({"deps": {}, "value": "old schema"}))
+    checks["entry of another schema reloads"] = (await get())["name"] == "fourth" and loads == 5
+    checks["version keys expire"] = all(
+        expires_at is not None for key, (_, expires_at) in backend.storage._data.items() if not key.endswith(":get"))
+
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+    print(f"hit latency {hit_us:.1f} us, hits={cache.hits} misses={cache.misses} errors={cache.errors}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=100)
+    sys.exit(asyncio.run(main(parser.parse_args().concurrency)))
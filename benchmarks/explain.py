@@ -0,0 +1,86 @@
+"""Проверка планов запросов DAO: списки и удаление пользователя должны идти по индексам
+
+Выполняет методы DAO на засеянной БД, перехватывает отправленный SQL и запускает для него EXPLAIN.
+Данные создаются в транзакции, которая откатывается в конце. Завершается с кодом 1, если
+ожидаемый индекс не используется.
+Запуск: python -m benchmarks.explain [--bookings 100000]
+"""
+import argparse
+import asyncio
+import random
+import sys
+from typing import Awaitable, Callable, List, Tuple
+
+from sqlalchemy import event, text
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session, engine
+from backend.database.dao.booking import BookingDAO
+from backend.database.dao.user import UserDAO
+from benchmarks.seed import insert_chunked, make_bookings, make_users
+
+
+async def main(bookings_count: int) -> int:
+    rng = random.Random(42)
+    workers = make_users(rng, 10, models.UserRole.WORKER, phone_prefix="+7 901")
+    customers = make_users(rng, 5000, models.UserRole.USER, phone_prefix="+7 902")
+    worker_guid, customer_guid = workers[0]["guid"], customers[0]["guid"]
+
+    statements: List[Tuple[str, tuple]] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, workers + customers)
+        await insert_chunked(session, tables.Booking, make_bookings(
+            rng, bookings_count, [c["guid"] for c in customers], [w["guid"] for w in workers]))
+        await session.execute(text("ANALYZE bookings"))
+        await session.execute(text("ANALYZE users"))
+
+        booking_dao, user_dao = BookingDAO(session=session), UserDAO(session=session)
+        first_page = await booking_dao.get_all(limit=100, offset=0)
+        after = models.Cursor(created_at=first_page[-1].created_at, guid=first_page[-1].guid)
+
+        cases: List[Tuple[str, Callable[[], Awaitable], str]] = [
+            ("BookingDAO.get_all", lambda: booking_dao.get_all(limit=100, offset=0),
+             "ix_bookings_created_at_guid"),
+            ("BookingDAO.get_all (cursor)", lambda: booking_dao.get_all(limit=100, offset=0, after=after),
+             "ix_bookings_created_at_guid"),
+            ("BookingDAO.get_all_by_user_id", lambda: booking_dao.get_all_by_user_id(customer_guid, 100, 0),
+             "ix_bookings_user_guid_created_at_guid"),
+            ("UserDAO.get_all", lambda: user_dao.get_all(limit=100, offset=0),
+             "ix_users_created_at_guid"),
+            ("UserDAO.get_all_with_role", lambda: user_dao.get_all_with_role(100, 0, models.UserRole.WORKER),
+             "ix_users_role_created_at_guid"),
+            ("UserDAO.delete", lambda: user_dao.delete(guid=worker_guid),
+             "ix_bookings_user_created"),
+        ]
+
+        raw = (await (await session.connection()).get_raw_connection()).driver_connection
+        failed = 0
+        for name, call, index in cases:
+            statements.clear()
+            await call()
+            plan = "\n".join(
+                row[0]
+                for statement, parameters in statements
+                for row in await raw.fetch(f"EXPLAIN {statement}", *(parameters or ()))
+            )
+            ok = index in plan
+            failed += not ok
+            print(f"{'ok' if ok else 'FAIL':<5} {name:<32} {index}")
+            if not ok:
+                print(plan)
+
+        await session.rollback()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=100000)
+    sys.exit(asyncio.run(main(parser.parse_args().bookings)))
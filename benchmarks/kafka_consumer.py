@@ -0,0 +1,73 @@
+"""Пропускная способность BatchConsumer на брокере в памяти
+
+Обработчик имитирует коммит в БД задержкой на пачку. Проверяется порядок сообщений в партициях,
+зафиксированные смещения и то, что чтение приостанавливается при переполнении.
+Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.kafka_consumer [--messages 100000] [--partitions 8] [--batch-ms 2]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from backend.kafka.broker import KafkaMessage, MemoryBroker
+from backend.kafka.consumer import BatchConsumer
+
+TOPIC = "booking"
+
+
+async def main(messages: int, partitions: int, batch_ms: float, concurrency: int, max_pending: int) -> int:
+    broker = MemoryBroker(TOPIC, partitions)
+    for i in range(messages):
+        broker.produce(i % partitions, str(i).encode())
+
+    seen: Dict[int, List[int]] = defaultdict(list)
+    paused = 0
+
+    async def process(batch: List[KafkaMessage]) -> None:
+        nonlocal paused
+        paused += broker.paused
+        await asyncio.sleep(batch_ms / 1000)
+        seen[batch[0].partition] += [message.offset for message in batch]
+
+    consumer = BatchConsumer(broker, process, batch_size=100, concurrency=concurrency, max_pending=max_pending,
+                             fetch_timeout=0.05)
+    run = asyncio.create_task(consumer.run())
+
+    started = time.perf_counter()
+    while consumer.processed < messages:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    consumer.stop()
+    ok = await run
+
+    per_partition = messages // partitions
+    checks = {
+        "all batches processed": ok and consumer.processed == messages,
+        "order within partitions": all(offsets == sorted(offsets) for offsets in seen.values()),
+        "offsets committed": all(broker.committed.get((TOPIC, p)) == len(seen[p]) for p in range(partitions))
+                             and len(seen[0]) >= per_partition,
+        "fetching paused under load": paused > 0 or max_pending >= messages,
+    }
+
+    failed = 0
+    for name, passed in checks.items():
+        failed += not passed
+        print(f"{'ok' if passed else 'FAIL':<5} {name}")
+    print(f"{messages / elapsed:>10.0f} messages/s  partitions={partitions} concurrency={concurrency} "
+          f"batch latency={batch_ms}ms")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--partitions", type=int, default=8)
+    parser.add_argument("--batch-ms", type=float, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-pending", type=int, default=1000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.messages, args.partitions, args.batch_ms, args.concurrency, args.max_pending)))
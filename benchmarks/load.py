@@ -0,0 +1,197 @@
+"""Нагрузочный тест приложения в этом же процессе через ASGI на наборе данных benchmarks.seed
+
+Каждый маршрут нагружается отдельно: `--concurrency` клиентов без пауз в течение `--duration` секунд
+после прогрева. Для маршрута выводятся запросы в секунду, запросы на секунду процессорного времени
+(один event loop - это одно ядро) и перцентили задержки. Результат пишется в JSON, чтобы сравнивать
+запуски; с --baseline выводится изменение относительно прошлого результата.
+Брони, созданные тестом, и их клиенты удаляются в конце.
+Запуск: python -m benchmarks.seed && python -m benchmarks.load [--endpoints booking_all booking_new]
+        [--concurrency 32] [--duration 10] [--output load.json] [--baseline old.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+
+from backend.config import config
+from backend.database import tables
+from backend.database.connection import async_session, engine
+from backend.database.dao.booking import BookingDAO
+from backend.main import app
+from benchmarks.seed import BENCH_PASSWORD, BENCH_PHONE
+from benchmarks.utils import asgi_request, percentile
+
+# Брони теста создаются на отдельные минуты после LOAD_START, чтобы не упираться во вместимость
+LOAD_START = datetime(2040, 1, 1)
+LOAD_PHONE_PREFIX = "+7 917"
+
+Request = Tuple[str, str, str, Optional[dict]]
+
+
+def _new_booking(n: int) -> dict:
+    return {
+        "number_persons": 1,
+        "status": "pending",
+        "datetime": (LOAD_START + timedelta(minutes=n)).isoformat(),
+        "first_name": "Load",
+        # Клиентов меньше, чем броней: часть броней идет на уже существующего пользователя
+        "phone": f"{LOAD_PHONE_PREFIX} {n % 1000:03d}-00-00",
+    }
+
+
+def make_scenarios(booking_ids: List[str]) -> Dict[str, Callable[[int], Request]]:
+    """Маршруты теста: имя -> функция номера запроса, возвращающая (метод, путь, query, тело)"""
+
+    credentials = {"phone": BENCH_PHONE, "password": BENCH_PASSWORD}
+    return {
+        "booking_all": lambda n: ("GET", "/booking/all", "limit=100", None),
+        "booking_id": lambda n: ("GET", f"/booking/id/{booking_ids[n % len(booking_ids)]}", "", None),
+        "booking_new": lambda n: ("POST", "/booking/new", "", _new_booking(n)),
+        "auth_signin": lambda n: ("POST", "/auth/signin", "", credentials),
+    }
+
+
+async def run_endpoint(request: Callable[[int], Request], token: str, concurrency: int,
+                       duration: float, warmup: float) -> Dict:
+    """Нагрузка одного маршрута. Задержки учитываются только для ответов 2xx после прогрева"""
+
+    numbers = itertools.count()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    measuring = False
+
+    async def client(deadline: float) -> None:
+        while time.monotonic() < deadline:
+            method, path, query, body = request(next(numbers))
+            started = time.perf_counter()
+            try:
+                status, _, _ = await asgi_request(app, method, path, token, query, body)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if measuring:
+                statuses[str(status)] += 1
+                if isinstance(status, int) and status < 300:
+                    latencies.append(elapsed)
+
+    if warmup:
+        await asyncio.gather(*(client(time.monotonic() + warmup) for _ in range(concurrency)))
+
+    measuring = True
+    cpu_started, started = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(client(time.monotonic() + duration) for _ in range(concurrency)))
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    return {
+        "requests": sum(statuses.values()),
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "statuses": dict(statuses),
+        "rps": round(len(latencies) / elapsed, 1),
+        "rps_per_cpu_second": round(len(latencies) / cpu, 1) if cpu else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: Dict, baseline: Dict) -> None:
+    """Изменение rps и p99 относительно прошлого запуска"""
+
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or not previous["rps"] or not previous["p99_ms"]:
+            continue
+        print(f"{name:<14} rps {(current['rps'] / previous['rps'] - 1) * 100:>+7.1f}%  "
+              f"p99 {(current['p99_ms'] / previous['p99_ms'] - 1) * 100:>+7.1f}%")
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with async_session() as session:
+        bookings = (await session.execute(select(func.count()).select_from(tables.Booking))).scalar_one()
+        users = (await session.execute(select(func.count()).select_from(tables.User))).scalar_one()
+        booking_ids = [str(guid) for guid in (await session.execute(
+            select(tables.Booking.guid).where(tables.Booking.datetime < LOAD_START).limit(1000))).scalars()]
+    if not booking_ids:
+        print("Нет броней, сначала запустите python -m benchmarks.seed")
+        return 1
+
+    status, _, body = await asgi_request(app, "POST", "/auth/signin", body={"phone": BENCH_PHONE,
+                                                                           "password": BENCH_PASSWORD})
+    if status != 200:
+        print(f"signin: HTTP {status} {body!r}, сначала запустите python -m benchmarks.seed")
+        return 1
+    token = json.loads(body)["access_token"]
+
+    scenarios = make_scenarios(booking_ids)
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "dataset": {"users": users, "bookings": bookings},
+            "config": {name: getattr(config, name) for name in (
+                "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "CACHE_BACKEND", "BCRYPT_ROUNDS", "PASSWORD_HASH_WORKERS",
+                "SQL_TRACE", "METRICS_ENABLED")},
+        },
+        "endpoints": {},
+    }
+    await app.router.startup()
+    try:
+        for name in args.endpoints:
+            result = await run_endpoint(scenarios[name], token, args.concurrency, args.duration, args.warmup)
+            results["endpoints"][name] = result
+            print(f"{name:<14} {result['rps']:>8.0f} req/s {result['rps_per_cpu_second'] or 0:>8.0f} req/cpu-s  "
+                  f"p50 {result['p50_ms']:>7.1f}  p95 {result['p95_ms']:>7.1f}  p99 {result['p99_ms']:>7.1f} ms  "
+                  f"errors {result['errors']}")
+    finally:
+        await app.router.shutdown()
+        async with async_session() as session:
+            await BookingDAO(session).delete_where(tables.Booking.datetime >= LOAD_START)
+            await session.execute(delete(tables.BookingSlot).where(tables.BookingSlot.datetime >= LOAD_START))
+            await session.execute(delete(tables.User).where(tables.User.phone.startswith(LOAD_PHONE_PREFIX)))
+            await session.commit()
+        await engine.dispose()
+
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            print_comparison(results, json.load(baseline))
+
+    return 1 if any(result["errors"] for result in results["endpoints"].values()) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoints", nargs="+", choices=["booking_all", "booking_id", "booking_new", "auth_signin"],
+                        default=["booking_all", "booking_id", "booking_new", "auth_signin"])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--output", default="load.json")
+    parser.add_argument("--baseline", default=None, help="previous results to compare with")
+    sys.exit(asyncio.run(main(parser.parse_args())))
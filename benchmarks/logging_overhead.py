@@ -0,0 +1,98 @@
+"""Накладные расходы журнала запросов на один запрос: без middleware, BaseHTTPMiddleware
+с синхронной записью в файл (как было) и ASGI middleware с пакетной записью
+
+Запросы вызываются напрямую через ASGI, без сети. Логи пишутся во временный каталог.
+Запуск: python -m benchmarks.logging_overhead [--requests 20000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from http import HTTPStatus
+
+from fastapi import FastAPI
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from backend.logging.sink import BatchingFileSink
+from backend.middleware.logging import LoggingMiddleware
+
+FORMAT = "{time:HH:mm:ss DD-MM-YYYY} | {level: <8} | {message}"
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    """Прежняя реализация LoggingMiddleware"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        logger.info(f"{request.client.host}:{request.client.port} | {request.method} {request.url.path} - "
+                    f"{response.status_code} {HTTPStatus(response.status_code).phrase}")
+        return response
+
+
+def make_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/item/{guid}")
+    async def item(guid: str):
+        return PlainTextResponse(guid)
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def run(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/item/42", "raw_path": b"/item/42", "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        logger.remove()
+        baseline = await run(make_app(), requests)
+
+        logger.remove()
+        logger.add(os.path.join(directory, "before.log"), format=FORMAT)
+        before = await run(make_app(BaseHTTPLoggingMiddleware), requests)
+
+        results = {}
+        for name, serialize in (("after", False), ("after, json", True)):
+            logger.remove()
+            sink = BatchingFileSink(os.path.join(directory, f"{name}.log"))
+            logger.add(sink, format=FORMAT, serialize=serialize)
+            results[name] = await run(make_app(LoggingMiddleware), requests)
+            logger.remove()
+
+    print(f"{'no middleware':<34} {baseline * 1e6:>8.1f} us/request")
+    print(f"{'before (BaseHTTPMiddleware, sync)':<34} {before * 1e6:>8.1f} us/request  "
+          f"overhead {(before - baseline) * 1e6:>6.1f} us")
+    for name, elapsed in results.items():
+        print(f"{name + ' (ASGI, batched)':<34} {elapsed * 1e6:>8.1f} us/request  "
+              f"overhead {(elapsed - baseline) * 1e6:>6.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,117 @@
+"""Накладные расходы метрик на запрос: приложение без метрик против MetricsMiddleware и
+таймеров методов фасада
+
+Обработчик похож на /booking/all: два вызова фасада и страница из 100 броней в ответе.
+Запросы вызываются напрямую через ASGI, без сети и БД. Завершается с кодом 1, если
+накладные расходы больше --max-overhead процентов.
+Запуск: python -m benchmarks.metrics_overhead [--requests 20000] [--max-overhead 2]
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from fastapi import FastAPI
+
+from backend import models
+from backend.metrics import Histogram, db_facade_seconds, timed_methods
+from backend.middleware.metrics import MetricsMiddleware
+from benchmarks.utils import ops_per_second
+
+PAGE = [
+    models.BookingGet(
+        guid=uuid.uuid4(), user_guid=uuid.uuid4(), number_persons=2, status=models.BookingStatusType.PENDING,
+        datetime=datetime(2030, 1, 1), first_name="First", last_name="Last", phone="+7 900 000-00-00",
+        user_created=uuid.uuid4(), user_updated=uuid.uuid4(), created_at=datetime(2030, 1, 1),
+        updated_at=datetime(2030, 1, 1),
+    )
+    for _ in range(100)
+]
+
+
+class Facade:
+    """Фасад без БД: только await, как у вызова, который отдал результат из кэша"""
+
+    async def get_principal(self, guid: uuid.UUID) -> models.Principal:
+        await asyncio.sleep(0)
+        return models.Principal(user_id=guid, role=models.UserRole.ADMIN)
+
+    async def get_all_bookings(self, limit: int, offset: int) -> List[models.BookingGet]:
+        await asyncio.sleep(0)
+        return PAGE[:limit]
+
+
+@timed_methods(db_facade_seconds)
+class TimedFacade(Facade):
+    get_principal = Facade.get_principal
+    get_all_bookings = Facade.get_all_bookings
+
+
+def make_app(facade: Facade, metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/booking/all", response_model=List[models.BookingGet])
+    async def get_all_bookings(limit: int = 100):
+        await facade.get_principal(guid=uuid.uuid4())
+        return await facade.get_all_bookings(limit=limit, offset=0)
+
+    if metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def run(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/booking/all", "raw_path": b"/booking/all", "root_path": "", "query_string": b"limit=100",
+        "headers": [], "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int, max_overhead: float) -> int:
+    plain, instrumented = make_app(Facade(), metrics=False), make_app(TimedFacade(), metrics=True)
+
+    # Попеременные прогоны, чтобы прогрев и шум влияли на оба варианта одинаково
+    baseline, measured = [], []
+    for _ in range(5):
+        baseline.append(await run(plain, requests // 5))
+        measured.append(await run(instrumented, requests // 5))
+    before, after = min(baseline), min(measured)
+    overhead = (after - before) / before * 100
+
+    histogram = Histogram("bench_seconds", "", labels=("route", "status"))
+    observe = ops_per_second(lambda: histogram.observe(0.012, "/booking/all", "200"))
+
+    print(f"{'without metrics':<20} {before * 1e6:>8.1f} us/request")
+    print(f"{'with metrics':<20} {after * 1e6:>8.1f} us/request  overhead {(after - before) * 1e6:>5.1f} us "
+          f"({overhead:.2f}%)")
+    print(f"{'histogram observe':<20} {1e9 / observe:>8.0f} ns")
+
+    ok = overhead <= max_overhead
+    print(f"{'ok' if ok else 'FAIL':<5} overhead <= {max_overhead}%")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--max-overhead", type=float, default=2.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.requests, args.max_overhead)))
@@ -0,0 +1,93 @@
+"""Сумма метрик нескольких воркеров через общий каталог (backend.metrics.multiprocess.SharedMetrics)
+
+Дочерние процессы изображают воркеры gunicorn: каждый считает свои запросы и сохраняет снимок.
+/metrics из любого воркера должен отдавать одну и ту же сумму, а после завершения воркера его
+счетчики остаются в сумме, а gauge-метрики пропадают. БД и приложение не нужны.
+Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.metrics_workers [--workers 4]
+"""
+import argparse
+import multiprocessing
+import re
+import sys
+import tempfile
+
+from backend.metrics.multiprocess import SharedMetrics
+from backend.metrics.registry import Registry
+
+
+def _registry(requests: int) -> Registry:
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests", labels=("route",))
+    histogram = registry.histogram("request_seconds", "Latency", buckets=(0.1, 1.0))
+    for _ in range(requests):
+        counter.inc("/booking/all")
+        histogram.observe(0.05)
+
+    @registry.collected("pool_connections", "gauge", "Connections")
+    def _pool():
+        yield (), 5
+
+    return registry
+
+
+def _worker(directory: str, requests: int, render: bool, output) -> None:
+    shared = SharedMetrics(directory, _registry(requests), flush_interval=60)
+    shared.flush()
+    output.put(shared.render() if render else None)
+
+
+def _value(text: str, name: str) -> float:
+    match = re.search(rf"^{re.escape(name)}(?:{{[^}}]*}})? (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def main(workers: int) -> int:
+    context = multiprocessing.get_context("fork")
+    output = context.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        master = SharedMetrics(directory, Registry(), flush_interval=60)
+        master.clear()
+
+        pids = []
+        for index in range(workers):
+            process = context.Process(target=_worker, args=(directory, index + 1, False, output))
+            process.start()
+            process.join()
+            output.get()
+            pids.append(process.pid)
+        expected = workers * (workers + 1) / 2
+
+        renders = []
+        for _ in range(2):
+            process = context.Process(target=_worker, args=(directory, 0, True, output))
+            process.start()
+            renders.append(output.get())
+            process.join()
+            master.mark_dead(process.pid)
+
+        master.mark_dead(pids[0])
+        process = context.Process(target=_worker, args=(directory, 0, True, output))
+        process.start()
+        after_exit = output.get()
+        process.join()
+
+    checks = {
+        "counters summed over workers": _value(renders[0], "requests_total") == expected,
+        "histograms summed over workers": _value(renders[0], "request_seconds_count") == expected,
+        "same sum from another worker": renders[0] == renders[1],
+        "exited worker counters kept": _value(after_exit, "requests_total") == expected,
+        "exited worker gauges dropped": _value(after_exit, "pool_connections") == 5 * workers,
+    }
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    sys.exit(main(parser.parse_args().workers))
@@ -0,0 +1,67 @@
+"""Задержка первой и глубокой страницы /booking/all: limit/offset против курсора (created_at, guid)
+
+Данные создаются в транзакции, которая откатывается в конце.
+Запуск: python -m benchmarks.pagination [--bookings 1000000] [--limit 100] [--page 10000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import select, text
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from benchmarks.seed import insert_chunked, make_bookings, make_users
+
+ROUNDS = 5
+
+
+async def main(bookings_count: int, limit: int, page: int) -> None:
+    rng = random.Random(42)
+    workers = make_users(rng, 10, models.UserRole.WORKER, phone_prefix="+7 901")
+    customers = make_users(rng, 1000, models.UserRole.USER, phone_prefix="+7 902")
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, workers + customers)
+        await insert_chunked(session, tables.Booking, make_bookings(
+            rng, bookings_count, [c["guid"] for c in customers], [w["guid"] for w in workers]))
+        await session.execute(text("ANALYZE bookings"))
+
+        dao = BookingDAO(session=session)
+        deep_offset = (page - 1) * limit
+        last = (await session.execute(
+            select(tables.Booking.created_at, tables.Booking.guid)
+            .order_by(tables.Booking.created_at, tables.Booking.guid)
+            .offset(deep_offset - 1)
+            .limit(1)
+        )).one()
+        deep_cursor = models.Cursor(created_at=last.created_at, guid=last.guid)
+
+        cases = {
+            "offset, page 1": lambda: dao.get_all(limit=limit, offset=0),
+            f"offset, page {page}": lambda: dao.get_all(limit=limit, offset=deep_offset),
+            "cursor, page 1": lambda: dao.get_all(limit=limit, offset=0, after=None),
+            f"cursor, page {page}": lambda: dao.get_all(limit=limit, offset=0, after=deep_cursor),
+        }
+
+        for name, read in cases.items():
+            timings = []
+            for _ in range(ROUNDS):
+                started = time.perf_counter()
+                await read()
+                timings.append(time.perf_counter() - started)
+            print(f"{name:<20} {min(timings) * 1000:>10.1f} ms")
+
+        await session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--page", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.limit, args.page))
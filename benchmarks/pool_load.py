@@ -0,0 +1,51 @@
+"""Нагрузка на пул соединений: больше конкурентных запросов, чем соединений, и задержка в очереди пула
+
+Запуск: python -m benchmarks.pool_load [--concurrency 100] [--requests 2000] [--query-ms 10]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from backend.config import config
+from backend.database.connection import async_session, engine
+from backend.database.pool import pool_metrics, pool_status
+from benchmarks.utils import percentile
+
+
+async def main(concurrency: int, requests: int, query_ms: float) -> None:
+    waits, remaining = [], requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            async with async_session() as session:
+                started = time.perf_counter()
+                await session.connection()
+                waits.append(time.perf_counter() - started)
+                await session.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": query_ms / 1000})
+
+    pool_metrics.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    print(f"pool_size={config.DB_POOL_SIZE} max_overflow={config.DB_MAX_OVERFLOW} "
+          f"pgbouncer={config.DB_PGBOUNCER} concurrency={concurrency}")
+    print(f"throughput          {len(waits) / elapsed:>10.0f} req/s")
+    for q in (50, 95, 99):
+        print(f"queue wait p{q:<3}      {percentile(waits, q) * 1000:>10.2f} ms")
+    print(f"pool                {pool_status(engine)}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--query-ms", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests, args.query_ms))
@@ -0,0 +1,82 @@
+"""SQL-запросы основных маршрутов в строгом режиме трассировки (SQL_TRACE_STRICT)
+
+Запросы идут в приложение напрямую через ASGI с токеном тестового администратора. Для каждого
+маршрута выводится заголовок Server-Timing. Созданные данные удаляются в конце. Завершается
+с кодом 1, если маршрут превысил бюджет из constants.QUERY_BUDGETS.
+Запуск: python -m benchmarks.query_budget
+"""
+import os
+
+os.environ["SQL_TRACE"] = "true"
+os.environ["SQL_TRACE_STRICT"] = "true"
+
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from backend.main import app
+from backend.services.token import TokenService
+from benchmarks.seed import insert_chunked, make_users
+from benchmarks.utils import asgi_request
+
+
+async def main() -> int:
+    rng = random.Random()
+    admin = make_users(rng, 1, models.UserRole.ADMIN, phone_prefix="+7 901")
+    customer = make_users(rng, 1, models.UserRole.USER, phone_prefix="+7 902")
+    admin_guid = admin[0]["guid"]
+    walk_in = f"+7 916 {rng.randrange(1000):03d}-{rng.randrange(100):02d}-{rng.randrange(100):02d}"
+    booked_at = datetime(2031, 6, 1) + timedelta(minutes=rng.randrange(10 ** 5))
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, admin + customer)
+        # Через DAO, чтобы бронь попала в счетчик мест и агрегат занятости
+        booking = await BookingDAO(session).create(requester_id=admin_guid, user_id=customer[0]["guid"],
+                                                   booking=models.BookingCreate(
+                                                       number_persons=2, status=models.BookingStatusType.PENDING,
+                                                       datetime=booked_at - timedelta(hours=1), first_name="Seed",
+                                                       phone=walk_in))
+        await session.commit()
+
+    token = (await TokenService().generate_auth_token(models.UserGet.model_construct(guid=admin_guid))).access_token
+    new_booking = {"number_persons": 1, "status": "pending", "datetime": booked_at.isoformat(),
+                   "first_name": "Walk-in", "phone": walk_in}
+    requests = [
+        ("GET", "/booking/all", "limit=100", None),
+        ("GET", f"/booking/id/{booking.guid}", "", None),
+        ("GET", "/booking/occupancy", "from=2031-06-01T00:00:00&to=2031-06-15T00:00:00", None),
+        ("GET", "/booking/export", "format=ndjson", None),
+        ("POST", "/booking/new", "", new_booking),
+    ]
+
+    failed = 0
+    try:
+        for method, path, query, body in requests:
+            status, headers, response = await asgi_request(app, method, path, token, query, body)
+            result = f"{status}  {headers.get(b'server-timing', b'-').decode()}"
+            # В строгом режиме превышение бюджета - ответ 500 с описанием вместо ответа маршрута
+            if status == 500:
+                failed += 1
+                result = f"FAIL  {response.decode()}"
+            print(f"{method:<5} {path[:40]:<40} {result}")
+    finally:
+        async with async_session() as session:
+            await BookingDAO(session).delete_where(tables.Booking.user_created == admin_guid)
+            await session.execute(delete(tables.User).where(tables.User.phone == walk_in))
+            await session.execute(delete(tables.User).where(tables.User.guid.in_([admin_guid, customer[0]["guid"]])))
+            await session.execute(delete(tables.BookingSlot).where(
+                tables.BookingSlot.datetime.in_([booked_at, booked_at - timedelta(hours=1)])))
+            await session.commit()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
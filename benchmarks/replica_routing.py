@@ -0,0 +1,94 @@
+"""Маршрутизация чтений DBFacade на реплики: выбор по кругу, исключение и переключение на основную БД
+
+Вместо второго Postgres используются подставные реплики: рабочая - еще один engine на основную БД,
+недоступная - engine на порт, где никто не слушает. Проверяется, что:
+- реплики выбираются по кругу;
+- отказ в подключении к реплике исключает ее на eject_seconds, а чтение уходит в основную БД;
+- ошибка запроса на реплике (statement_timeout при ожидании блокировки) передается дальше и реплику не исключает;
+- после записи в запросе чтения идут в основную БД мимо реплики.
+Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.replica_routing [--dead-port 1]
+"""
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import make_url, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.config import config
+from backend.database.connection import async_session, engine
+from backend.database.facade import facade as facade_module
+from backend.database.facade import DBFacade
+from backend.database.replicas import ReplicaSet
+
+EMAIL = "replica-routing@example.com"
+
+
+async def main(dead_port: int) -> int:
+    url = make_url(config.DB_DSN.unicode_string())
+    alive = create_async_engine(url)
+    dead = create_async_engine(url.set(port=dead_port), connect_args={"timeout": 2})
+    replica_set = ReplicaSet([alive, dead], eject_seconds=60)
+    # Фасад исключает реплики из общего набора модуля, в проверке это подставной набор
+    facade_module.replicas = replica_set
+
+    checks = {}
+    try:
+        chosen = [replica_set.choose() for _ in range(4)]
+        checks["round-robin"] = chosen[0] is chosen[2] and chosen[1] is chosen[3] and chosen[0] is not chosen[1]
+
+        # Отказ в подключении: чтение из основной БД и исключение реплики
+        async with async_session() as session, AsyncSession(dead) as replica_session:
+            db_facade = DBFacade(session=session, replica_session=replica_session)
+            try:
+                await db_facade.get_user_by_email(email=EMAIL)
+                checks["connection refused falls back to primary"] = True
+            except Exception as e:
+                print(f"unexpected {type(e).__name__}: {e}")
+                checks["connection refused falls back to primary"] = False
+        checks["refused replica ejected"] = all(replica_set.choose().kw["bind"] is alive for _ in range(4))
+
+        # Ошибка запроса: реплика остается в наборе
+        async with engine.connect() as locker:
+            await locker.execute(text("LOCK TABLE users IN ACCESS EXCLUSIVE MODE"))
+            async with async_session() as session, AsyncSession(alive) as replica_session:
+                await replica_session.execute(text("SET statement_timeout = 200"))
+                db_facade = DBFacade(session=session, replica_session=replica_session)
+                try:
+                    await db_facade.get_user_by_email(email=EMAIL)
+                    checks["query error raised"] = False
+                except DBAPIError:
+                    checks["query error raised"] = True
+            await locker.rollback()
+        checks["query error keeps replica"] = replica_set.choose() is not None
+
+        # После записи чтения идут в основную БД: недоступная реплика не используется и не исключается
+        replica_set = facade_module.replicas = ReplicaSet([dead], eject_seconds=60)
+        async with async_session() as session, AsyncSession(dead) as replica_session:
+            db_facade = DBFacade(session=session, replica_session=replica_session)
+            await db_facade.commit()
+            try:
+                await db_facade.get_user_by_email(email=EMAIL)
+                checks["reads after a write use primary"] = replica_set.choose() is not None
+            except Exception as e:
+                print(f"unexpected {type(e).__name__}: {e}")
+                checks["reads after a write use primary"] = False
+    finally:
+        await alive.dispose()
+        await dead.dispose()
+        await engine.dispose()
+
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dead-port", type=int, default=1, help="port with no Postgres listening")
+    sys.exit(asyncio.run(main(parser.parse_args().dead_port)))
@@ -0,0 +1,84 @@
+"""Запросов в секунду в зависимости от количества воркеров продакшн-сервера (runserver.py)
+
+Для каждого количества воркеров запускает сервер отдельным процессом и нагружает его
+клиентами с keep-alive соединениями из нескольких процессов.
+Запуск: python -m benchmarks.rps_by_cores [--workers 1 2 4] [--path /openapi.json] [--token ...]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from backend.config import config
+
+
+def _wait_for_port(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"server did not start on {host}:{port}")
+
+
+async def _client(host: str, port: int, request: bytes, deadline: float) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    done = 0
+    while time.monotonic() < deadline:
+        writer.write(request)
+        await writer.drain()
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(line.split(b":")[1]) for line in headers.split(b"\r\n")
+                      if line.lower().startswith(b"content-length"))
+        await reader.readexactly(length)
+        done += 1
+    writer.close()
+    return done
+
+
+def _load_process(host: str, port: int, request: bytes, connections: int, duration: float) -> int:
+    async def run():
+        deadline = time.monotonic() + duration
+        return sum(await asyncio.gather(*(_client(host, port, request, deadline) for _ in range(connections))))
+
+    return asyncio.run(run())
+
+
+def measure(workers: int, path: str, token: Optional[str], duration: float, connections: int) -> float:
+    host, port = "127.0.0.1", config.BACKEND_PORT
+    env = {**os.environ, "BACKEND_WORKERS": str(workers), "BACKEND_RELOAD": "false", "BACKEND_HOST": host}
+    server = subprocess.Popen([sys.executable, "runserver.py"], env=env)
+    try:
+        _wait_for_port(host, port)
+        auth = f"Authorization: Bearer {token}\r\n" if token else ""
+        request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{auth}\r\n".encode()
+        processes = os.cpu_count() or 1
+        with multiprocessing.Pool(processes) as pool:
+            started = time.perf_counter()
+            total = sum(pool.starmap(_load_process, [(host, port, request, connections, duration)] * processes))
+            return total / (time.perf_counter() - started)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--path", default=f"{config.BACKEND_PREFIX}/openapi.json")
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=16, help="keep-alive connections per client process")
+    args = parser.parse_args()
+
+    for workers in sorted(set(args.workers)):
+        rps = measure(workers, args.path, args.token, args.duration, args.connections)
+        print(f"workers={workers:<3} {rps:>10.0f} req/s")
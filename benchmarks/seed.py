@@ -0,0 +1,181 @@
+"""Детерминированное заполнение БД тестовыми данными через tables.User/tables.Booking
+
+Как модуль - создает постоянный набор данных для нагрузочного теста (benchmarks.load): пользователей
+по ролям, брони за год с `DATASET_START` и пользователя `BENCH_PHONE` с паролем `BENCH_PASSWORD`.
+Одинаковый --seed дает одинаковые данные. БД берется из конфигурации (POSTGRES_* или DB_DSN),
+миграции должны быть применены (alembic upgrade head).
+Запуск: python -m benchmarks.seed [--bookings 1000000] [--customers 100000] [--reset]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Sequence
+
+from sqlalchemy import delete, func, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session, engine
+from backend.database.dao.booking import BookingDAO
+from backend.database.dao.booking_occupancy import BookingOccupancyDAO
+from backend.utils.password import password_hasher
+
+CHUNK_SIZE = 3000
+COMMIT_SIZE = 100000
+
+DATASET_START = datetime(2023, 1, 1)
+DATASET_PHONE_PREFIXES = {
+    models.UserRole.ADMIN: "+7 801",
+    models.UserRole.WORKER: "+7 802",
+    models.UserRole.USER: "+7 803",
+}
+BENCH_PHONE = "+7 915 000-00-00"
+BENCH_PASSWORD = "benchmark"
+
+
+def make_users(rng: random.Random, count: int, role: models.UserRole, phone_prefix: str = "+7 900") -> List[Dict]:
+    """Генерация пользователей с уникальными телефонами"""
+
+    users = []
+    for i in range(count):
+        number = f"{rng.randrange(10 ** 7):07d}{i}"
+        users.append({
+            "guid": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "phone": f"{phone_prefix} {number}",
+            "role": role.value,
+            "is_deleted": False,
+        })
+    return users
+
+
+def make_bookings(rng: random.Random, count: int, user_guids: Sequence[uuid.UUID],
+                  creator_guids: Sequence[uuid.UUID], start: datetime = datetime(2023, 1, 1),
+                  first: int = 0) -> List[Dict]:
+    """Генерация броней, распределенных по часам начиная со `start`. `first` - номер первой брони при генерации пачками"""
+
+    statuses = [status.value for status in models.BookingStatusType]
+    bookings = []
+    for i in range(count):
+        creator = rng.choice(creator_guids)
+        bookings.append({
+            "guid": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "user_guid": rng.choice(user_guids),
+            "status": rng.choice(statuses),
+            "number_persons": rng.randint(1, 6),
+            "datetime": start + timedelta(hours=rng.randrange(24 * 365)),
+            "user_created": creator,
+            "user_updated": creator,
+            "is_deleted": False,
+            "created_at": start + timedelta(seconds=first + i),
+        })
+    return bookings
+
+
+async def insert_chunked(session: AsyncSession, table, rows: List[Dict], chunk_size: int = CHUNK_SIZE) -> None:
+    """Вставка строк пачками, чтобы не упираться в лимит параметров asyncpg"""
+
+    for i in range(0, len(rows), chunk_size):
+        await session.execute(insert(table), rows[i:i + chunk_size])
+
+
+@asynccontextmanager
+async def rollback_session() -> AsyncIterator[AsyncSession]:
+    """Сессия внутри внешней транзакции: commit() сервисов фиксирует только savepoint, в конце все откатывается"""
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            async with AsyncSession(bind=connection, expire_on_commit=False,
+                                    join_transaction_mode="create_savepoint") as session:
+                yield session
+        finally:
+            await transaction.rollback()
+
+
+async def reset_dataset(session: AsyncSession) -> None:
+    """Удаление набора данных нагрузочного теста"""
+
+    users = select(tables.User.guid).where(or_(
+        tables.User.phone == BENCH_PHONE,
+        *(tables.User.phone.startswith(prefix) for prefix in DATASET_PHONE_PREFIXES.values()),
+    ))
+    # Через DAO: удаление освобождает места в booking_slots и вычитает брони из агрегата занятости
+    await BookingDAO(session).delete_where(or_(
+        tables.Booking.user_guid.in_(users), tables.Booking.user_created.in_(users)))
+    await session.execute(delete(tables.User).where(tables.User.guid.in_(users)))
+
+
+async def seed_dataset(rng: random.Random, admins: int, workers: int, customers: int, bookings: int) -> None:
+    """Создание набора данных нагрузочного теста. Брони вставляются и фиксируются пачками по COMMIT_SIZE"""
+
+    admin_rows = make_users(rng, admins, models.UserRole.ADMIN, DATASET_PHONE_PREFIXES[models.UserRole.ADMIN])
+    worker_rows = make_users(rng, workers, models.UserRole.WORKER, DATASET_PHONE_PREFIXES[models.UserRole.WORKER])
+    customer_rows = make_users(rng, customers, models.UserRole.USER, DATASET_PHONE_PREFIXES[models.UserRole.USER])
+    bench = make_users(rng, 1, models.UserRole.WORKER)[0]
+    bench.update(phone=BENCH_PHONE, password=await password_hasher.hash(BENCH_PASSWORD))
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, admin_rows + worker_rows + customer_rows + [bench])
+        await session.commit()
+
+    user_guids = [row["guid"] for row in customer_rows]
+    creator_guids = [row["guid"] for row in admin_rows + worker_rows]
+    for first in range(0, bookings, COMMIT_SIZE):
+        count = min(COMMIT_SIZE, bookings - first)
+        async with async_session() as session:
+            await insert_chunked(session, tables.Booking, make_bookings(
+                rng, count, user_guids, creator_guids, start=DATASET_START, first=first))
+            await session.commit()
+        print(f"bookings {first + count}/{bookings}")
+
+    # Счетчики мест и агрегат занятости пересчитываются целиком, а не по одной брони
+    end = DATASET_START + timedelta(days=366)
+    async with async_session() as session:
+        await session.execute(delete(tables.BookingSlot).where(
+            tables.BookingSlot.datetime >= DATASET_START, tables.BookingSlot.datetime < end))
+        await session.execute(insert(tables.BookingSlot).from_select(
+            ["datetime", "reserved"],
+            select(tables.Booking.datetime, func.sum(tables.Booking.number_persons))
+            .where(tables.Booking.datetime >= DATASET_START, tables.Booking.datetime < end,
+                   tables.Booking.status != models.BookingStatusType.CANCELLED, ~tables.Booking.is_deleted)
+            .group_by(tables.Booking.datetime),
+        ))
+        await BookingOccupancyDAO(session).rebuild()
+        await session.execute(text("ANALYZE users, bookings, booking_slots, booking_occupancy"))
+        await session.commit()
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with async_session() as session:
+        exists = (await session.execute(select(tables.User.guid).where(tables.User.phone == BENCH_PHONE))).first()
+        if exists and not args.reset:
+            print("Набор данных уже создан, для пересоздания запустите с --reset")
+            return 1
+        if args.reset:
+            await reset_dataset(session)
+            await session.commit()
+
+    started = time.perf_counter()
+    await seed_dataset(random.Random(args.seed), args.admins, args.workers, args.customers, args.bookings)
+    print(f"seeded in {time.perf_counter() - started:.0f} s")
+    await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=100000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--reset", action="store_true", help="delete the existing dataset first")
+    sys.exit(asyncio.run(main(parser.parse_args())))
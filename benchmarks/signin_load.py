@@ -0,0 +1,74 @@
+"""Задержка /user/me, пока параллельно идут входы по паролю
+
+Нагружает запущенный сервер (python runserver.py): `--signins` клиентов непрерывно вызывают
+/auth/signin, `--readers` клиентов вызывают /user/me. Выводит перцентили задержки /user/me.
+Пользователь с указанным паролем должен существовать.
+Запуск: python -m benchmarks.signin_load --phone "+7 999 000-00-00" --password secret [--signins 16]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Tuple
+
+from backend.config import config
+from benchmarks.utils import percentile
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                   body: bytes = b"", headers: str = "") -> Tuple[int, bytes]:
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {config.BACKEND_HOST}\r\nContent-Length: {len(body)}\r\n"
+        f"Content-Type: application/json\r\n{headers}\r\n".encode() + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    length = next(int(line.split(b":")[1]) for line in lines if line.lower().startswith(b"content-length"))
+    return int(lines[0].split()[1]), await reader.readexactly(length)
+
+
+async def _loop(path: str, method: str, body: bytes, headers: str, deadline: float, latencies: List[float]) -> None:
+    reader, writer = await asyncio.open_connection(config.BACKEND_HOST, config.BACKEND_PORT)
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        code, _ = await _request(reader, writer, method, path, body, headers)
+        if code != 200:
+            raise RuntimeError(f"{method} {path}: HTTP {code}")
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def main(phone: str, password: str, signins: int, readers: int, duration: float) -> None:
+    prefix = config.BACKEND_PREFIX
+    credentials = json.dumps({"phone": phone, "password": password}).encode()
+
+    reader, writer = await asyncio.open_connection(config.BACKEND_HOST, config.BACKEND_PORT)
+    code, body = await _request(reader, writer, "POST", f"{prefix}/auth/signin", credentials)
+    writer.close()
+    if code != 200:
+        raise RuntimeError(f"signin: HTTP {code} {body!r}")
+    auth = f"Authorization: Bearer {json.loads(body)['access_token']}\r\n"
+
+    for name, signin_clients in (("idle", 0), ("signins", signins)):
+        me, signin = [], []
+        deadline = time.monotonic() + duration
+        await asyncio.gather(
+            *(_loop(f"{prefix}/user/me", "GET", b"", auth, deadline, me) for _ in range(readers)),
+            *(_loop(f"{prefix}/auth/signin", "POST", credentials, "", deadline, signin)
+              for _ in range(signin_clients)),
+        )
+        print(f"{name:<8} /user/me {len(me) / duration:>7.0f} req/s "
+              f"p50 {percentile(me, 50) * 1000:>7.1f} ms  p99 {percentile(me, 99) * 1000:>7.1f} ms  "
+              f"| signin {len(signin) / duration:>5.0f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--phone", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--signins", type=int, default=16, help="concurrent signin clients")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent /user/me clients")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.phone, args.password, args.signins, args.readers, args.duration))
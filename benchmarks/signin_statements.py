@@ -0,0 +1,64 @@
+"""Количество SELECT-запросов при входе и восстановлении пароля через AuthService
+
+Данные создаются в транзакции, которая откатывается в конце. Завершается с кодом 1,
+если вход отправляет в БД больше одного SELECT.
+Запуск: python -m benchmarks.signin_statements
+"""
+import asyncio
+import random
+import sys
+
+from sqlalchemy import event
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session, engine
+from backend.database.facade import DBFacade
+from backend.services.auth import AuthService
+from backend.utils.password import password_hasher
+from benchmarks.seed import insert_chunked, make_users
+
+PASSWORD = "benchmark-password"
+PHONE, EMAIL = "+7 912 345-67-89", "signin-benchmark@example.com"
+
+
+async def main() -> int:
+    rng = random.Random(42)
+    users = make_users(rng, 1, models.UserRole.USER, phone_prefix="+7 901")
+    users[0].update(phone=PHONE, email=EMAIL, password=await password_hasher.hash(PASSWORD))
+
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, users)
+        auth_service = AuthService(db_facade=DBFacade(session=session))
+
+        cases = {
+            "signin by phone": (lambda: auth_service.signin(
+                models.UserSignIn(phone=PHONE, password=PASSWORD)), 1),
+            "signin by email": (lambda: auth_service.signin(
+                models.UserSignIn(email=EMAIL, password=PASSWORD)), 1),
+            "forgot_password": (lambda: auth_service.forgot_password(
+                models.UserForgotPassword(phone=PHONE)), 2),
+        }
+
+        failed = 0
+        for name, (call, expected) in cases.items():
+            statements.clear()
+            await call()
+            selects = sum(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+            ok = selects <= expected
+            failed += not ok
+            print(f"{'ok' if ok else 'FAIL':<5} {name:<18} {selects} SELECT(s), expected at most {expected}")
+
+        await session.rollback()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
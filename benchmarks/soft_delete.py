@@ -0,0 +1,127 @@
+"""Удаление пользователя с большим количеством броней: пометка в API и физическое удаление очисткой
+
+Работник создает `--bookings` броней для клиента. Удаление работника через DBFacade должно занимать один
+UPDATE независимо от количества броней, а очистка (backend.maintenance.Purger) не должна трогать брони,
+созданные им для клиента: они и их места остаются, работник остается помеченным, пока на него ссылаются.
+Места броней удаленного клиента освобождаются сразу, до очистки, а сам клиент очисткой удаляется.
+Созданные данные удаляются в конце.
+Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.soft_delete [--bookings 10000] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, or_, select
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from backend.database.facade import DBFacade
+from backend.maintenance import Purger
+from benchmarks.seed import insert_chunked, make_users
+
+
+async def main(count: int, batch_size: int) -> int:
+    rng = random.Random()
+    worker = make_users(rng, 1, models.UserRole.WORKER, phone_prefix="+7 901")[0]
+    customer, leaving = make_users(rng, 2, models.UserRole.USER, phone_prefix="+7 902")
+    times = [datetime(2033, 1, 1) + timedelta(minutes=i) for i in range(count)]
+    leaving_times = [datetime(2033, 6, 1) + timedelta(minutes=i) for i in range(100)]
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, [worker, customer, leaving])
+        # Телефон в BookingCreate не используется: id клиента передается явно
+        for first in range(0, count, 1000):
+            await BookingDAO(session).create_many(requester_id=worker["guid"], bookings=[
+                (customer["guid"], models.BookingCreate(number_persons=1, status=models.BookingStatusType.PENDING,
+                                                        datetime=at, first_name="Soft", phone="+7 916 000-00-00"))
+                for at in times[first:first + 1000]
+            ])
+        # Клиент бронирует сам, чтобы эти брони не ссылались на работника
+        await BookingDAO(session).create_many(requester_id=leaving["guid"], bookings=[
+            (leaving["guid"], models.BookingCreate(number_persons=1, status=models.BookingStatusType.PENDING,
+                                                   datetime=at, first_name="Soft", phone="+7 916 000-00-00"))
+            for at in leaving_times
+        ])
+        await session.commit()
+
+    async def reserved_seats(at) -> int:
+        async with async_session() as session:
+            return (await session.execute(
+                select(func.coalesce(func.sum(tables.BookingSlot.reserved), 0))
+                .where(tables.BookingSlot.datetime.in_(at)))).scalar_one()
+
+    async def referencing() -> int:
+        async with async_session() as session:
+            return (await session.execute(select(func.count()).select_from(tables.Booking).where(or_(
+                tables.Booking.user_created == worker["guid"], tables.Booking.user_updated == worker["guid"],
+            )))).scalar_one()
+
+    try:
+        async with async_session() as session:
+            db_facade = DBFacade(session=session)
+            await db_facade.delete_user(guid=leaving["guid"])
+            await db_facade.commit()
+        leaving_reserved = await reserved_seats(leaving_times)
+
+        started = time.perf_counter()
+        async with async_session() as session:
+            db_facade = DBFacade(session=session)
+            await db_facade.delete_user(guid=worker["guid"])
+            await db_facade.commit()
+        delete_ms = (time.perf_counter() - started) * 1000
+
+        async with async_session() as session:
+            principal = await DBFacade(session=session).get_principal(guid=worker["guid"])
+        kept = await referencing()
+        reserved_before = await reserved_seats(times)
+
+        started = time.perf_counter()
+        purged = await Purger(batch_size=batch_size).purge()
+        purge_seconds = time.perf_counter() - started
+
+        async with async_session() as session:
+            worker_rows, leaving_rows = [(await session.execute(
+                select(func.count()).select_from(tables.User).where(tables.User.guid == guid))).scalar_one()
+                for guid in (worker["guid"], leaving["guid"])]
+        reserved = await reserved_seats(times)
+        left = await referencing()
+    finally:
+        async with async_session() as session:
+            await BookingDAO(session).delete_where(tables.Booking.user_guid.in_([customer["guid"], leaving["guid"]]))
+            await session.execute(delete(tables.User).where(
+                tables.User.guid.in_([worker["guid"], customer["guid"], leaving["guid"]])))
+            await session.execute(delete(tables.BookingSlot).where(
+                tables.BookingSlot.datetime.in_(times + leaving_times)))
+            await session.commit()
+
+    checks = {
+        "deleted customer seats released before purge": leaving_reserved == 0,
+        "deleted worker has no access": principal is not None and principal.is_deleted,
+        f"{count} bookings kept until purge": kept == count,
+        "deleted customer purged": leaving_rows == 0,
+        "worker kept while referenced": worker_rows == 1,
+        "bookings created by worker kept": left == count,
+        "seats of kept bookings kept": reserved == reserved_before > 0,
+    }
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+    print(f"delete {delete_ms:>8.1f} ms")
+    print(f"purge  {purged / purge_seconds:>8.0f} rows/s ({purged} rows, batch {batch_size})")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.bookings, args.batch_size)))
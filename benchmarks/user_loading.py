@@ -0,0 +1,63 @@
+"""Время запроса и количество строк при чтении пользователя с 100k броней: joined против noload
+
+Данные создаются в транзакции, которая откатывается в конце.
+Запуск: python -m benchmarks.user_loading [--bookings 100000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import joinedload
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session, engine
+from backend.database.loading import LoadStrategy, USER_COLLECTIONS, user_load_options
+from benchmarks.seed import insert_chunked, make_bookings, make_users
+
+ROUNDS = 5
+
+
+async def main(bookings_count: int) -> None:
+    rng = random.Random(42)
+    worker = make_users(rng, 1, models.UserRole.WORKER, phone_prefix="+7 901")
+    customers = make_users(rng, 1000, models.UserRole.USER, phone_prefix="+7 902")
+    worker_guid = worker[0]["guid"]
+
+    rows = []
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count_rows(conn, cursor, statement, parameters, context, executemany):
+        rows.append(cursor.rowcount)
+
+    profiles = {
+        "joined (old default)": [joinedload(relationship) for relationship in USER_COLLECTIONS],
+        "noload (new default)": user_load_options(LoadStrategy.NOLOAD),
+        "selectinload": user_load_options(LoadStrategy.SELECTINLOAD),
+    }
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, worker + customers)
+        await insert_chunked(session, tables.Booking, make_bookings(
+            rng, bookings_count, [c["guid"] for c in customers], [worker_guid]))
+
+        for name, options in profiles.items():
+            timings = []
+            for _ in range(ROUNDS):
+                session.expunge_all()
+                rows.clear()
+                query = select(tables.User).where(tables.User.guid == worker_guid).options(*options)
+                started = time.perf_counter()
+                (await session.execute(query)).unique().scalar()
+                timings.append(time.perf_counter() - started)
+            print(f"{name:<22} {min(timings) * 1000:>10.1f} ms  {sum(rows):>8} rows in {len(rows)} statements")
+
+        await session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=100000)
+    asyncio.run(main(parser.parse_args().bookings))
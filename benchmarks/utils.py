@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+import resource
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def ops_per_second(func: Callable[[], object], duration: float = 2.0) -> float:
+    """Количество вызовов функции в секунду"""
+
+    calls = 0
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Перцентиль q (0..100) по отсортированной выборке"""
+
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (Linux), иначе пиковый"""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def asgi_request(app, method: str, path: str, token: Optional[str] = None, query: str = "",
+                       body: Optional[dict] = None) -> Tuple[int, Dict[bytes, bytes], bytes]:
+    """Запрос к ASGI-приложению в этом же процессе, без сокетов. Возвращает код, заголовки и тело ответа"""
+
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    start: dict = {}
+    chunks: List[bytes] = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return start["status"], dict(start["headers"]), b"".join(chunks)
@@ -0,0 +1,101 @@
+"""Одновременные брони на один новый номер телефона: все должны создаться на одного пользователя
+
+Каждая бронь создается через BookingService в своей сессии и транзакции. Затем пакет броней
+(create_bookings) на тот же номер должен, как и одиночная бронь, заполнить пустую фамилию. Созданные данные
+удаляются в конце. Завершается с кодом 1, если проверка не прошла.
+Запуск: python -m benchmarks.walkin_upsert [--concurrency 200]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session
+from backend.database.dao.booking import BookingDAO
+from backend.database.facade import DBFacade
+from backend.services.booking import BookingService
+from benchmarks.seed import insert_chunked, make_users
+
+
+async def main(concurrency: int) -> int:
+    rng = random.Random()
+    phone = f"+7 914 {rng.randrange(1000):03d}-{rng.randrange(100):02d}-{rng.randrange(100):02d}"
+    worker = make_users(rng, 1, models.UserRole.WORKER, phone_prefix="+7 901")
+    worker_guid = worker[0]["guid"]
+    async with async_session() as session:
+        if (await session.execute(select(tables.User.guid).where(tables.User.phone == phone))).first():
+            print(f"Пользователь с номером {phone} уже существует, повторите запуск")
+            return 1
+        await insert_chunked(session, tables.User, worker)
+        await session.commit()
+
+    # Разное время у каждой брони, чтобы проверка не упиралась во вместимость
+    times = [datetime(2030, 1, 1, 12) + timedelta(minutes=i) for i in range(concurrency)]
+    batch_time = times[-1] + timedelta(minutes=1)
+
+    async def create(at: datetime):
+        booking = models.BookingCreate(number_persons=1, status=models.BookingStatusType.PENDING,
+                                       datetime=at, first_name="Walk-in", phone=phone)
+        async with async_session() as session:
+            return await BookingService(db_facade=DBFacade(session=session)).create_booking(
+                requester_id=worker_guid, booking=booking)
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(create(at) for at in times), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        async with async_session() as session:
+            users = (await session.execute(
+                select(func.count()).select_from(tables.User).where(tables.User.phone == phone))).scalar_one()
+            bookings = (await session.execute(
+                select(func.count()).select_from(tables.Booking).where(tables.Booking.user_created == worker_guid)
+            )).scalar_one()
+
+        async with async_session() as session:
+            await BookingService(db_facade=DBFacade(session=session)).create_bookings(
+                requester_id=worker_guid,
+                bookings=[models.BookingCreate(number_persons=1, status=models.BookingStatusType.PENDING,
+                                               datetime=batch_time, first_name="Batch", last_name="Walk-in",
+                                               phone=phone)],
+            )
+        async with async_session() as session:
+            names = (await session.execute(
+                select(tables.User.first_name, tables.User.last_name).where(tables.User.phone == phone))).all()
+    finally:
+        async with async_session() as session:
+            await BookingDAO(session).delete_where(tables.Booking.user_created == worker_guid)
+            await session.execute(delete(tables.User).where(tables.User.phone == phone))
+            await session.execute(delete(tables.User).where(tables.User.guid == worker_guid))
+            await session.execute(delete(tables.BookingSlot).where(
+                tables.BookingSlot.datetime.in_(times + [batch_time])))
+            await session.commit()
+
+    checks = {
+        "no failed bookings": not errors,
+        "one user for the phone": users == 1,
+        f"{concurrency} bookings created": bookings == concurrency,
+        "batch fills only empty names": names == [("Walk-in", "Walk-in")],
+    }
+    failed = 0
+    for name, ok in checks.items():
+        failed += not ok
+        print(f"{'ok' if ok else 'FAIL':<5} {name}")
+    for error in errors[:3]:
+        print(f"      {type(error).__name__}: {error}")
+    print(f"{concurrency / elapsed:>8.0f} bookings/s")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    sys.exit(asyncio.run(main(parser.parse_args().concurrency)))
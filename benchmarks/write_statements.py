@@ -0,0 +1,72 @@
+"""Количество SQL-запросов и задержка изменений брони и пользователя через DBFacade
+
+Данные создаются в транзакции, которая откатывается в конце. Завершается с кодом 1,
+если изменение отправляет в БД больше одного запроса.
+Запуск: python -m benchmarks.write_statements
+"""
+import asyncio
+import random
+import sys
+import time
+import uuid
+
+from sqlalchemy import event
+
+from backend import models
+from backend.database import tables
+from backend.database.connection import async_session, engine
+from backend.database.facade import DBFacade
+from benchmarks.seed import insert_chunked, make_bookings, make_users
+
+ROUNDS = 100
+
+
+async def main() -> int:
+    rng = random.Random(42)
+    worker = make_users(rng, 1, models.UserRole.WORKER, phone_prefix="+7 901")
+    customer = make_users(rng, 1, models.UserRole.USER, phone_prefix="+7 902")
+    booking = make_bookings(rng, 1, [customer[0]["guid"]], [worker[0]["guid"]])
+    booking_guid, customer_guid = booking[0]["guid"], customer[0]["guid"]
+
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with async_session() as session:
+        await insert_chunked(session, tables.User, worker + customer)
+        await insert_chunked(session, tables.Booking, booking)
+
+        db_facade = DBFacade(session=session)
+        booking_update = models.BookingUpdate(number_persons=2, status=models.BookingStatusType.CONFIRMED,
+                                              datetime=booking[0]["datetime"])
+        user_update = models.UserUpdate(first_name="First", last_name="Last", phone="+7 999 000-00-00",
+                                        role=models.UserRole.USER)
+
+        cases = {
+            "change_booking_status": lambda: db_facade.change_booking_status(
+                guid=booking_guid, status=models.BookingStatusType.CANCELLED),
+            "change_booking": lambda: db_facade.change_booking(guid=booking_guid, booking=booking_update),
+            "change_user": lambda: db_facade.change_user(guid=customer_guid, user=user_update),
+            "change_booking (missing)": lambda: db_facade.change_booking(guid=uuid.uuid4(), booking=booking_update),
+        }
+
+        failed = 0
+        for name, call in cases.items():
+            timings = []
+            for _ in range(ROUNDS):
+                statements.clear()
+                started = time.perf_counter()
+                await call()
+                timings.append(time.perf_counter() - started)
+            failed += len(statements) > 1
+            print(f"{name:<26} {len(statements)} statement(s)  {min(timings) * 1000:>8.2f} ms")
+
+        await session.rollback()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
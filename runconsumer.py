@@ -0,0 +1,28 @@
+import asyncio
+import signal
+import sys
+
+from backend.config import config
+from backend.kafka.booking import process_booking_batch
+from backend.kafka.broker import KafkaBroker
+from backend.kafka.consumer import BatchConsumer
+
+
+async def main() -> bool:
+    consumer = BatchConsumer(
+        broker=KafkaBroker([config.KAFKA_BOOKING_TOPIC], config.KAFKA_BOOTSTRAP_SERVERS, config.KAFKA_GROUP_ID),
+        process=process_booking_batch,
+        batch_size=config.KAFKA_BATCH_SIZE,
+        concurrency=config.KAFKA_CONCURRENCY,
+        max_pending=config.KAFKA_MAX_PENDING,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, consumer.stop)
+
+    return await consumer.run()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
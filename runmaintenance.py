@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import signal
+import sys
+
+from backend.config import config
+from backend.database.connection import engine
+from backend.maintenance import archiver, purger
+
+TASKS = {
+    "archive": archiver.archive,
+    "purge": purger.purge,
+}
+
+stopping = asyncio.Event()
+
+
+def stop() -> None:
+    stopping.set()
+    archiver.stop()
+    purger.stop()
+
+
+async def main(tasks, loop: bool) -> None:
+    event_loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        event_loop.add_signal_handler(sig, stop)
+
+    try:
+        while not stopping.is_set():
+            for task in tasks:
+                await TASKS[task]()
+            if not loop:
+                break
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=config.PURGE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    # Запуск по расписанию (cron, CronJob): python runmaintenance.py [archive] [purge]
+    # или одним постоянным процессом: python runmaintenance.py purge --loop
+    parser = argparse.ArgumentParser(description="Обслуживание БД: архивация старых броней и очистка удаленных")
+    parser.add_argument("tasks", nargs="*", metavar="task", help=f"{', '.join(TASKS)}; по умолчанию все")
+    parser.add_argument("--loop", action="store_true",
+                        help="повторять задачи каждые PURGE_INTERVAL секунд до SIGINT/SIGTERM")
+    args = parser.parse_args()
+    tasks = args.tasks or list(TASKS)
+    unknown = set(tasks) - set(TASKS)
+    if unknown:
+        parser.error(f"неизвестные задачи: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main(tasks, args.loop)))
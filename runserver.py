@@ -3,7 +3,12 @@ import uvicorn
 from backend.config import config
 
 if __name__ == "__main__":
-    uvicorn.run("backend.main:app",
-                host=config.BACKEND_HOST,
-                port=config.BACKEND_PORT,
-                reload=config.BACKEND_RELOAD)
+    if config.BACKEND_RELOAD:
+        uvicorn.run("backend.main:app",
+                    host=config.BACKEND_HOST,
+                    port=config.BACKEND_PORT,
+                    reload=config.BACKEND_RELOAD)
+    else:
+        from backend.server import Application
+
+        Application().run()